@@ -0,0 +1,109 @@
+import argparse
+import json
+import mmap
+import os
+import sys
+import time
+
+import numpy as np
+
+from vigenere_core import vigenere_transform
+from rail_fence_core import rail_offsets, rail_fence_block
+
+# Chiffrement et déchiffrement de fichiers par blocs, en mémoire constante (fichiers plus gros que la RAM).
+#   - Vigenère : lecture et écriture séquentielles par blocs ; l'indice dans la clé est reporté d'un
+#     bloc au suivant (start de vigenere_transform), le résultat est identique au chiffrement du texte
+#     entier. Sans encodage, le fichier est traité octet par octet (lettres ASCII seules) ; avec un
+#     encodage, caractère par caractère comme chiffrer_vigenere sur le texte décodé.
+#   - Rail Fence : fichiers d'entrée et de sortie projetés en mémoire (mmap). Chaque bloc du texte clair
+#     est écrit directement à sa place dans le texte chiffré (ou lu depuis ses places pour déchiffrer)
+#     grâce aux positions de départ des rails, calculées d'après la seule taille du fichier. Le
+#     chiffrement porte sur les octets : identique à rail_fence_encrypt sur le texte pour un fichier ASCII.
+# Exemples :
+#   python cipher_stream.py vigenere chiffrer message.txt message.chiffre --cle LEMON --encodage utf-8
+#   python cipher_stream.py rail-fence dechiffrer archive.chiffre archive.bin --niveaux 5
+
+CHUNK_SIZE = 1 << 20  # octets, ou caractères en mode texte
+
+def check_distinct(source, target):
+    if os.path.exists(target) and os.path.samefile(source, target):
+        raise ValueError("Le fichier de sortie doit être différent du fichier d'entrée")
+
+def vigenere_stream(chunks, key, decrypt=False):
+    # Chiffre (ou déchiffre) une suite de morceaux de texte ou d'octets comme s'ils ne formaient qu'un texte
+    start = 0
+    for chunk in chunks:
+        yield vigenere_transform(chunk, key, decrypt, start)
+        start += len(chunk)
+
+def vigenere_file(source, target, key, decrypt=False, encoding=None, chunk_size=CHUNK_SIZE):
+    # Renvoie le nombre d'octets (ou de caractères avec encoding) traités
+    check_distinct(source, target)
+    if encoding is None:
+        src, dst = open(source, 'rb'), open(target, 'wb')
+    else:
+        src, dst = open(source, encoding=encoding, newline=''), open(target, 'w', encoding=encoding, newline='')
+    count = 0
+    with src, dst:
+        for result in vigenere_stream(iter(lambda: src.read(chunk_size), src.read(0)), key, decrypt):
+            dst.write(result)
+            count += len(result)
+    return count
+
+def rail_fence_file(source, target, k, decrypt=False, chunk_size=CHUNK_SIZE):
+    # Renvoie le nombre d'octets traités
+    check_distinct(source, target)
+    size = os.path.getsize(source)
+    offsets = rail_offsets(size, k)
+    with open(source, 'rb') as src, open(target, 'w+b') as dst:
+        dst.truncate(size)
+        if size == 0:
+            return 0  # mmap refuse les fichiers vides
+        with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as src_map, mmap.mmap(dst.fileno(), size) as dst_map:
+            source_bytes, target_bytes = np.frombuffer(src_map, dtype=np.uint8), np.frombuffer(dst_map, dtype=np.uint8)
+            try:
+                for start in range(0, size, chunk_size):
+                    stop = min(size, start + chunk_size)
+                    if decrypt:
+                        rail_fence_block(target_bytes, source_bytes, start, stop, k, offsets, decrypt=True)
+                    else:
+                        rail_fence_block(source_bytes, target_bytes, start, stop, k, offsets)
+            finally:
+                del source_bytes, target_bytes  # les projections ne se ferment pas tant qu'un tableau les référence
+    return size
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Chiffrement et déchiffrement de fichiers par blocs (Vigenère, Rail Fence)")
+    parser.add_argument('algorithme', choices=['vigenere', 'rail-fence'])
+    parser.add_argument('action', choices=['chiffrer', 'dechiffrer'])
+    parser.add_argument('entree', help="Fichier à traiter")
+    parser.add_argument('sortie', help="Fichier produit (différent du fichier d'entrée)")
+    parser.add_argument('--cle', help="Clé du chiffre de Vigenère")
+    parser.add_argument('--niveaux', type=int, help="Nombre de niveaux (rails) du Rail Fence")
+    parser.add_argument('--encodage', default=None,
+                        help="Vigenère : encodage du texte (ex. utf-8) pour chiffrer caractère par caractère (défaut : octet par octet)")
+    parser.add_argument('--taille-bloc', type=int, default=CHUNK_SIZE, help=f"Octets (ou caractères) par bloc (défaut : {CHUNK_SIZE})")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    decrypt = args.action == 'dechiffrer'
+    if args.taille_bloc < 1:
+        sys.exit("--taille-bloc doit être positif")
+    start = time.perf_counter()
+    try:
+        if args.algorithme == 'vigenere':
+            if args.cle is None:
+                sys.exit("--cle est obligatoire pour Vigenère")
+            count = vigenere_file(args.entree, args.sortie, args.cle, decrypt, args.encodage, args.taille_bloc)
+        else:
+            if args.niveaux is None:
+                sys.exit("--niveaux est obligatoire pour Rail Fence")
+            count = rail_fence_file(args.entree, args.sortie, args.niveaux, decrypt, args.taille_bloc)
+    except ValueError as exc:
+        sys.exit(str(exc))
+    print(json.dumps({'sortie': args.sortie, 'unites': count, 'duree_s': round(time.perf_counter() - start, 3)}))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from simulation_logic import INPUT_CLEANERS
+
+# Cache binaire des fichiers d'entrée : chaque CSV est nettoyé une seule fois puis enregistré,
+# colonne par colonne (.npy), dans un dossier voisin "<fichier>.npcache". Les chargements suivants
+# relisent ces colonnes en mémoire projetée (mmap) au lieu de ré-analyser le CSV.
+# Colonnes texte : codes entiers (projetés en mémoire) + dictionnaire des valeurs distinctes. Pandas ne
+# sait pas garder un tableau texte projeté : à la lecture, chaque valeur distincte devient une seule
+# chaîne Python, partagée par toutes les lignes qui la portent (pas de copie ligne par ligne).
+# Le cache est invalidé dès que la taille ou la date de modification du fichier source change.
+
+CACHE_SUFFIX = '.npcache'
+CACHE_FORMAT_VERSION = 3
+
+def cache_dir_for(source_path):
+    return source_path + CACHE_SUFFIX
+
+def _source_signature(source_path):
+    stat = os.stat(source_path)
+    return {'format': CACHE_FORMAT_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def _column_to_array(series):
+    # Colonnes texte : (codes, dictionnaire unicode de largeur fixe) ; code -1 pour les valeurs manquantes
+    if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+        codes, uniques = pd.factorize(series)
+        return codes, np.array([str(value) for value in uniques], dtype=str)
+    return series.to_numpy(), None
+
+def write_cache(df, source_path, rejected_rows=()):
+    # Écriture atomique : dossier temporaire puis renommage
+    cache_dir = cache_dir_for(source_path)
+    parent = os.path.dirname(os.path.abspath(source_path))
+    tmp_dir = tempfile.mkdtemp(prefix='.npcache-', dir=parent)
+    try:
+        frame = df.reset_index() if df.index.name is not None else df
+        columns = []
+        for i, column in enumerate(frame.columns):
+            values, uniques = _column_to_array(frame[column])
+            np.save(os.path.join(tmp_dir, f'col{i}.npy'), values, allow_pickle=False)
+            if uniques is not None:
+                np.save(os.path.join(tmp_dir, f'col{i}_values.npy'), uniques, allow_pickle=False)
+            columns.append({'name': column, 'dtype': str(frame[column].dtype), 'text': uniques is not None})
+        meta = dict(_source_signature(source_path), columns=columns, index=df.index.name,
+                    rejected_rows=[dict(row, valeur=str(row['valeur'])) for row in rejected_rows])
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        os.replace(tmp_dir, cache_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+def read_cache(source_path, rejected_rows=None):
+    # Renvoie None si le cache est absent ou périmé ; les lignes rejetées lors du nettoyage sont restituées
+    cache_dir = cache_dir_for(source_path)
+    try:
+        with open(os.path.join(cache_dir, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if {key: meta.get(key) for key in ('format', 'size', 'mtime_ns')} != _source_signature(source_path):
+        return None
+    data = {}
+    for i, column in enumerate(meta['columns']):
+        # np.asarray : vue ndarray ordinaire sur le tampon projeté (pas de copie)
+        values = np.asarray(np.load(os.path.join(cache_dir, f'col{i}.npy'), mmap_mode='r', allow_pickle=False))
+        if column['text']:
+            # Une chaîne par valeur distincte, suivie de NaN pour le code -1
+            uniques = np.load(os.path.join(cache_dir, f'col{i}_values.npy'), allow_pickle=False)
+            values = np.append(uniques.astype(object), np.nan)[values]
+            if column['dtype'] != 'object':
+                values = pd.array(values, dtype=column['dtype'])
+        data[column['name']] = values
+    df = pd.DataFrame(data, copy=False)
+    if rejected_rows is not None:
+        rejected_rows.extend(meta.get('rejected_rows', []))
+    return df.set_index(meta['index']) if meta['index'] is not None else df
+
+def load_cleaned_csv(source_path, kind, use_cache=True, rejected_rows=None):
+    # kind : 'relations', 'origins' ou 'destinations'
+    if use_cache:
+        df = read_cache(source_path, rejected_rows)
+        if df is not None:
+            return df
+    file_rejected_rows = []
+    df = INPUT_CLEANERS[kind](pd.read_csv(source_path), file_rejected_rows)
+    if rejected_rows is not None:
+        rejected_rows.extend(file_rejected_rows)
+    if use_cache:
+        try:
+            write_cache(df, source_path, file_rejected_rows)
+        except OSError:
+            pass  # dossier en lecture seule : on travaille sans cache
+    return df
+
+def load_data_from_paths(relations_path, origins_path, destinations_path, use_cache=True, rejected_rows=None):
+    # Même résultat que load_data_from_uploaded_files, pour des fichiers sur disque
+    return (load_cleaned_csv(relations_path, 'relations', use_cache, rejected_rows),
+            load_cleaned_csv(origins_path, 'origins', use_cache, rejected_rows),
+            load_cleaned_csv(destinations_path, 'destinations', use_cache, rejected_rows))
@@ -1,55 +1,5 @@
 import streamlit as st
-
-# Fonction pour chiffrer avec le Rail Fence Cipher
-def rail_fence_encrypt(plaintext, k):
-    rails = [''] * k
-    direction = 1  # 1 signifie descendre, -1 signifie remonter
-    rail_index = 0
-
-    for char in plaintext:
-        rails[rail_index] += char
-        if rail_index == 0:
-            direction = 1
-        elif rail_index == k - 1:
-            direction = -1
-        rail_index += direction
-
-    return ''.join(rails)
-
-# Fonction pour déchiffrer avec le Rail Fence Cipher
-def rail_fence_decrypt(ciphertext, k):
-    rails = [''] * k
-    direction = 1
-    rail_index = 0
-    rail_lengths = [0] * k
-
-    for char in ciphertext:
-        rail_lengths[rail_index] += 1
-        if rail_index == 0:
-            direction = 1
-        elif rail_index == k - 1:
-            direction = -1
-        rail_index += direction
-
-    index = 0
-    for i in range(k):
-        rails[i] = ciphertext[index:index + rail_lengths[i]]
-        index += rail_lengths[i]
-
-    result = []
-    rail_index = 0
-    direction = 1
-
-    for _ in range(len(ciphertext)):
-        result.append(rails[rail_index][0])
-        rails[rail_index] = rails[rail_index][1:]
-        if rail_index == 0:
-            direction = 1
-        elif rail_index == k - 1:
-            direction = -1
-        rail_index += direction
-
-    return ''.join(result)
+from rail_fence_core import rail_fence_encrypt, rail_fence_decrypt
 
 # Interface Streamlit
 st.title("Chiffrement Rail Fence")
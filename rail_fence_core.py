@@ -0,0 +1,89 @@
+import numpy as np
+
+# Chiffre Rail Fence (clôture de k rails), partagé par rail_fence2.py et cipher_stream.py.
+# Le texte est écrit en zigzag sur k rails puis lu rail par rail. Au lieu de construire les rails
+# caractère par caractère, on calcule directement la position de chaque caractère dans le texte
+# chiffré : le zigzag a une période de 2(k - 1) ; les rails extrêmes reçoivent un caractère par
+# période, les autres deux (à la descente puis à la remontée). Les longueurs des rails, donc leurs
+# positions de départ dans le texte chiffré (offsets), ne dépendent que de la longueur du texte.
+# Chiffrer : chiffré[position(i)] = clair[i] ; déchiffrer : clair[i] = chiffré[position(i)].
+# Sur des périodes entières, les caractères d'un rail sont une tranche à pas fixe du texte clair et
+# une tranche contiguë du texte chiffré : la copie se fait rail par rail sans tableau d'indices.
+# Le calcul se fait par blocs de positions quelconques : cipher_stream.py l'utilise pour écrire
+# chaque bloc d'un fichier directement à sa place.
+
+def rail_period(k):
+    if k < 1:
+        raise ValueError("Le nombre de niveaux doit être au moins 1")
+    return max(1, 2 * (k - 1))
+
+def rail_of(positions, k):
+    # (rail, rang dans la période : 0 à la descente, 1 à la remontée) de chaque position
+    period = rail_period(k)
+    phase = positions % period
+    return np.where(phase < k, phase, period - phase), (phase >= k).astype(np.int64)
+
+def rail_lengths(n, k):
+    period = rail_period(k)
+    full, rest = divmod(n, period)
+    rails, _ = rail_of(np.arange(period), k)
+    per_period = np.bincount(rails, minlength=k)
+    return full * per_period + np.bincount(rails[:rest], minlength=k)
+
+def rail_offsets(n, k):
+    # Position de départ de chaque rail dans le texte chiffré
+    lengths = rail_lengths(n, k)
+    return np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+
+def rail_positions(positions, n, k, offsets=None):
+    # Position dans le texte chiffré des caractères du texte clair aux positions données
+    if offsets is None:
+        offsets = rail_offsets(n, k)
+    positions = np.asarray(positions, dtype=np.int64)
+    rails, second = rail_of(positions, k)
+    per_period = np.where((rails == 0) | (rails == k - 1), 1, 2)
+    return offsets[rails] + positions // rail_period(k) * per_period + second
+
+def rail_fence_block(plain, cipher, start, stop, k, offsets, decrypt=False):
+    # Copie les caractères clairs [start, stop) à leurs places dans cipher (l'inverse si decrypt) ;
+    # plain et cipher : tableaux de la longueur du texte entier
+    period = rail_period(k)
+    first, last = -(-start // period), stop // period  # périodes entières comprises dans le bloc
+    edges = [(start, stop)] if first >= last else [(start, first * period), (last * period, stop)]
+    for lo, hi in edges:
+        if hi > lo:  # morceaux de période en bord de bloc : positions calculées une à une
+            positions = rail_positions(np.arange(lo, hi), len(plain), k, offsets)
+            if decrypt:
+                plain[lo:hi] = cipher[positions]
+            else:
+                cipher[positions] = plain[lo:hi]
+    if first >= last:
+        return
+    for rail in range(k):
+        per_period = 1 if rail in (0, k - 1) else 2
+        segment = cipher[offsets[rail] + first * per_period:offsets[rail] + last * per_period]
+        # Descente puis remontée : caractères pairs puis impairs du segment de rail
+        for rank, phase in enumerate((rail, period - rail)[:per_period]):
+            if decrypt:
+                plain[first * period + phase:last * period:period] = segment[rank::per_period]
+            else:
+                segment[rank::per_period] = plain[first * period + phase:last * period:period]
+
+def text_codes(text):
+    # Tableau de caractères (points de code uint32 pour str, octets pour bytes) et conversion inverse
+    if isinstance(text, str):
+        codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        return codes, lambda array: array.tobytes().decode('utf-32-le', 'surrogatepass')
+    return np.frombuffer(text, dtype=np.uint8), lambda array: array.tobytes()
+
+def rail_fence_encrypt(plaintext, k):
+    codes, restore = text_codes(plaintext)
+    ciphertext = np.empty_like(codes)
+    rail_fence_block(codes, ciphertext, 0, len(codes), k, rail_offsets(len(codes), k))
+    return restore(ciphertext)
+
+def rail_fence_decrypt(ciphertext, k):
+    codes, restore = text_codes(ciphertext)
+    plaintext = np.empty_like(codes)
+    rail_fence_block(plaintext, codes, 0, len(codes), k, rail_offsets(len(codes), k), decrypt=True)
+    return restore(plaintext)
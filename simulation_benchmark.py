@@ -0,0 +1,153 @@
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from simulation_logic import (
+    load_data_from_uploaded_files, build_relation_index, build_qmin_config, initialize_tracking_variables,
+    attempt_initial_q_min_delivery_h1, filter_profitable_relations_h1, run_event_loop, dispatch_day_h1, dispatch_day_h2,
+    build_results, SimulationConfig
+)
+from simulation_generator import generate_network, add_distribution_args, distribution_params, DEFAULT_DISTRIBUTIONS
+
+# Banc d'essai du simulateur sur des réseaux synthétiques de tailles croissantes : temps de chaque
+# phase (chargement des CSV, index des relations, phase QMIN, boucle journalière, résultats et indicateurs),
+# pic mémoire par phase (tracemalloc, mesuré dans une passe séparée pour ne pas fausser les temps)
+# et expéditions par seconde, pour H1 et H2. Les résultats sont écrits en JSON pour suivre les
+# performances d'une version à l'autre (un fichier .jsonl reçoit une ligne par exécution) ; chaque
+# mesure garde les paramètres du réseau généré (lois des capacités, demandes et stocks comprises).
+# Exemple :
+#   python simulation_benchmark.py --echelles 10,100,1000,10000 --sortie benchmark.json
+
+PHASES = ('load', 'index', 'qmin', 'loop', 'kpi')
+DISPATCHERS = {'H1': dispatch_day_h1, 'H2': dispatch_day_h2}
+
+def network_csv_bytes(relations_df, origins_df, destinations_df):
+    # Fichiers "téléversés" en mémoire : le chargement mesuré ne dépend pas du disque
+    return {kind: df.to_csv(index=False).encode('utf-8')
+            for kind, df in zip(('relations', 'origins', 'destinations'), (relations_df, origins_df, destinations_df))}
+
+class PhaseTimer:
+    # Temps (et pic mémoire si trace_memory) de chaque phase d'une exécution
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.wall_s, self.peak_bytes = {}, {}
+
+    def run(self, phase, func, *args):
+        if self.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.wall_s[phase] = time.perf_counter() - start
+            if self.trace_memory:
+                self.peak_bytes[phase] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+def run_phases(heuristic, csv_bytes, num_wagons, config, timer):
+    # Mêmes étapes que run_simulation_h1 / run_simulation_h2, chronométrées séparément
+    files = {kind: io.BytesIO(data) for kind, data in csv_bytes.items()}
+    relations_df, origins_df, destinations_df = timer.run('load', load_data_from_uploaded_files, files)
+    relation_index = timer.run('index', build_relation_index, relations_df, origins_df, destinations_df, config)
+    qmin_config = build_qmin_config(heuristic, "QMIN Décroissant", "", destinations_df, relation_index)
+    if heuristic == 'H2':
+        qmin_config = ('custom_order', qmin_config)
+
+    def qmin_phase():
+        sim_state, tracking_vars = initialize_tracking_variables(origins_df, destinations_df, num_wagons)
+        return attempt_initial_q_min_delivery_h1(relation_index, destinations_df, sim_state, tracking_vars, qmin_config, config)
+    sim_state, tracking_vars, rem_load_d1, rem_unload_d1 = timer.run('qmin', qmin_phase)
+    qmin_shipments = len(tracking_vars['shipments_log'])
+    day_t = timer.run('loop', run_event_loop, DISPATCHERS[heuristic], filter_profitable_relations_h1(relation_index),
+                      sim_state, tracking_vars, rem_load_d1, rem_unload_d1, config)
+
+    kpis = timer.run('kpi', build_results, sim_state, tracking_vars, origins_df, destinations_df, day_t)['kpis']
+    return {'n_relations': len(relations_df), 'n_origins': len(origins_df), 'n_destinations': len(destinations_df),
+            'days': int(day_t), 'qmin_shipments': qmin_shipments, 'shipments': len(tracking_vars['shipments_log']),
+            'profit': float(kpis['profit']), 'satisfaction_rate': float(kpis['satisfaction_rate'])}
+
+def benchmark_scale(n_nodes, heuristics=('H1', 'H2'), density=5, wagons_per_destination=4, sim_days=260,
+                    repetitions=1, trace_memory=True, seed=0, distributions=None):
+    # distributions : paramètres des lois du générateur (DEFAULT_DISTRIBUTIONS si None), repris dans chaque ligne
+    network_params = dict(DEFAULT_DISTRIBUTIONS, **(distributions or {}), origins_per_destination=density, seed=seed)
+    relations_df, origins_df, destinations_df = generate_network(n_nodes, **network_params)
+    csv_bytes = network_csv_bytes(relations_df, origins_df, destinations_df)
+    num_wagons = max(1, wagons_per_destination * len(destinations_df))
+    config = SimulationConfig(max_simulation_days=sim_days)
+    rows = []
+    for heuristic in heuristics:
+        # Meilleur temps de chaque phase sur les répétitions (moins sensible au bruit de la machine)
+        best_wall = dict.fromkeys(PHASES, float('inf'))
+        for _ in range(repetitions):
+            timer = PhaseTimer()
+            run = run_phases(heuristic, csv_bytes, num_wagons, config, timer)
+            best_wall = {phase: min(best_wall[phase], timer.wall_s[phase]) for phase in PHASES}
+        row = dict(run, n_nodes=n_nodes, heuristic=heuristic, num_wagons=num_wagons, sim_days=sim_days,
+                   network=network_params, wall_s=best_wall, total_wall_s=sum(best_wall.values()))
+        simulated_s = best_wall['qmin'] + best_wall['loop']
+        row['shipments_per_s'] = run['shipments'] / simulated_s if simulated_s > 0 else None
+        if trace_memory:
+            timer = PhaseTimer(trace_memory=True)
+            run_phases(heuristic, csv_bytes, num_wagons, config, timer)
+            row['peak_memory_bytes'] = timer.peak_bytes
+        rows.append(row)
+    return rows
+
+def environment_info():
+    return {'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'pandas': pd.__version__, 'platform': platform.platform(), 'cpu_count': os.cpu_count()}
+
+def write_benchmark(report, path):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    if path.endswith('.jsonl'):
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(report) + '\n')
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai du simulateur sur des réseaux synthétiques")
+    parser.add_argument('--echelles', default='10,100,1000', help="Nombres de nœuds séparés par des virgules (défaut : 10,100,1000)")
+    parser.add_argument('--heuristiques', default='H1,H2', help="Heuristiques mesurées (défaut : H1,H2)")
+    parser.add_argument('--densite', type=int, default=5, help="Origines reliées à chaque destination (défaut : 5)")
+    parser.add_argument('--wagons-par-destination', type=int, default=4, help="Taille de la flotte par destination (défaut : 4)")
+    parser.add_argument('--jours', type=int, default=260, help="Jours de simulation (défaut : 260)")
+    parser.add_argument('--repetitions', type=int, default=1, help="Répétitions par mesure, le meilleur temps est retenu (défaut : 1)")
+    parser.add_argument('--sans-memoire', action='store_true', help="Ne pas mesurer le pic mémoire (pas de passe tracemalloc)")
+    add_distribution_args(parser)
+    parser.add_argument('--graine', type=int, default=0)
+    parser.add_argument('--sortie', default='benchmark.json', help="Fichier de résultats (.json, ou .jsonl pour ajouter une ligne)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    heuristics = [h.strip().upper() for h in args.heuristiques.split(',') if h.strip()]
+    unknown = [h for h in heuristics if h not in DISPATCHERS]
+    if unknown:
+        sys.exit(f"Heuristique inconnue : {', '.join(unknown)}")
+    results = []
+    for n_nodes in (int(x) for x in args.echelles.split(',') if x.strip()):
+        for row in benchmark_scale(n_nodes, heuristics, args.densite, args.wagons_par_destination, args.jours,
+                                   max(1, args.repetitions), not args.sans_memoire, args.graine, distribution_params(args)):
+            results.append(row)
+            rate = f"{row['shipments_per_s']:,.0f} exp./s" if row['shipments_per_s'] else "-"
+            print(f"{n_nodes:>6} nœuds {row['heuristic']} : {row['total_wall_s']:.3f} s, {row['shipments']} expéditions, {rate}",
+                  file=sys.stderr)
+    report = {'environment': environment_info(), 'parameters': vars(args), 'results': results}
+    write_benchmark(report, args.sortie)
+    print(json.dumps({'sortie': args.sortie, 'mesures': len(results)}))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from simulation_logic import (
+    build_relation_index, initialize_tracking_variables, record_shipment_metrics, compute_kpis, state_to_dataframes,
+    record_phase_time, DEFAULT_CONFIG
+)
+
+# Borne optimale du plan de transport (troisième "heuristique", notée LP).
+# Programme linéaire agrégé sur tout l'horizon : x_r = tonnes transportées sur la relation r.
+#   origine o      : somme des x_r <= min(stock initial, capacité de chargement journalière * jours)
+#   destination d  : somme des x_r <= min(demande annuelle, capacité de déchargement journalière * jours)
+#   flotte         : somme des x_r / capacité wagon * durée aller-retour <= wagons-jours disponibles
+# Les wagons fractionnaires, l'envoi minimal et l'ordre des jours sont relâchés : la valeur obtenue
+# majore celle de toute simulation H1/H2 avec les mêmes paramètres, ce qui donne leur écart à l'optimum.
+# Sans la contrainte de flotte, c'est un problème de transport (flot de coût minimal) : les contraintes
+# sont stockées par relation (origin_idx, dest_idx de l'index CSR), jamais sous forme de matrice dense.
+#   - SciPy installé : HiGHS, matrice des contraintes creuse (CSR) ;
+#   - sinon : simplexe de réseau sur le graphe origines -> destinations, et relaxation lagrangienne de la
+#     contrainte de flotte : pour un prix λ du wagon-jour, le profit de la relation r devient
+#     c_r - λ * wagons-jours par tonne ; g(λ) = λ * flotte + (meilleur plan à ce prix) majore l'optimum.
+#     λ optimal par la méthode des plans coupants (g est convexe et affine par morceaux, chaque plan en donne une droite
+#     d'appui) ; le plan optimal est la combinaison des deux plans qui encadrent la flotte disponible.
+#     Chaque résolution repart de la base (arbre couvrant) de la précédente : seuls les coûts changent.
+
+TOLERANCE = 1e-9
+
+# --- Simplexe de réseau (problème de transport, arcs non bornés) ---
+# Nœuds : origines 0..n_o-1, destinations n_o..n_o+n_d-1 et un nœud d'écart Z (racine de l'arbre).
+# Arcs : relations o -> d, puis o -> Z (stock non expédié) et Z -> d (demande non servie), de coût nul.
+# Offres : o fournit exactement sa limite, d reçoit exactement la sienne, Z équilibre le tout.
+
+def new_transport_tree(problem):
+    # Base initiale : tout le stock part vers Z, toute la demande vient de Z (flux > 0 : arbre fortement réalisable).
+    # Les relations dont l'origine ou la destination a une limite nulle ne peuvent rien porter : écartées.
+    origin_limit, dest_limit = problem['origin_limit'], problem['dest_limit']
+    n_origins, n_dests = len(origin_limit), len(dest_limit)
+    relations = np.flatnonzero((origin_limit[problem['origin_idx']] > 0) & (dest_limit[problem['dest_idx']] > 0))
+    root = n_origins + n_dests
+    tail = np.concatenate((problem['origin_idx'][relations], np.arange(n_origins), np.full(n_dests, root)))
+    head = np.concatenate((n_origins + problem['dest_idx'][relations], np.full(n_origins, root), n_origins + np.arange(n_dests)))
+    children = [set() for _ in range(root + 1)]
+    children[root] = set(range(root))
+    return {
+        'relations': relations,
+        'tail': tail.astype(np.int64),
+        'head': head.astype(np.int64),
+        'flow': np.concatenate((np.zeros(len(relations)), origin_limit, dest_limit)),
+        'root': root,
+        'parent': [root] * root + [-1],
+        'pred': list(range(len(relations), len(relations) + root)) + [-1],
+        'up': [True] * n_origins + [False] * (n_dests + 1),  # arc pred[v] orienté de v vers son parent
+        'depth': [1] * root + [0],
+        'children': children,
+        'pivots': 0,
+    }
+
+def subtree_nodes(children, node):
+    nodes = [node]
+    for v in nodes:
+        nodes.extend(children[v])
+    return nodes
+
+def tree_potentials(tree, cost):
+    # Potentiels pi tels que coût + pi[origine de l'arc] - pi[extrémité] = 0 sur les arcs de l'arbre
+    parent, pred, up = tree['parent'], tree['pred'], tree['up']
+    pi = np.zeros(len(parent))
+    for v in subtree_nodes(tree['children'], tree['root'])[1:]:
+        pi[v] = pi[parent[v]] - cost[pred[v]] if up[v] else pi[parent[v]] + cost[pred[v]]
+    return pi
+
+def network_simplex(tree, cost):
+    # Minimise cost . flux à partir de la base courante de tree (modifiée sur place).
+    # Arc entrant : coût réduit le plus négatif d'un bloc d'arcs (calcul vectoriel). Arc sortant : règle de
+    # l'arbre fortement réalisable (dernier arc bloquant rencontré depuis le sommet du cycle), sans cyclage.
+    tail, head, flow = tree['tail'], tree['head'], tree['flow']
+    parent, pred, up, depth, children = tree['parent'], tree['pred'], tree['up'], tree['depth'], tree['children']
+    pi = tree_potentials(tree, cost)
+    n_arcs = len(tail)
+    tolerance = TOLERANCE * max(1.0, float(np.abs(cost).max()))
+    block = max(64, int(np.sqrt(n_arcs)))
+    start = scanned = 0
+    while scanned < n_arcs:
+        stop = min(n_arcs, start + block)
+        reduced = cost[start:stop] + pi[tail[start:stop]] - pi[head[start:stop]]
+        k = int(np.argmin(reduced))
+        entering, entering_cost = start + k, float(reduced[k])
+        start = 0 if stop == n_arcs else stop
+        if entering_cost >= -tolerance:
+            scanned += len(reduced)
+            continue
+        scanned = 0
+        u, v = int(tail[entering]), int(head[entering])
+        join_u, join_v = u, v
+        while join_u != join_v:
+            if depth[join_u] >= depth[join_v]: join_u = parent[join_u]
+            else: join_v = parent[join_v]
+        # Cycle : entering de u vers v, puis v -> sommet -> u. Le flux diminue sur les arcs parcourus à rebours.
+        delta, leaving, leaving_on_v_side = np.inf, -1, False
+        x = u
+        while x != join_u:
+            if up[x] and flow[pred[x]] < delta:
+                delta, leaving = flow[pred[x]], x
+            x = parent[x]
+        x = v
+        while x != join_u:
+            if not up[x] and flow[pred[x]] <= delta:
+                delta, leaving, leaving_on_v_side = flow[pred[x]], x, True
+            x = parent[x]
+        if leaving < 0:
+            raise ValueError("Programme linéaire non borné")
+        if delta > 0:
+            flow[entering] += delta
+            x = u
+            while x != join_u:
+                flow[pred[x]] += -delta if up[x] else delta
+                x = parent[x]
+            x = v
+            while x != join_u:
+                flow[pred[x]] += delta if up[x] else -delta
+                x = parent[x]
+        # Le sous-arbre détaché (sous l'arc sortant) est raccroché par l'arc entrant : le chemin entre
+        # l'extrémité de l'arc entrant et l'arc sortant change de sens, les potentiels du sous-arbre se décalent
+        node, other = (v, u) if leaving_on_v_side else (u, v)
+        children[parent[leaving]].discard(leaving)
+        new_parent, new_pred, new_up = other, entering, node == u
+        x = node
+        while True:
+            old_parent, old_pred, old_up = parent[x], pred[x], up[x]
+            if x != leaving: children[old_parent].discard(x)
+            parent[x], pred[x], up[x] = new_parent, new_pred, new_up
+            children[new_parent].add(x)
+            if x == leaving: break
+            new_parent, new_pred, new_up = x, old_pred, not old_up
+            x = old_parent
+        moved = subtree_nodes(children, node)
+        pi[moved] += -entering_cost if node == u else entering_cost
+        depth[node] = depth[other] + 1
+        for x in moved[1:]:
+            depth[x] = depth[parent[x]] + 1
+        tree['pivots'] += 1
+    return np.maximum(flow[:len(tree['relations'])], 0.0)
+
+def solve_transport(tree, profit):
+    # Plan de profit maximal sans contrainte de flotte : tonnes par relation (toutes les relations du problème)
+    cost = np.zeros(len(tree['tail']))
+    cost[:len(tree['relations'])] = -profit[tree['relations']]
+    x = np.zeros(len(profit))
+    x[tree['relations']] = network_simplex(tree, cost)
+    return x
+
+def _network_max(c, problem, max_iter=100):
+    # max c.x sous les contraintes du problème ; contrainte de flotte par relaxation lagrangienne
+    if 'tree' not in problem:
+        problem['tree'] = new_transport_tree(problem)  # base conservée d'une résolution à l'autre
+    tree = problem['tree']
+    weights, fleet = problem['fleet_weight'], problem['fleet_wagon_days']
+    x = solve_transport(tree, c)
+    if weights @ x <= fleet * (1 + TOLERANCE):
+        return x, float(c @ x)
+    # Droites d'appui de g aux deux bornes de l'intervalle de λ : plan trop gourmand (low), plan réalisable (high)
+    low = x
+    high = np.zeros(len(c))  # au-delà de max(c / poids), plus aucune relation n'est rentable
+    for _ in range(max_iter):
+        price = (c @ low - c @ high) / (weights @ low - weights @ high)
+        lower_bound = price * fleet + c @ low - price * (weights @ low)
+        x = solve_transport(tree, c - price * weights)
+        value = price * fleet + (c - price * weights) @ x
+        if value <= lower_bound + TOLERANCE * max(1.0, abs(value)):
+            break
+        if weights @ x > fleet:
+            low = x
+        else:
+            high = x
+    else:
+        raise RuntimeError("Relaxation lagrangienne : nombre maximal d'itérations atteint")
+    # Les deux plans sont optimaux au prix final : leur combinaison qui utilise toute la flotte est optimale
+    share = (fleet - weights @ high) / (weights @ low - weights @ high)
+    x = share * low + (1 - share) * high
+    return x, float(c @ x)
+
+def constraint_matrix(problem):
+    # Matrice creuse des contraintes (origines, destinations, flotte) pour HiGHS
+    from scipy.sparse import csr_matrix
+    n_origins, n_dests = len(problem['origin_limit']), len(problem['dest_limit'])
+    n_relations = len(problem['origin_idx'])
+    columns = np.arange(n_relations)
+    rows = np.concatenate((problem['origin_idx'], n_origins + problem['dest_idx'], np.full(n_relations, n_origins + n_dests)))
+    values = np.concatenate((np.ones(2 * n_relations), problem['fleet_weight']))
+    return csr_matrix((values, (rows, np.tile(columns, 3))), shape=(n_origins + n_dests + 1, n_relations))
+
+def solve_lp(c, problem):
+    # Solveur HiGHS de SciPy s'il est installé, sinon le simplexe de réseau ci-dessus
+    try:
+        from scipy.optimize import linprog
+    except ImportError:
+        x, objective = _network_max(c, problem)
+        return x, objective, 'network_simplex'
+    b = np.concatenate((problem['origin_limit'], problem['dest_limit'], [problem['fleet_wagon_days']]))
+    res = linprog(-c, A_ub=constraint_matrix(problem), b_ub=b, bounds=(0, None), method='highs')
+    if res.status != 0:
+        raise RuntimeError(f"Programme linéaire non résolu : {res.message}")
+    return np.maximum(res.x, 0.0), float(-res.fun), 'highs'
+
+def build_bound_problem(relation_index, origins_df, destinations_df, num_wagons, config=DEFAULT_CONFIG):
+    days = config.max_simulation_days
+    round_trip_days = 2 * np.maximum(1, relation_index['transit_days'])
+    # Un wagon peut encore partir le dernier jour : son dernier aller-retour peut déborder de l'horizon
+    fleet_wagon_days = num_wagons * (days - 1 + (round_trip_days.max() if len(round_trip_days) else 0))
+    origin_limit = np.minimum(origins_df['initial_available_product_tons'].to_numpy(dtype=float),
+                              origins_df['daily_loading_capacity_tons'].to_numpy(dtype=float) * days)
+    dest_limit = np.minimum(destinations_df['annual_demand_tons'].to_numpy(dtype=float),
+                            destinations_df['daily_unloading_capacity_tons'].to_numpy(dtype=float) * days)
+    return {
+        'origin_idx': relation_index['origin_idx'],
+        'dest_idx': relation_index['dest_idx'],
+        'origin_limit': np.maximum(origin_limit, 0.0),
+        'dest_limit': np.maximum(dest_limit, 0.0),
+        'fleet_weight': round_trip_days / config.wagon_capacity_tons,  # wagons-jours par tonne
+        'fleet_wagon_days': float(max(fleet_wagon_days, 0)),
+        'round_trip_days': round_trip_days,
+    }
+
+def compute_plan_bound(relations_df, origins_df, destinations_df, num_wagons, relation_index=None, config=DEFAULT_CONFIG):
+    # Deux bornes : tonnes * km maximales (plan renvoyé) et tonnage livrable maximal (taux de satisfaction)
+    if relation_index is None or relation_index['km_per_day_for_wagon_return'] != config.km_per_day_for_wagon_return:
+        relation_index = build_relation_index(relations_df, origins_df, destinations_df, config)
+    problem = build_bound_problem(relation_index, origins_df, destinations_df, num_wagons, config)
+    plan_tons, profit_bound, solver = solve_lp(relation_index['distance_km'], problem)
+    _, tons_bound, _ = solve_lp(np.ones(len(plan_tons)), problem)
+    total_demand = destinations_df['annual_demand_tons'].sum()
+    return {
+        'relation_index': relation_index,
+        'plan_tons': plan_tons,
+        'round_trip_days': problem['round_trip_days'],
+        'profit_bound': profit_bound,
+        'tons_bound': tons_bound,
+        'satisfaction_bound': float(tons_bound / total_demand * 100) if total_demand > 0 else 0.0,
+        'solver': solver,
+    }
+
+def run_simulation_lp(relations_input_df, origins_input_df, destinations_input_df,
+                      qmin_config=None, num_initial_wagons_param=50, relation_index=None, config=DEFAULT_CONFIG,
+                      log_dir=None, log_format='csv', on_day_end=None):
+    # Même forme de résultat que run_simulation_h1/h2 ; pas de phase QMIN ni de journal jour par jour (on_day_end inutilisé)
+    start = time.perf_counter()
+    sim_state, tracking_vars = initialize_tracking_variables(origins_input_df, destinations_input_df, num_initial_wagons_param,
+                                                             log_dir, log_format, config.collect_diagnostics)
+    record_phase_time(tracking_vars['diagnostics'], 'init', start)
+    start = time.perf_counter()
+    bound = compute_plan_bound(relations_input_df, origins_input_df, destinations_input_df, num_initial_wagons_param,
+                               relation_index, config)
+    relation_index = bound['relation_index']
+    record_phase_time(tracking_vars['diagnostics'], 'lp_solve', start)
+    start = time.perf_counter()
+    used = np.flatnonzero(bound['plan_tons'] > TOLERANCE)
+    plan_rows = []
+    for pos in used.tolist():
+        orig_idx, dest_idx = int(relation_index['origin_idx'][pos]), int(relation_index['dest_idx'][pos])
+        qty, distance_km = float(bound['plan_tons'][pos]), float(relation_index['distance_km'][pos])
+        wagon_trips = qty / config.wagon_capacity_tons
+        sim_state['origin_stock'][orig_idx] -= qty
+        sim_state['dest_delivered'][dest_idx] += qty
+        sim_state['dest_remaining'][dest_idx] -= qty
+        record_shipment_metrics(tracking_vars['metrics'], orig_idx, qty, distance_km, wagon_trips, int(bound['round_trip_days'][pos]))
+        plan_rows.append({'origin': sim_state['origin_ids'][orig_idx], 'destination': sim_state['dest_ids'][dest_idx],
+                          'distance_km': distance_km, 'quantity_tons': qty, 'wagon_trips': wagon_trips, 'type': 'LP'})
+    tracking_vars['shipments_log'].close(); tracking_vars['daily_wagon_log'].close()
+    origins_df, destinations_df = state_to_dataframes(sim_state, origins_input_df, destinations_input_df)
+    shipments_df = pd.DataFrame(plan_rows, columns=['origin', 'destination', 'distance_km', 'quantity_tons', 'wagon_trips', 'type'])
+    kpis = compute_kpis(sim_state, tracking_vars)
+    record_phase_time(tracking_vars['diagnostics'], 'kpi', start)
+    bounds = {key: bound[key] for key in ('profit_bound', 'tons_bound', 'satisfaction_bound', 'solver')}
+    return {"profit": kpis['profit'], "kpis": kpis, "bounds": bounds, "shipments_df": shipments_df, "final_origins_df": origins_df,
+            "final_destinations_df": destinations_df, "final_tracking_vars": tracking_vars,
+            "days_taken_simulation_loop": config.max_simulation_days}
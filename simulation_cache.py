@@ -0,0 +1,65 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+# Cache des résultats de simulation : clé = (empreinte des fichiers, heuristique, wagons, config, QMIN).
+# Relancer ou revenir à une configuration déjà calculée renvoie le résultat immédiatement.
+
+def hash_input_files(file_contents):
+    # Empreinte du contenu des fichiers d'entrée (indépendante du nom du fichier)
+    digest = hashlib.sha256()
+    for content in file_contents:
+        digest.update(len(content).to_bytes(8, 'little'))
+        digest.update(content)
+    return digest.hexdigest()
+
+def estimate_result_size(results):
+    # Taille approximative en octets d'un dictionnaire de résultats : DataFrames, tableaux et journaux, y compris
+    # ceux des états finaux et des instantanés ; un objet partagé n'est compté qu'une fois
+    seen = set()
+
+    def size_of(value):
+        if id(value) in seen:
+            return 0
+        seen.add(id(value))
+        if hasattr(value, 'memory_usage'):  # DataFrame, Series, Index
+            return int(np.sum(value.memory_usage(deep=True)))
+        if hasattr(value, 'nbytes'):  # tableau NumPy, journal en colonnes
+            return int(value.nbytes)
+        if isinstance(value, dict):
+            return sum(size_of(item) for item in value.values())
+        if isinstance(value, (list, tuple)):
+            return 8 * len(value) + sum(size_of(item) for item in value)
+        return 0
+    return size_of(results)
+
+class LRUResultCache:
+    # Cache LRU borné en nombre d'entrées et en mémoire ; l'entrée la plus récente est toujours conservée
+    def __init__(self, max_entries=16, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key][0]
+
+    def put(self, key, results):
+        if key in self._entries:
+            self.total_bytes -= self._entries.pop(key)[1]
+        size = estimate_result_size(results)
+        self._entries[key] = (results, size)
+        self.total_bytes += size
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.total_bytes -= evicted_size
@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+from simulation_logic import (
+    build_relation_index, build_qmin_config, run_simulation, diagnostics_report, fleet_utilization, SimulationConfig
+)
+from input_cache import load_data_from_paths
+from simulation_export import export_excel, export_parquet
+from simulation_snapshot import run_simulation_with_snapshots, resume_from_snapshot, load_snapshot
+
+# Exécution en lot (sans interface) : planification nocturne, scripts, tâches cron.
+# Exemple :
+#   python simulation_cli.py --relations input_relations.csv --origines input_origines.csv \
+#       --destinations input_destination.csv --wagons 500 --jours 260 --heuristique H1 --sortie resultats
+
+QMIN_CLI_CHOICES = {
+    'qmin-desc': "QMIN Décroissant",
+    'qmin-asc': "QMIN Croissant",
+    'demande-desc': "Demande Annuelle Décroissante",
+    'demande-asc': "Demande Annuelle Croissante",
+    'distance-asc': "Distance Minimale Croissante",
+    'distance-desc': "Distance Minimale Décroissante",
+    'personnalise': "Ordre Personnalisé",
+}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulateur de plan de transport logistique (mode batch)")
+    parser.add_argument('--relations', required=True, help="Fichier CSV des relations")
+    parser.add_argument('--origines', required=True, help="Fichier CSV des origines")
+    parser.add_argument('--destinations', required=True, help="Fichier CSV des destinations")
+    parser.add_argument('--wagons', type=int, default=500, help="Nombre de wagons (défaut : 500)")
+    parser.add_argument('--jours', type=int, default=260, help="Jours de simulation (défaut : 260)")
+    parser.add_argument('--heuristique', choices=['H1', 'H2', 'LP'], default=None,
+                        help="LP : borne optimale du plan (programme linéaire agrégé), pas une simulation jour par jour "
+                             "(défaut : H1, ou l'heuristique de l'instantané avec --reprise)")
+    parser.add_argument('--qmin', choices=list(QMIN_CLI_CHOICES), default='qmin-desc', help="Méthode de tri pour QMIN")
+    parser.add_argument('--ordre', default="", help="Ordre personnalisé des destinations (séparées par des virgules)")
+    parser.add_argument('--sortie', default='resultats', help="Dossier de sortie des résultats")
+    parser.add_argument('--sans-cache', action='store_true', help="Ne pas utiliser ni créer le cache binaire (.npcache) des CSV")
+    parser.add_argument('--journaux-en-continu', action='store_true',
+                        help="Écrire les journaux d'expéditions et de wagons dans le dossier de sortie pendant la simulation")
+    parser.add_argument('--instantanes', default="",
+                        help="Jours (séparés par des virgules) dont l'état est enregistré sur disque pour une reprise ultérieure")
+    parser.add_argument('--dossier-instantanes', default=None, help="Dossier des instantanés (défaut : <sortie>/instantanes)")
+    parser.add_argument('--reprise', default=None, help="Reprendre la simulation depuis ce fichier d'instantané")
+    parser.add_argument('--wagons-supplementaires', type=int, default=0, help="Wagons ajoutés (ou retirés) lors de la reprise")
+    parser.add_argument('--format-journaux', choices=['csv', 'parquet'], default='csv',
+                        help="Format des journaux écrits en continu (parquet nécessite pyarrow)")
+    parser.add_argument('--diagnostics', action='store_true',
+                        help="Compter les envois refusés par motif et chronométrer chaque phase (ajoutés à resume.json)")
+    parser.add_argument('--excel', action='store_true', help="Exporter aussi les résultats dans <sortie>/resultats.xlsx (nécessite openpyxl)")
+    parser.add_argument('--parquet', action='store_true', help="Exporter aussi les résultats en Parquet dans <sortie>/parquet (nécessite pyarrow)")
+    return parser.parse_args(argv)
+
+def write_results(results, output_dir, rejected_rows=(), streamed_logs=False, diagnostics=None):
+    os.makedirs(output_dir, exist_ok=True)
+    if rejected_rows:
+        pd.DataFrame(rejected_rows).to_csv(os.path.join(output_dir, 'lignes_rejetees.csv'), index=False)
+    if not streamed_logs:  # sinon les journaux sont déjà écrits par la simulation
+        results['shipments_df'].to_csv(os.path.join(output_dir, 'expeditions.csv'), index=False)
+        results['final_tracking_vars']['daily_wagon_log'].to_dataframe().to_csv(os.path.join(output_dir, 'log_wagons.csv'), index=False)
+    results['final_origins_df'].to_csv(os.path.join(output_dir, 'origines_finales.csv'))
+    results['final_destinations_df'].to_csv(os.path.join(output_dir, 'destinations_finales.csv'))
+    summary = {
+        'profit': float(results['profit']),
+        'days_taken_simulation_loop': int(results['days_taken_simulation_loop']),
+        'satisfaction_rate': float(results['kpis']['satisfaction_rate']),
+        'num_shipments': int(len(results['shipments_df'])),
+        'rejected_rows': len(rejected_rows),
+    }
+    if 'bounds' in results:
+        summary['bounds'] = results['bounds']
+    if diagnostics is not None:
+        summary['diagnostics'] = diagnostics
+        fleet_utilization(results['final_tracking_vars']).to_csv(os.path.join(output_dir, 'utilisation_flotte.csv'), index=False)
+    with open(os.path.join(output_dir, 'resume.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.journaux_en_continu and (args.instantanes or args.reprise):
+        # La reprise depuis un instantané tronque les journaux gardés en mémoire
+        sys.exit("--journaux-en-continu ne peut pas être combiné avec --instantanes ou --reprise")
+    config = SimulationConfig(max_simulation_days=args.jours, collect_diagnostics=args.diagnostics)
+    rejected_rows = []
+    start = time.perf_counter()
+    relations_df, origins_df, destinations_df = load_data_from_paths(
+        args.relations, args.origines, args.destinations, use_cache=not args.sans_cache, rejected_rows=rejected_rows)
+    relation_index = build_relation_index(relations_df, origins_df, destinations_df)
+    load_s = time.perf_counter() - start
+    heuristic = args.heuristique or 'H1'
+    qmin_config = build_qmin_config(heuristic, QMIN_CLI_CHOICES[args.qmin], args.ordre, destinations_df, relation_index)
+    log_dir = args.sortie if args.journaux_en_continu else None
+    snapshot_days = [int(x) for x in args.instantanes.split(',') if x.strip()]
+    if args.reprise:
+        snapshot = load_snapshot(args.reprise)
+        results = resume_from_snapshot(snapshot, relations_df, origins_df, destinations_df, args.wagons_supplementaires,
+                                       args.heuristique, config, relation_index)
+    elif snapshot_days:
+        results = run_simulation_with_snapshots(heuristic, relations_df, origins_df, destinations_df, qmin_config, args.wagons,
+                                                relation_index, config, snapshot_days,
+                                                args.dossier_instantanes or os.path.join(args.sortie, 'instantanes'))
+    else:
+        results = run_simulation(heuristic, relations_df, origins_df, destinations_df, qmin_config, args.wagons, relation_index, config,
+                                 log_dir, args.format_journaux)
+    diagnostics = None
+    if args.diagnostics:
+        diagnostics = diagnostics_report(results)
+        diagnostics['timings_s'] = dict(load=load_s, **diagnostics['timings_s'])
+    summary = write_results(results, args.sortie, rejected_rows, streamed_logs=log_dir is not None, diagnostics=diagnostics)
+    if args.excel:
+        export_excel(results, os.path.join(args.sortie, 'resultats.xlsx'))
+    if args.parquet:
+        export_parquet(results, os.path.join(args.sortie, 'parquet'))
+    json.dump(summary, sys.stdout, indent=2)
+    print()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import io
+import os
+import zipfile
+
+import pandas as pd
+
+# Export des résultats d'une simulation (journal des expéditions, journal des wagons, états finaux
+# des origines et destinations, synthèse des indicateurs) en classeur Excel multi-feuilles et en
+# fichiers Parquet. Les tables sont parcourues par blocs et écrites au fil de l'eau (openpyxl en
+# mode write_only, ParquetWriter de pyarrow) : ni le classeur ni les tables ne sont construits
+# entièrement en mémoire. openpyxl et pyarrow ne sont importés qu'au moment de l'export.
+
+EXPORT_CHUNK_ROWS = 100_000
+EXCEL_MAX_ROWS = 1_048_576  # limite d'Excel par feuille, en-tête compris : suite dans une feuille "(2)", "(3)"...
+
+def results_summary(results):
+    # Indicateurs globaux (et borne LP si présente)
+    kpis = results['kpis']
+    summary = {
+        'profit': float(kpis['profit']),
+        'tons_delivered': float(kpis['tons_delivered']),
+        'satisfaction_rate': float(kpis['satisfaction_rate']),
+        'wagon_days_busy': float(kpis['wagon_days_busy']),
+        'wagons_in_transit': int(kpis['wagons_in_transit']),
+        'days_taken_simulation_loop': int(results['days_taken_simulation_loop']),
+        'num_shipments': int(len(results['shipments_df'])),
+    }
+    for key, value in results.get('bounds', {}).items():
+        summary[f'lp_{key}'] = value
+    return summary
+
+def frame_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+def results_tables(results, chunk_rows=EXPORT_CHUNK_ROWS):
+    # (titre de feuille, nom de fichier, blocs de lignes) pour chaque table exportée
+    wagon_log = results['final_tracking_vars']['daily_wagon_log']
+    return [
+        ("Expéditions", 'expeditions', frame_chunks(results['shipments_df'], chunk_rows)),
+        ("Wagons", 'log_wagons', wagon_log.iter_chunks(chunk_rows)),
+        ("Origines finales", 'origines_finales', frame_chunks(results['final_origins_df'].reset_index(), chunk_rows)),
+        ("Destinations finales", 'destinations_finales', frame_chunks(results['final_destinations_df'].reset_index(), chunk_rows)),
+    ]
+
+def write_sheet(workbook, title, chunks):
+    # Une feuille par tranche de EXCEL_MAX_ROWS lignes ; en-tête répété sur chaque feuille
+    sheet, columns, rows_in_sheet, part = None, None, 0, 1
+    for chunk in chunks:
+        columns = list(chunk.columns)
+        for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None):
+            if sheet is None or rows_in_sheet == EXCEL_MAX_ROWS:
+                sheet = workbook.create_sheet(title if part == 1 else f"{title} ({part})")
+                sheet.append(columns)
+                rows_in_sheet, part = 1, part + 1
+            sheet.append(row)
+            rows_in_sheet += 1
+    if sheet is None:  # table vide : en-tête seul
+        workbook.create_sheet(title).append(columns)
+
+def export_excel(results, target, chunk_rows=EXPORT_CHUNK_ROWS):
+    # target : chemin du fichier .xlsx ou objet fichier binaire (téléchargement)
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    summary_sheet = workbook.create_sheet("Résumé")
+    summary_sheet.append(["Indicateur", "Valeur"])
+    for key, value in results_summary(results).items():
+        summary_sheet.append([key, value])
+    for title, _, chunks in results_tables(results, chunk_rows):
+        write_sheet(workbook, title, chunks)
+    workbook.save(target)
+
+def write_parquet(chunks, target):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(target, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+def export_parquet(results, output_dir, chunk_rows=EXPORT_CHUNK_ROWS):
+    # Un fichier Parquet par table dans output_dir ; renvoie les chemins écrits
+    os.makedirs(output_dir, exist_ok=True)
+    paths = [os.path.join(output_dir, 'resume.parquet')]
+    write_parquet([pd.DataFrame([results_summary(results)])], paths[0])
+    for _, name, chunks in results_tables(results, chunk_rows):
+        paths.append(os.path.join(output_dir, f'{name}.parquet'))
+        write_parquet(chunks, paths[-1])
+    return paths
+
+def export_parquet_zip(results, chunk_rows=EXPORT_CHUNK_ROWS):
+    # Archive zip des fichiers Parquet (téléchargement depuis l'interface)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        with archive.open('resume.parquet', 'w') as f:
+            write_parquet([pd.DataFrame([results_summary(results)])], f)
+        for _, name, chunks in results_tables(results, chunk_rows):
+            with archive.open(f'{name}.parquet', 'w', force_zip64=True) as f:
+                write_parquet(chunks, f)
+    return buffer.getvalue()
+
+def excel_bytes(results, chunk_rows=EXPORT_CHUNK_ROWS):
+    buffer = io.BytesIO()
+    export_excel(results, buffer, chunk_rows)
+    return buffer.getvalue()
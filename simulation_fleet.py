@@ -0,0 +1,109 @@
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from simulation_logic import build_relation_index, filter_profitable_relations_h1, SimulationConfig
+from simulation_sweep import run_sweep_point, worker_pool
+
+# Taille minimale de flotte : plus petit nombre de wagons qui atteint un taux de satisfaction cible
+# en N jours. La satisfaction croît (globalement) avec la flotte : on encadre la solution entre le
+# plus grand nombre de wagons évalué qui échoue et le plus petit qui réussit, puis on resserre
+# l'encadrement. Chaque tour évalue un lot de candidats en parallèle (workers du balayage), placés
+# entre deux estimations tirées de la courbe de satisfaction ; si un tour ne divise pas au moins par
+# deux l'encadrement, le tour suivant répartit le lot sur tout l'encadrement.
+# Les tailles de flotte déjà évaluées sont mémorisées. Une simulation qui n'a jamais manqué de wagons
+# (pic de wagons en transit < flotte) donne exactement le même résultat pour toute flotte comprise
+# entre ce pic et la flotte simulée : le palier de saturation est connu sans autre simulation.
+
+def saturating_fleet_size(relations_df, origins_df, destinations_df, config=SimulationConfig(), relation_index=None):
+    # Flotte qui ne manque jamais de wagons : chaque envoi porte au moins l'envoi minimal, donc au plus
+    # capacité de chargement totale / envoi minimal wagons partent chaque jour, pour au plus l'aller-retour
+    # le plus long des relations rentables
+    if relation_index is None:
+        relation_index = build_relation_index(relations_df, origins_df, destinations_df, config)
+    transit_days = filter_profitable_relations_h1(relation_index)['transit_days']
+    if len(transit_days) == 0:
+        return 1
+    wagons_per_day = math.ceil(origins_df['daily_loading_capacity_tons'].sum() / config.min_shipment_for_one_wagon_tons)
+    return max(1, wagons_per_day * 2 * max(1, int(transit_days.max())))
+
+def bracket(evaluated, target):
+    # (plus grande flotte évaluée sous la cible en dessous de la plus petite qui l'atteint, plus petite qui l'atteint)
+    reached = [wagons for wagons, row in evaluated.items() if row['satisfaction_rate'] >= target]
+    hi = min(reached) if reached else None
+    below = [wagons for wagons, row in evaluated.items() if row['satisfaction_rate'] < target and (hi is None or wagons < hi)]
+    return (max(below) if below else None), hi
+
+def candidate_fleets(evaluated, target, lo, hi, batch_size, use_estimates=True):
+    # Satisfaction concave en la flotte et nulle sans wagon : la règle de proportionnalité depuis lo
+    # sous-estime la flotte cherchée et la sécante entre lo et hi la surestime. Le lot est réparti entre
+    # ces deux estimations ; use_estimates=False répartit le lot sur tout l'encadrement (k-section)
+    # quand la courbe ne se prête pas aux estimations.
+    low, high = lo + 1, hi - 1
+    if use_estimates:
+        lo_rate, hi_rate = evaluated[lo]['satisfaction_rate'], evaluated[hi]['satisfaction_rate']
+        if lo_rate > 0:
+            low = max(low, min(high, math.ceil(lo * target / lo_rate)))
+        if hi_rate > lo_rate:
+            high = min(high, max(low, lo + math.ceil((hi - lo) * (target - lo_rate) / (hi_rate - lo_rate))))
+    elif batch_size > 1:
+        low, high = lo + (hi - lo) / (batch_size + 1), hi - (hi - lo) / (batch_size + 1)
+    if batch_size == 1:
+        candidates = {round((low + high) / 2)}
+    else:
+        candidates = {round(low + (high - low) * i / (batch_size - 1)) for i in range(batch_size)}
+    # Les flottes strictement comprises entre lo et hi ne sont jamais déjà évaluées
+    return sorted(wagons for wagons in candidates if lo < wagons < hi)
+
+def find_minimum_fleet(relations_df, origins_df, destinations_df, target_satisfaction, heuristic='H1', sim_days=260,
+                       qmin_choice="QMIN Décroissant", qmin_custom_order="", min_wagons=1, max_wagons=None, tolerance=1,
+                       batch_size=None, max_workers=None):
+    # Générateur : renvoie après chaque tour l'état de la recherche ; le dernier état porte done=True.
+    # minimum_wagons vaut None si la cible n'est pas atteinte avec max_wagons.
+    max_workers = max_workers or os.cpu_count() or 1
+    batch_size = max(1, batch_size or max_workers)
+    if max_wagons is None:
+        max_wagons = saturating_fleet_size(relations_df, origins_df, destinations_df, SimulationConfig(max_simulation_days=sim_days))
+    min_wagons, max_wagons = max(1, int(min_wagons)), max(1, int(max_wagons))
+    if min_wagons > max_wagons:
+        raise ValueError("Le nombre minimal de wagons dépasse le nombre maximal")
+    evaluated = {}
+    state = {'target': target_satisfaction, 'evaluations': 0, 'rounds': 0, 'elapsed_s': 0.0}
+    start = time.perf_counter()
+
+    def snapshot(lo, hi, done=False):
+        curve = pd.DataFrame([evaluated[wagons] for wagons in sorted(evaluated)],
+                             columns=['num_wagons', 'satisfaction_rate', 'profit', 'days_taken', 'num_shipments', 'simulated'])
+        return dict(state, minimum_wagons=hi, bracket=(lo, hi), curve=curve, done=done)
+
+    with worker_pool(relations_df, origins_df, destinations_df, max_workers) as executor:
+        # Premier tour : grille géométrique de min_wagons à max_wagons (bornes comprises)
+        candidates = sorted({int(round(x)) for x in np.geomspace(min_wagons, max_wagons, max(2, batch_size))})
+        width = max_wagons - min_wagons
+        while candidates:
+            futures = {wagons: executor.submit(run_sweep_point, {'heuristic': heuristic, 'num_wagons': wagons, 'sim_days': sim_days,
+                                                                 'qmin_choice': qmin_choice}, qmin_custom_order)
+                       for wagons in candidates}
+            for wagons, future in futures.items():
+                evaluated[wagons] = dict(future.result(), simulated=True)
+                peak = max(evaluated[wagons]['peak_wagons_in_transit'], min_wagons)
+                if peak < wagons and peak not in evaluated:
+                    evaluated[peak] = dict(evaluated[wagons], num_wagons=peak, simulated=False)
+            state['evaluations'] += len(futures)
+            state['rounds'] += 1
+            state['elapsed_s'] = time.perf_counter() - start
+            lo, hi = bracket(evaluated, target_satisfaction)
+            if hi is None or (lo is None and hi == min_wagons):
+                break  # cible inatteignable, ou atteinte dès min_wagons
+            if lo is None:
+                lo = min_wagons  # min_wagons évalué au premier tour : il réussit seulement si hi == min_wagons
+            if hi - lo <= tolerance:
+                break
+            yield snapshot(lo, hi)
+            candidates = candidate_fleets(evaluated, target_satisfaction, lo, hi, batch_size, use_estimates=hi - lo <= width / 2)
+            width = hi - lo
+    state['elapsed_s'] = time.perf_counter() - start
+    yield snapshot(*bracket(evaluated, target_satisfaction), done=True)
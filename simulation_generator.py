@@ -0,0 +1,129 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Générateur de réseaux synthétiques au format des fichiers d'entrée (input_relations.csv,
+# input_origines.csv, input_destination.csv), de quelques nœuds à plusieurs milliers.
+# Les nœuds sont placés sur un territoire carré ; chaque destination est reliée à ses origines
+# les plus proches, avec une distance ferroviaire = distance à vol d'oiseau x facteur de détour.
+# Capacités, stocks et demandes suivent des lois log-normales (moyenne, sigma) ; par défaut autour des
+# ordres de grandeur des fichiers d'exemple. Un même jeu de paramètres (graine comprise) donne toujours
+# le même réseau.
+# Exemple :
+#   python simulation_generator.py --noeuds 1000 --sortie reseau_1000
+#   python simulation_generator.py --noeuds 1000 --demande-sigma 1.5 --sortie reseau_1000_disperse
+
+# Paramètres des lois log-normales : (option, nom du paramètre de generate_network, défaut, description)
+DISTRIBUTION_OPTIONS = (
+    ('--dechargement-moyen', 'unloading_mean', 450.0, "Capacité de déchargement journalière moyenne, en t"),
+    ('--dechargement-sigma', 'unloading_sigma', 0.4, "Sigma de la capacité de déchargement"),
+    ('--chargement-moyen', 'loading_mean', 650.0, "Capacité de chargement journalière moyenne, en t"),
+    ('--chargement-sigma', 'loading_sigma', 0.4, "Sigma de la capacité de chargement"),
+    ('--demande-moyenne', 'demand_mean', 50_000.0, "Demande annuelle moyenne par destination, en t"),
+    ('--demande-sigma', 'demand_sigma', 0.9, "Sigma de la demande annuelle"),
+    ('--stock-sigma', 'stock_sigma', 0.8, "Sigma de la répartition du stock entre origines"),
+)
+DEFAULT_DISTRIBUTIONS = {name: default for _, name, default, _ in DISTRIBUTION_OPTIONS}
+
+def lognormal(rng, mean, sigma, size):
+    # Loi log-normale de moyenne donnée
+    return rng.lognormal(np.log(mean) - sigma ** 2 / 2, sigma, size)
+
+def nearest_origins(origin_xy, dest_xy, k, chunk_size=2048):
+    # Indices des k origines les plus proches de chaque destination, par blocs (mémoire bornée)
+    nearest = np.empty((len(dest_xy), k), dtype=np.int64)
+    for start in range(0, len(dest_xy), chunk_size):
+        block = dest_xy[start:start + chunk_size]
+        distances = np.hypot(block[:, None, 0] - origin_xy[None, :, 0], block[:, None, 1] - origin_xy[None, :, 1])
+        candidates = np.argpartition(distances, k - 1, axis=1)[:, :k] if k < len(origin_xy) else \
+            np.broadcast_to(np.arange(len(origin_xy)), (len(block), len(origin_xy)))
+        order = np.argsort(np.take_along_axis(distances, candidates, axis=1), axis=1, kind='stable')
+        nearest[start:start + len(block)] = np.take_along_axis(candidates, order, axis=1)
+    return nearest
+
+def generate_network(n_nodes=100, origin_share=0.2, origins_per_destination=5, territory_km=1000.0,
+                     supply_ratio=0.8, unprofitable_share=0.15, seed=0, unloading_mean=450.0, unloading_sigma=0.4,
+                     loading_mean=650.0, loading_sigma=0.4, demand_mean=50_000.0, demand_sigma=0.9, stock_sigma=0.8):
+    # Renvoie (relations_df, origins_df, destinations_df) au format brut des CSV d'entrée.
+    # supply_ratio : stock total des origines / demande annuelle totale.
+    if n_nodes < 2:
+        raise ValueError("Il faut au moins deux nœuds (une origine et une destination)")
+    if min(unloading_mean, loading_mean, demand_mean) <= 0 or min(unloading_sigma, loading_sigma, demand_sigma, stock_sigma) < 0:
+        raise ValueError("Les moyennes doivent être positives et les sigmas positifs ou nuls")
+    rng = np.random.default_rng(seed)
+    n_origins = min(max(1, round(n_nodes * origin_share)), n_nodes - 1)
+    n_destinations = n_nodes - n_origins
+    k = max(1, min(origins_per_destination, n_origins))
+    origin_xy = rng.uniform(0, territory_km, (n_origins, 2))
+    dest_xy = rng.uniform(0, territory_km, (n_destinations, 2))
+
+    annual_demand = np.round(lognormal(rng, demand_mean, demand_sigma, n_destinations), -2)
+    destinations_df = pd.DataFrame({
+        'id': [f"DEST{j:05d}" for j in range(n_destinations)],
+        'daily_unloading_capacity_tons': np.round(lognormal(rng, unloading_mean, unloading_sigma, n_destinations), -1).astype(np.int64),
+        'annual_demand_tons': annual_demand.astype(np.int64),
+    })
+    stock_weights = lognormal(rng, 1.0, stock_sigma, n_origins)
+    origins_df = pd.DataFrame({
+        'id': [f"ORIG{i:05d}" for i in range(n_origins)],
+        'daily_loading_capacity_tons': np.round(lognormal(rng, loading_mean, loading_sigma, n_origins), -1).astype(np.int64),
+        'initial_available_product_tons': np.round(stock_weights / stock_weights.sum() * annual_demand.sum() * supply_ratio, -3).astype(np.int64),
+    })
+
+    nearest = nearest_origins(origin_xy, dest_xy, k)
+    rel_dest = np.repeat(np.arange(n_destinations), k)
+    rel_origin = nearest.ravel()
+    straight_km = np.hypot(*(dest_xy[rel_dest] - origin_xy[rel_origin]).T)
+    distance_km = np.maximum(10, np.round(straight_km * rng.uniform(1.15, 1.45, len(rel_dest))))
+    # Relations de la destination à l'origine la plus proche toujours rentables, les autres selon unprofitable_share
+    profitable = (rng.random(len(rel_dest)) >= unprofitable_share) | (np.tile(np.arange(k), n_destinations) == 0)
+    relations_df = pd.DataFrame({
+        'origin': origins_df['id'].to_numpy()[rel_origin],
+        'destination': destinations_df['id'].to_numpy()[rel_dest],
+        'distance_km': distance_km.astype(np.int64),
+        'profitability': profitable.astype(np.int64),
+    })
+    return relations_df, origins_df, destinations_df
+
+def write_network(output_dir, relations_df, origins_df, destinations_df):
+    os.makedirs(output_dir, exist_ok=True)
+    paths = (os.path.join(output_dir, 'input_relations.csv'), os.path.join(output_dir, 'input_origines.csv'),
+             os.path.join(output_dir, 'input_destination.csv'))
+    for df, path in zip((relations_df, origins_df, destinations_df), paths):
+        df.to_csv(path, index=False)
+    return paths
+
+def add_distribution_args(parser):
+    for option, name, default, description in DISTRIBUTION_OPTIONS:
+        parser.add_argument(option, dest=name, type=float, default=default, help=f"{description} (défaut : {default:g})")
+
+def distribution_params(args):
+    # Paramètres des lois lus dans les options, à passer à generate_network
+    return {name: getattr(args, name) for name in DEFAULT_DISTRIBUTIONS}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Génère un réseau logistique synthétique (fichiers CSV d'entrée)")
+    parser.add_argument('--noeuds', type=int, default=100, help="Nombre total d'origines et de destinations (défaut : 100)")
+    parser.add_argument('--part-origines', type=float, default=0.2, help="Part des nœuds qui sont des origines (défaut : 0.2)")
+    parser.add_argument('--densite', type=int, default=5, help="Origines reliées à chaque destination (défaut : 5)")
+    parser.add_argument('--territoire', type=float, default=1000.0, help="Côté du territoire en km (défaut : 1000)")
+    parser.add_argument('--ratio-stock', type=float, default=0.8, help="Stock total / demande totale (défaut : 0.8)")
+    parser.add_argument('--part-non-rentable', type=float, default=0.15, help="Part des relations non rentables (défaut : 0.15)")
+    add_distribution_args(parser)
+    parser.add_argument('--graine', type=int, default=0)
+    parser.add_argument('--sortie', required=True, help="Dossier où écrire les trois fichiers CSV")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    network = generate_network(args.noeuds, args.part_origines, args.densite, args.territoire, args.ratio_stock,
+                               args.part_non_rentable, args.graine, **distribution_params(args))
+    for path, df in zip(write_network(args.sortie, *network), network):
+        print(f"{path} : {len(df)} lignes")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
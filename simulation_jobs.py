@@ -0,0 +1,57 @@
+import multiprocessing
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor
+
+from simulation_snapshot import run_simulation_with_snapshots
+
+# Exécution des simulations en arrière-plan : chaque simulation est soumise à un pool de processus
+# partagé (la session Streamlit et les autres sessions ne sont pas bloquées). Le worker publie
+# l'avancement jour par jour dans une file et s'arrête à la fin du jour courant si l'annulation
+# est demandée.
+
+class SimulationCancelled(Exception):
+    pass
+
+def progress_hook(progress_queue, cancel_event):
+    def on_day_end(day_t, sim_state, tracking_vars):
+        if cancel_event.is_set():
+            raise SimulationCancelled(f"Simulation annulée au jour {day_t}")
+        progress_queue.put({'day': int(day_t), 'tons_delivered': float(tracking_vars['metrics']['tons_delivered']),
+                            'wagons_available': int(tracking_vars['wagons_available'])})
+    return on_day_end
+
+def run_simulation_job(heuristic_choice, relations_df, origins_df, destinations_df, qmin_config, num_wagons, relation_index,
+                       config, snapshot_days, progress_queue, cancel_event):
+    return run_simulation_with_snapshots(heuristic_choice, relations_df, origins_df, destinations_df, qmin_config, num_wagons,
+                                         relation_index, config, snapshot_days, on_day_end=progress_hook(progress_queue, cancel_event))
+
+class SimulationJobRunner:
+    # Un seul exécuteur par serveur ; la file et l'événement d'annulation passent par un Manager
+    def __init__(self, max_workers=None):
+        context = multiprocessing.get_context('spawn')
+        self._manager = context.Manager()
+        self._executor = ProcessPoolExecutor(max_workers=max_workers or os.cpu_count() or 1, mp_context=context)
+
+    def submit(self, heuristic_choice, relations_df, origins_df, destinations_df, qmin_config, num_wagons, relation_index,
+               config, snapshot_days=()):
+        progress_queue, cancel_event = self._manager.Queue(), self._manager.Event()
+        future = self._executor.submit(run_simulation_job, heuristic_choice, relations_df, origins_df, destinations_df, qmin_config,
+                                       num_wagons, relation_index, config, tuple(snapshot_days), progress_queue, cancel_event)
+        return {'future': future, 'progress_queue': progress_queue, 'cancel_event': cancel_event, 'progress': []}
+
+    def shutdown(self):
+        self._executor.shutdown(cancel_futures=True)
+        self._manager.shutdown()
+
+def poll_job(job):
+    # Récupère les jours terminés depuis le dernier appel ; renvoie tout l'historique d'avancement
+    while True:
+        try:
+            job['progress'].append(job['progress_queue'].get_nowait())
+        except queue.Empty:
+            return job['progress']
+
+def cancel_job(job):
+    job['cancel_event'].set()
+    job['future'].cancel()  # sans effet si la simulation a déjà commencé : elle s'arrête à la fin du jour en cours
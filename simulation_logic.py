@@ -0,0 +1,563 @@
+import math
+import heapq
+import time
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+
+from simulation_logs import new_shipments_log, new_wagon_log, log_paths
+
+# --- Valeurs par défaut de la configuration ---
+WAGON_CAPACITY_TONS = 50
+MIN_WAGON_UTILIZATION_PERCENT = 0.30
+MIN_SHIPMENT_FOR_ONE_WAGON_TONS = WAGON_CAPACITY_TONS * MIN_WAGON_UTILIZATION_PERCENT
+MAX_SIMULATION_DAYS = 120 # Valeur par défaut
+KM_PER_DAY_FOR_WAGON_RETURN = 200
+EPSILON = 1e-9
+
+@dataclass(frozen=True)
+class SimulationConfig:
+    # Paramètres propres à une exécution : immuables et passés explicitement, aucune variable
+    # globale n'est modifiée, ce qui permet plusieurs simulations simultanées (threads, sessions).
+    wagon_capacity_tons: float = WAGON_CAPACITY_TONS
+    min_wagon_utilization_percent: float = MIN_WAGON_UTILIZATION_PERCENT
+    max_simulation_days: int = MAX_SIMULATION_DAYS
+    km_per_day_for_wagon_return: float = KM_PER_DAY_FOR_WAGON_RETURN
+    collect_diagnostics: bool = False  # compteurs de refus et temps par phase (tracking_vars['diagnostics'])
+
+    @property
+    def min_shipment_for_one_wagon_tons(self):
+        return self.wagon_capacity_tons * self.min_wagon_utilization_percent
+
+DEFAULT_CONFIG = SimulationConfig()
+
+# --- Nettoyage des données ---
+# Espaces ordinaires, insécables (U+00A0), fines insécables (U+202F) et autres séparateurs Unicode
+SPACE_CHARS = '\\s\u00a0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000'
+# Milliers séparés par des points avec décimale à virgule ("1.234.567" / "1.234,5"), ou
+# par des virgules avec décimale à point ("1,234.5" / "1,234,567") ; une virgule seule reste décimale.
+THOUSANDS_DOT_PATTERN = r'[+-]?\d{1,3}(?:\.\d{3})+,\d+|[+-]?\d{1,3}(?:\.\d{3}){2,}'
+THOUSANDS_COMMA_PATTERN = r'[+-]?\d{1,3}(?:,\d{3})+\.\d+|[+-]?\d{1,3}(?:,\d{3}){2,}'
+
+def normalize_id(value):
+    # Version scalaire de normalize_id_column (ex. ordre QMIN saisi à la main)
+    return ' '.join(str(value).split()).upper()
+
+def normalize_id_column(series):
+    # Retours à la ligne et espaces internes réduits à un espace, bords supprimés, majuscules
+    text = series.astype(str).where(series.notna())
+    return text.str.replace(f'[{SPACE_CHARS}]+', ' ', regex=True).str.strip().str.upper()
+
+def parse_numeric_column(series):
+    # Analyse vectorisée : renvoie (valeurs float, masque des cellules invalides) sans lever d'exception
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        values = series.astype(float)
+    else:
+        text = series.astype(str).where(series.notna()).str.replace(f'[{SPACE_CHARS}]+', '', regex=True)
+        thousands_dot = text.str.fullmatch(THOUSANDS_DOT_PATTERN).fillna(False).astype(bool)
+        if thousands_dot.any():
+            text = text.where(~thousands_dot, text.str.replace('.', '', regex=False))
+        thousands_comma = text.str.fullmatch(THOUSANDS_COMMA_PATTERN).fillna(False).astype(bool)
+        if thousands_comma.any():
+            text = text.where(~thousands_comma, text.str.replace(',', '', regex=False))
+        values = pd.to_numeric(text.str.replace(',', '.', regex=False), errors='coerce').astype(float)
+    return values, ~np.isfinite(values.to_numpy())
+
+def clean_input_df(df, file_kind, id_columns, numeric_columns, integer_columns=(), rejected_rows=None):
+    # Les lignes invalides sont écartées et décrites dans rejected_rows (liste de dictionnaires)
+    # au lieu d'interrompre le chargement à la première cellule incorrecte.
+    bad_rows = np.zeros(len(df), dtype=bool)
+    def report(column, raw_values, bad):
+        if rejected_rows is not None and bad.any():
+            positions = np.flatnonzero(bad)
+            rejected_rows.extend({'fichier': file_kind, 'ligne': int(pos) + 1, 'colonne': column, 'valeur': raw}
+                                 for pos, raw in zip(positions.tolist(), raw_values.iloc[positions].tolist()))
+    for column in id_columns:
+        raw_values = df[column]
+        df[column] = normalize_id_column(raw_values)
+        bad = (df[column].isna() | (df[column] == '')).to_numpy()
+        report(column, raw_values, bad)
+        bad_rows |= bad
+    for column in numeric_columns:
+        raw_values = df[column]
+        values, bad = parse_numeric_column(raw_values)
+        if column in integer_columns:
+            bad |= np.floor(values.to_numpy()) != values.to_numpy()
+        report(column, raw_values, bad)
+        df[column] = values
+        bad_rows |= bad
+    if bad_rows.any():
+        df = df[~bad_rows].reset_index(drop=True)
+    for column in integer_columns:
+        df[column] = df[column].astype(int)
+    return df
+
+def clean_relations_df(relations_df, rejected_rows=None):
+    return clean_input_df(relations_df, 'relations', ['origin', 'destination'], ['distance_km', 'profitability'],
+                          integer_columns=['profitability'], rejected_rows=rejected_rows)
+
+def clean_origins_df(origins_df_raw, rejected_rows=None):
+    origins_df = clean_input_df(origins_df_raw, 'origins', ['id'], ['daily_loading_capacity_tons', 'initial_available_product_tons'],
+                                rejected_rows=rejected_rows)
+    return origins_df.set_index('id')
+
+def clean_destinations_df(destinations_df_raw, rejected_rows=None):
+    destinations_df = clean_input_df(destinations_df_raw, 'destinations', ['id'], ['daily_unloading_capacity_tons', 'annual_demand_tons'],
+                                     rejected_rows=rejected_rows)
+    return destinations_df.set_index('id')
+
+INPUT_CLEANERS = {'relations': clean_relations_df, 'origins': clean_origins_df, 'destinations': clean_destinations_df}
+
+def load_data_from_uploaded_files(uploaded_files, rejected_rows=None):
+    # Les fichiers sont passés comme des objets en mémoire ; les lignes rejetées sont ajoutées à rejected_rows
+    relations_df = clean_relations_df(pd.read_csv(uploaded_files['relations']), rejected_rows)
+    origins_df = clean_origins_df(pd.read_csv(uploaded_files['origins']), rejected_rows)
+    destinations_df = clean_destinations_df(pd.read_csv(uploaded_files['destinations']), rejected_rows)
+    return relations_df, origins_df, destinations_df
+
+def build_relation_index(relations_df, origins_df, destinations_df, config=DEFAULT_CONFIG):
+    # Index d'adjacence destination -> origines, construit une seule fois après le chargement.
+    # Les relations sont rangées par destination (format CSR) : celles de la destination j
+    # occupent les positions dest_ptr[j]:dest_ptr[j + 1], dans l'ordre du fichier.
+    origin_index = {origin_id: i for i, origin_id in enumerate(origins_df.index)}
+    dest_index = {dest_id: j for j, dest_id in enumerate(destinations_df.index)}
+    rel_origin = relations_df['origin'].map(origin_index)
+    rel_dest = relations_df['destination'].map(dest_index)
+    known = (rel_origin.notna() & rel_dest.notna()).to_numpy()
+    rows = np.flatnonzero(known)
+    dest_idx = rel_dest.to_numpy()[known].astype(np.int64)
+    order = np.argsort(dest_idx, kind='stable')
+    rows, dest_idx = rows[order], dest_idx[order]
+    origin_idx = rel_origin.to_numpy()[rows].astype(np.int64)
+    distance_km = relations_df['distance_km'].to_numpy(dtype=float)[rows]
+    min_distance_km = np.full(len(dest_index), np.inf)
+    np.minimum.at(min_distance_km, dest_idx, distance_km)
+    return {
+        'origin_index': origin_index,
+        'dest_index': dest_index,
+        'dest_ptr': np.concatenate(([0], np.cumsum(np.bincount(dest_idx, minlength=len(dest_index))))),
+        'row': rows,
+        'origin_idx': origin_idx,
+        'dest_idx': dest_idx,
+        'distance_km': distance_km,
+        'km_per_day_for_wagon_return': config.km_per_day_for_wagon_return,
+        'transit_days': np.ceil(distance_km / config.km_per_day_for_wagon_return).astype(np.int64),
+        'profitable': relations_df['profitability'].to_numpy()[rows] == 1,
+        'min_distance_km': min_distance_km,
+    }
+
+def argsort_descending(values):
+    # Même ordre que sort_values(ascending=False) de pandas (quicksort, égalités comprises)
+    reversed_positions = np.arange(len(values))[::-1]
+    return reversed_positions[values[::-1].argsort(kind='quicksort')][::-1]
+
+def initialize_tracking_variables(origins_df, destinations_df, num_initial_wagons=100, log_dir=None, log_format='csv',
+                                  collect_diagnostics=False):
+    # État compact de la simulation : tableaux NumPy indexés par des identifiants entiers
+    # (position du nœud dans origin_ids / dest_ids), au lieu d'accès .loc par libellé.
+    origin_ids = origins_df.index.tolist()
+    dest_ids = destinations_df.index.tolist()
+    annual_demand = np.array(destinations_df['annual_demand_tons'], dtype=float)
+    sim_state = {
+        'origin_ids': origin_ids,
+        'dest_ids': dest_ids,
+        'origin_index': {origin_id: i for i, origin_id in enumerate(origin_ids)},
+        'dest_index': {dest_id: j for j, dest_id in enumerate(dest_ids)},
+        'origin_loading_cap': np.array(origins_df['daily_loading_capacity_tons'], dtype=float),
+        'origin_stock': np.array(origins_df['initial_available_product_tons'], dtype=float),
+        'dest_unloading_cap': np.array(destinations_df['daily_unloading_capacity_tons'], dtype=float),
+        'dest_delivered': np.zeros(len(dest_ids)),
+        'dest_remaining': annual_demand.copy(),
+        'dest_q_min_target': 0.20 * annual_demand,
+        'dest_q_min_delivered': np.zeros(len(dest_ids)),
+    }
+    # Journaux en colonnes (simulation_logs) ; avec log_dir, écrits sur disque au fil de l'eau
+    shipments_path, wagon_log_path = log_paths(log_dir, log_format)
+    tracking_vars = {
+        'total_wagons': num_initial_wagons,
+        'wagons_available': num_initial_wagons,
+        'wagons_in_transit': [],  # tas (heapq) de tuples (return_day, num_wagons)
+        'shipments_log': new_shipments_log(origin_ids, dest_ids, shipments_path),
+        'daily_wagon_log': new_wagon_log(wagon_log_path),
+        'metrics': new_metrics(sim_state),
+        'diagnostics': new_diagnostics() if collect_diagnostics else None
+    }
+    return sim_state, tracking_vars
+
+# --- Indicateurs cumulés pendant la simulation ---
+# process_shipment met à jour ces compteurs à chaque envoi : les KPI sont disponibles à tout
+# moment (y compris en cours de simulation) sans jointure a posteriori avec les relations.
+
+def new_metrics(sim_state):
+    return {
+        'tonne_km': 0.0,
+        'tons_delivered': 0.0,
+        'wagon_days_busy': 0,  # wagons engagés x jours d'immobilisation (aller + retour)
+        'origin_shipped': np.zeros(len(sim_state['origin_ids'])),
+        'initial_stock': sim_state['origin_stock'].copy(),
+        'total_demand': float(sim_state['dest_remaining'].sum()),
+    }
+
+def record_shipment_metrics(metrics, origin_idx, qty, distance_km, wagons_used, round_trip_days):
+    metrics['tonne_km'] += qty * distance_km
+    metrics['tons_delivered'] += qty
+    metrics['origin_shipped'][origin_idx] += qty
+    metrics['wagon_days_busy'] += wagons_used * round_trip_days
+
+def compute_kpis(sim_state, tracking_vars):
+    # Indicateurs globaux et par nœud ; coût constant pour les totaux
+    metrics = tracking_vars['metrics']
+    annual_demand = sim_state['dest_delivered'] + sim_state['dest_remaining']
+    initial_stock = metrics['initial_stock']
+    dest_rate = np.divide(sim_state['dest_delivered'], annual_demand, out=np.zeros(len(annual_demand)), where=annual_demand > 0)
+    origin_rate = np.divide(metrics['origin_shipped'], initial_stock, out=np.zeros(len(initial_stock)), where=initial_stock > 0)
+    return {
+        'profit': metrics['tonne_km'],
+        'tons_delivered': metrics['tons_delivered'],
+        'satisfaction_rate': metrics['tons_delivered'] / metrics['total_demand'] * 100 if metrics['total_demand'] > 0 else 0.0,
+        'wagon_days_busy': metrics['wagon_days_busy'],
+        'wagons_in_transit': tracking_vars['total_wagons'] - tracking_vars['wagons_available'],
+        'dest_satisfaction_rate': pd.Series(dest_rate * 100, index=sim_state['dest_ids']),
+        'origin_usage_rate': pd.Series(origin_rate * 100, index=sim_state['origin_ids']),
+    }
+
+# --- Diagnostics (SimulationConfig.collect_diagnostics) ---
+# Compteurs par motif de refus d'un envoi dans process_shipment et temps de chaque phase.
+# Désactivés, ils se limitent à un test "is not None" sur les chemins de refus.
+
+REJECTION_REASONS = {
+    'no_quantity_requested': "Aucune quantité demandée",
+    'below_min_request': "Demande inférieure à l'envoi minimal",
+    'unknown_origin': "Origine inconnue",
+    'unknown_destination': "Destination inconnue",
+    'origin_stock': "Stock de l'origine insuffisant",
+    'loading_capacity': "Capacité de chargement épuisée",
+    'unloading_capacity': "Capacité de déchargement épuisée",
+    'dest_demand': "Demande restante insuffisante",
+    'no_wagons': "Aucun wagon disponible",
+}
+# Contrainte limitante quand la quantité possible est sous l'envoi minimal, dans l'ordre de process_shipment
+SHIPMENT_LIMITS = ('origin_stock', 'loading_capacity', 'unloading_capacity', 'dest_demand')
+
+def new_diagnostics():
+    return {'rejections': dict.fromkeys(REJECTION_REASONS, 0), 'timings_s': {}}
+
+def reject_shipment(tracking_vars, reason, origin_cap_remaining, dest_cap_remaining):
+    diagnostics = tracking_vars.get('diagnostics')
+    if diagnostics is not None: diagnostics['rejections'][reason] += 1
+    return 0.0, 0, origin_cap_remaining, dest_cap_remaining
+
+def record_phase_time(diagnostics, phase, start):
+    # Les durées s'additionnent (reprise depuis un instantané, phases en plusieurs morceaux)
+    if diagnostics is None: return
+    diagnostics['timings_s'][phase] = diagnostics['timings_s'].get(phase, 0.0) + time.perf_counter() - start
+
+def fleet_utilization(tracking_vars):
+    # Taux d'utilisation journalier de la flotte (wagons en transit / flotte totale)
+    wagon_log = tracking_vars['daily_wagon_log'].to_dataframe()
+    total = wagon_log['wagons_available'] + wagon_log['wagons_in_transit']
+    wagon_log['utilization_rate'] = np.divide(wagon_log['wagons_in_transit'] * 100.0, total,
+                                              out=np.zeros(len(wagon_log)), where=total > 0)
+    return wagon_log
+
+def diagnostics_report(results):
+    # Synthèse sérialisable en JSON (sortie structurée des exécutions sans interface)
+    tracking_vars = results['final_tracking_vars']
+    utilization = fleet_utilization(tracking_vars)
+    diagnostics = tracking_vars.get('diagnostics') or {}
+    return {
+        'timings_s': dict(diagnostics.get('timings_s', {})),
+        'rejections': dict(diagnostics.get('rejections', {})),
+        'fleet': {
+            'days': int(len(utilization)),
+            'mean_utilization_rate': float(utilization['utilization_rate'].mean()) if len(utilization) else 0.0,
+            'days_fleet_exhausted': int((utilization['wagons_available'] == 0).sum()),
+        },
+    }
+
+def state_to_dataframes(sim_state, origins_df, destinations_df):
+    # Conversion unique, en fin de simulation, vers les DataFrames attendus par l'interface
+    origins_df_sim = origins_df.copy()
+    destinations_df_sim = destinations_df.copy()
+    origins_df_sim['current_available_product_tons'] = sim_state['origin_stock']
+    destinations_df_sim['delivered_so_far_tons'] = sim_state['dest_delivered']
+    destinations_df_sim['remaining_annual_demand_tons'] = sim_state['dest_remaining']
+    destinations_df_sim['q_min_initial_target_tons'] = sim_state['dest_q_min_target']
+    destinations_df_sim['q_min_initial_delivered_tons'] = sim_state['dest_q_min_delivered']
+    return origins_df_sim, destinations_df_sim
+
+def process_shipment(day_t, origin_idx, dest_idx, distance_km, desired_qty,
+                     sim_state, tracking_vars,
+                     origin_daily_loading_cap_remaining, dest_daily_unloading_cap_remaining,
+                     log_prefix="", transit_days=None, config=DEFAULT_CONFIG):
+    wagon_capacity_tons, min_shipment_tons = config.wagon_capacity_tons, config.min_shipment_for_one_wagon_tons
+    if desired_qty <= EPSILON: return reject_shipment(tracking_vars, 'no_quantity_requested', origin_daily_loading_cap_remaining, dest_daily_unloading_cap_remaining)
+    if desired_qty < min_shipment_tons: return reject_shipment(tracking_vars, 'below_min_request', origin_daily_loading_cap_remaining, dest_daily_unloading_cap_remaining)
+    if origin_idx is None: return reject_shipment(tracking_vars, 'unknown_origin', origin_daily_loading_cap_remaining, dest_daily_unloading_cap_remaining)
+    if dest_idx is None: return reject_shipment(tracking_vars, 'unknown_destination', origin_daily_loading_cap_remaining, dest_daily_unloading_cap_remaining)
+    origin_stock, dest_remaining = sim_state['origin_stock'], sim_state['dest_remaining']
+    qty_can_load = min(desired_qty, origin_daily_loading_cap_remaining, origin_stock[origin_idx])
+    qty_can_unload_and_demand = min(desired_qty, dest_daily_unloading_cap_remaining, dest_remaining[dest_idx])
+    potential_qty_to_ship = min(qty_can_load, qty_can_unload_and_demand)
+    if potential_qty_to_ship < min_shipment_tons or potential_qty_to_ship <= EPSILON:
+        if tracking_vars.get('diagnostics') is None: return 0.0, 0, origin_daily_loading_cap_remaining, dest_daily_unloading_cap_remaining
+        limits = (origin_stock[origin_idx], origin_daily_loading_cap_remaining, dest_daily_unloading_cap_remaining, dest_remaining[dest_idx])
+        return reject_shipment(tracking_vars, SHIPMENT_LIMITS[int(np.argmin(limits))], origin_daily_loading_cap_remaining, dest_daily_unloading_cap_remaining)
+    wagons_needed_ideal = math.ceil(potential_qty_to_ship / wagon_capacity_tons)
+    if tracking_vars['wagons_available'] == 0: return reject_shipment(tracking_vars, 'no_wagons', origin_daily_loading_cap_remaining, dest_daily_unloading_cap_remaining)
+    wagons_to_use = min(wagons_needed_ideal, tracking_vars['wagons_available'])
+    actual_qty_to_ship = min(potential_qty_to_ship, wagons_to_use * wagon_capacity_tons)
+    if actual_qty_to_ship <= EPSILON: return reject_shipment(tracking_vars, 'no_wagons', origin_daily_loading_cap_remaining, dest_daily_unloading_cap_remaining)
+    final_wagons_used = math.ceil(actual_qty_to_ship / wagon_capacity_tons)
+    if final_wagons_used > tracking_vars['wagons_available']: return reject_shipment(tracking_vars, 'no_wagons', origin_daily_loading_cap_remaining, dest_daily_unloading_cap_remaining)
+    origin_stock[origin_idx] -= actual_qty_to_ship
+    sim_state['dest_delivered'][dest_idx] += actual_qty_to_ship
+    dest_remaining[dest_idx] -= actual_qty_to_ship
+    origin_daily_loading_cap_remaining -= actual_qty_to_ship
+    dest_daily_unloading_cap_remaining -= actual_qty_to_ship
+    tracking_vars['wagons_available'] -= final_wagons_used
+    if transit_days is None: transit_days = math.ceil(distance_km / config.km_per_day_for_wagon_return)
+    aller_days = max(1, transit_days)
+    day_of_return = day_t + (2 * aller_days); day_of_arrival_at_dest = day_t + aller_days
+    heapq.heappush(tracking_vars['wagons_in_transit'], (day_of_return, final_wagons_used))
+    tracking_vars['shipments_log'].append(day_t, day_of_arrival_at_dest, origin_idx, dest_idx,
+                                          actual_qty_to_ship, final_wagons_used, log_prefix.strip() or "Standard")
+    record_shipment_metrics(tracking_vars['metrics'], origin_idx, actual_qty_to_ship, distance_km, final_wagons_used, 2 * aller_days)
+    return actual_qty_to_ship, final_wagons_used, origin_daily_loading_cap_remaining, dest_daily_unloading_cap_remaining
+
+def get_destination_iterator_h1(destinations_df_to_sort, sort_config):
+    if sort_config is None: return None
+    sort_type = sort_config[0]
+    if sort_type == 'custom_order':
+        custom_order_list = sort_config[1]
+        return [dest_id for dest_id in custom_order_list if dest_id in destinations_df_to_sort.index]
+    elif sort_type in ['q_min_initial_target_tons', 'annual_demand_tons', 'remaining_annual_demand_tons', 'min_distance_km']:
+        sort_column, ascending_order = sort_type, sort_config[1]
+        if sort_column in destinations_df_to_sort.columns:
+            return destinations_df_to_sort.sort_values(by=sort_column, ascending=ascending_order).index.tolist()
+    return None
+
+def qmin_destination_order(destinations_view, dest_sort_config):
+    # Ordre de service de la phase QMIN ; par défaut, QMIN décroissant
+    iterator = get_destination_iterator_h1(destinations_view, dest_sort_config)
+    if iterator is None:
+        iterator = destinations_view.sort_values(by='q_min_initial_target_tons', ascending=False).index.tolist()
+    return iterator
+
+def attempt_initial_q_min_delivery_h1(relation_index, destinations_df, sim_state, tracking_vars,
+                                   dest_sort_config=None, config=DEFAULT_CONFIG):
+    day_for_q_min_shipments = 1
+    dest_index, dest_ptr = sim_state['dest_index'], relation_index['dest_ptr']
+    rel_origin_idx, rel_distance_km = relation_index['origin_idx'], relation_index['distance_km']
+    rel_transit_days = relation_index['transit_days']
+    origin_stock = sim_state['origin_stock']
+    q_min_origin_caps = sim_state['origin_loading_cap'].copy()
+    q_min_dest_caps = sim_state['dest_unloading_cap'].copy()
+    # Le tri ne se fait qu'une fois par simulation : on reconstruit une vue DataFrame de l'état
+    destinations_view = destinations_df.copy()
+    destinations_view['remaining_annual_demand_tons'] = sim_state['dest_remaining']
+    destinations_view['q_min_initial_target_tons'] = sim_state['dest_q_min_target']
+    for dest_id in qmin_destination_order(destinations_view, dest_sort_config):
+        dest_idx = dest_index.get(dest_id)
+        if dest_idx is None: continue
+        needed = sim_state['dest_q_min_target'][dest_idx] - sim_state['dest_q_min_delivered'][dest_idx]
+        if needed <= EPSILON: continue
+        start, stop = dest_ptr[dest_idx], dest_ptr[dest_idx + 1]
+        # Origines reliées à la destination, de la plus approvisionnée à la moins approvisionnée
+        for rel_pos in (start + argsort_descending(origin_stock[rel_origin_idx[start:stop]])).tolist():
+            orig_idx = int(rel_origin_idx[rel_pos])
+            if needed <= EPSILON: break
+            if q_min_origin_caps[orig_idx] <= EPSILON or q_min_dest_caps[dest_idx] <= EPSILON or \
+               origin_stock[orig_idx] <= EPSILON: continue
+            shipped, _, new_orig_cap, new_dest_cap = process_shipment(
+                day_for_q_min_shipments, orig_idx, dest_idx, rel_distance_km[rel_pos], needed, sim_state, tracking_vars,
+                q_min_origin_caps[orig_idx], q_min_dest_caps[dest_idx], "[QMIN_INIT_J1_H1]", rel_transit_days[rel_pos], config
+            )
+            if shipped > EPSILON:
+                q_min_origin_caps[orig_idx], q_min_dest_caps[dest_idx] = new_orig_cap, new_dest_cap
+                sim_state['dest_q_min_delivered'][dest_idx] += shipped; needed -= shipped
+    return sim_state, tracking_vars, q_min_origin_caps, q_min_dest_caps
+
+def filter_profitable_relations_h1(relation_index):
+    # Vue de l'index restreinte aux relations rentables, dans l'ordre du fichier des relations
+    positions = np.flatnonzero(relation_index['profitable'])
+    positions = positions[np.argsort(relation_index['row'][positions], kind='stable')]
+    return {key: relation_index[key][positions] for key in ('origin_idx', 'dest_idx', 'distance_km', 'transit_days')}
+
+# --- Moteur événementiel de la boucle journalière ---
+# Les retours de wagons sont rangés dans un tas indexé par jour de retour. Les capacités
+# journalières étant remises à zéro chaque jour, un jour ne peut être inactif que si aucun
+# wagon n'est disponible : la boucle saute alors directement au prochain retour de wagons.
+
+def release_returning_wagons(day_t, tracking_vars):
+    wagons_in_transit = tracking_vars['wagons_in_transit']
+    while wagons_in_transit and wagons_in_transit[0][0] <= day_t:
+        tracking_vars['wagons_available'] += heapq.heappop(wagons_in_transit)[1]
+
+def prune_daily_candidates(candidates, sim_state, config=DEFAULT_CONFIG):
+    # Stocks et demandes ne font que décroître : une relation qui ne peut plus porter un
+    # envoi minimal est retirée définitivement.
+    o, d = candidates['origin_idx'], candidates['dest_idx']
+    min_shipment_tons = config.min_shipment_for_one_wagon_tons
+    alive = (sim_state['origin_stock'][o] >= min_shipment_tons) & \
+            (sim_state['dest_remaining'][d] >= min_shipment_tons) & \
+            (sim_state['origin_loading_cap'][o] >= min_shipment_tons) & \
+            (sim_state['dest_unloading_cap'][d] >= min_shipment_tons)
+    if alive.all(): return candidates
+    return {key: values[alive] for key, values in candidates.items()}
+
+def dispatch_day_h1(day_t, candidates, sim_state, tracking_vars, load_caps, unload_caps, config=DEFAULT_CONFIG):
+    # H1 : relations rentables servies par distance décroissante (tonnes * km maximales)
+    order = np.argsort(-candidates['distance_km'], kind='stable')
+    dest_remaining = sim_state['dest_remaining']
+    for orig_idx, dest_idx, dist_km, transit_days in zip(candidates['origin_idx'][order].tolist(),
+                                                         candidates['dest_idx'][order].tolist(),
+                                                         candidates['distance_km'][order].tolist(),
+                                                         candidates['transit_days'][order].tolist()):
+        if tracking_vars['wagons_available'] == 0: break
+        shipped, _, load_caps[orig_idx], unload_caps[dest_idx] = process_shipment(
+            day_t, orig_idx, dest_idx, dist_km, dest_remaining[dest_idx], sim_state, tracking_vars,
+            load_caps[orig_idx], unload_caps[dest_idx], transit_days=transit_days, config=config
+        )
+
+def dispatch_day_h2(day_t, candidates, sim_state, tracking_vars, load_caps, unload_caps, config=DEFAULT_CONFIG):
+    # H2 : destinations servies par demande restante décroissante, origine la plus proche d'abord
+    dest_remaining = sim_state['dest_remaining']
+    order = np.lexsort((candidates['distance_km'], -dest_remaining[candidates['dest_idx']]))
+    for orig_idx, dest_idx, dist_km, transit_days in zip(candidates['origin_idx'][order].tolist(),
+                                                         candidates['dest_idx'][order].tolist(),
+                                                         candidates['distance_km'][order].tolist(),
+                                                         candidates['transit_days'][order].tolist()):
+        if tracking_vars['wagons_available'] == 0: break
+        shipped, _, load_caps[orig_idx], unload_caps[dest_idx] = process_shipment(
+            day_t, orig_idx, dest_idx, dist_km, dest_remaining[dest_idx], sim_state, tracking_vars,
+            load_caps[orig_idx], unload_caps[dest_idx], transit_days=transit_days, config=config
+        )
+
+def log_wagon_fleet(day_t, tracking_vars):
+    wagons_available = tracking_vars['wagons_available']
+    tracking_vars['daily_wagon_log'].append(day_t, wagons_available, tracking_vars['total_wagons'] - wagons_available)
+
+def next_active_day(day_t, tracking_vars, max_simulation_days):
+    # Sans wagon disponible, aucun envoi n'est possible avant le prochain retour de wagons
+    if tracking_vars['wagons_available'] > 0: return day_t + 1
+    wagons_in_transit = tracking_vars['wagons_in_transit']
+    return max(day_t + 1, wagons_in_transit[0][0]) if wagons_in_transit else max_simulation_days + 1
+
+def chain_day_hooks(*hooks):
+    # Combine plusieurs fonctions on_day_end (instantanés, progression...) ; None si aucune
+    hooks = [hook for hook in hooks if hook is not None]
+    if not hooks: return None
+    if len(hooks) == 1: return hooks[0]
+    def on_day_end(day_t, sim_state, tracking_vars):
+        for hook in hooks:
+            hook(day_t, sim_state, tracking_vars)
+    return on_day_end
+
+def run_event_loop(dispatch_day, candidates, sim_state, tracking_vars, rem_load_d1, rem_unload_d1, config=DEFAULT_CONFIG,
+                   on_day_end=None, start_day=0):
+    # Renvoie days_taken_simulation_loop : comme dans la boucle jour par jour d'origine, la simulation va
+    # toujours jusqu'à la fin de l'horizon, et daily_wagon_log a une ligne par jour.
+    # on_day_end(day_t, sim_state, tracking_vars) est appelé à la fin de chaque jour, jours inactifs compris.
+    # start_day : reprise après la fin de ce jour (état restauré depuis un instantané).
+    max_simulation_days = config.max_simulation_days
+    day_t = start_day
+    next_day = 1 if start_day == 0 else next_active_day(start_day, tracking_vars, max_simulation_days)
+    candidates = prune_daily_candidates(candidates, sim_state, config)
+    while next_day <= max_simulation_days:
+        for idle_day in range(day_t + 1, next_day):
+            log_wagon_fleet(idle_day, tracking_vars)
+            if on_day_end is not None: on_day_end(idle_day, sim_state, tracking_vars)
+        day_t = next_day
+        release_returning_wagons(day_t, tracking_vars)
+        if day_t == 1:
+            load_caps, unload_caps = rem_load_d1.copy(), rem_unload_d1.copy()
+        else:
+            load_caps, unload_caps = sim_state['origin_loading_cap'].copy(), sim_state['dest_unloading_cap'].copy()
+        dispatch_day(day_t, candidates, sim_state, tracking_vars, load_caps, unload_caps, config)
+        log_wagon_fleet(day_t, tracking_vars)
+        if on_day_end is not None: on_day_end(day_t, sim_state, tracking_vars)
+        candidates = prune_daily_candidates(candidates, sim_state, config)
+        if len(candidates['origin_idx']) == 0: break  # plus aucun envoi possible : jours restants inactifs
+        next_day = next_active_day(day_t, tracking_vars, max_simulation_days)
+    for idle_day in range(day_t + 1, max_simulation_days + 1):
+        release_returning_wagons(idle_day, tracking_vars)  # les wagons en route rentrent encore
+        log_wagon_fleet(idle_day, tracking_vars)
+        if on_day_end is not None: on_day_end(idle_day, sim_state, tracking_vars)
+    return max(day_t, max_simulation_days)
+
+def build_results(sim_state, tracking_vars_sim, origins_input_df, destinations_input_df, day_t):
+    start = time.perf_counter()
+    origins_df, destinations_df = state_to_dataframes(sim_state, origins_input_df, destinations_input_df)
+    tracking_vars_sim['shipments_log'].close(); tracking_vars_sim['daily_wagon_log'].close()
+    shipments_summary_df = tracking_vars_sim['shipments_log'].to_dataframe()
+    kpis = compute_kpis(sim_state, tracking_vars_sim)
+    record_phase_time(tracking_vars_sim.get('diagnostics'), 'kpi', start)
+    return {"profit": kpis['profit'], "kpis": kpis, "shipments_df": shipments_summary_df, "final_origins_df": origins_df, "final_destinations_df": destinations_df, "final_tracking_vars": tracking_vars_sim, "days_taken_simulation_loop": day_t}
+
+def run_simulation_h1(relations_input_df, origins_input_df, destinations_input_df,
+                      qmin_common_config=None, num_initial_wagons_param=50, relation_index=None, config=DEFAULT_CONFIG,
+                      log_dir=None, log_format='csv', on_day_end=None):
+    if relation_index is None or relation_index['km_per_day_for_wagon_return'] != config.km_per_day_for_wagon_return:
+        relation_index = build_relation_index(relations_input_df, origins_input_df, destinations_input_df, config)
+    start = time.perf_counter()
+    sim_state, tracking_vars_sim = initialize_tracking_variables(origins_input_df, destinations_input_df, num_initial_wagons_param, log_dir, log_format, config.collect_diagnostics)
+    record_phase_time(tracking_vars_sim['diagnostics'], 'init', start)
+    start = time.perf_counter()
+    sim_state, tracking_vars_sim, rem_load_d1, rem_unload_d1 = attempt_initial_q_min_delivery_h1(relation_index, destinations_input_df, sim_state, tracking_vars_sim, qmin_common_config, config)
+    record_phase_time(tracking_vars_sim['diagnostics'], 'qmin', start)
+    start = time.perf_counter()
+    profitable_relations = filter_profitable_relations_h1(relation_index)
+    day_t = run_event_loop(dispatch_day_h1, profitable_relations, sim_state, tracking_vars_sim, rem_load_d1, rem_unload_d1, config, on_day_end)
+    record_phase_time(tracking_vars_sim['diagnostics'], 'loop', start)
+    return build_results(sim_state, tracking_vars_sim, origins_input_df, destinations_input_df, day_t)
+
+def run_simulation_h2(relations_input_df, origins_input_df, destinations_input_df,
+                      qmin_user_priority_order=None, num_initial_wagons_param=50, relation_index=None, config=DEFAULT_CONFIG,
+                      log_dir=None, log_format='csv', on_day_end=None):
+    if relation_index is None or relation_index['km_per_day_for_wagon_return'] != config.km_per_day_for_wagon_return:
+        relation_index = build_relation_index(relations_input_df, origins_input_df, destinations_input_df, config)
+    qmin_config_for_attempt = ('custom_order', qmin_user_priority_order) if qmin_user_priority_order else None
+    start = time.perf_counter()
+    sim_state, tracking_vars_sim = initialize_tracking_variables(origins_input_df, destinations_input_df, num_initial_wagons_param, log_dir, log_format, config.collect_diagnostics)
+    record_phase_time(tracking_vars_sim['diagnostics'], 'init', start)
+    start = time.perf_counter()
+    sim_state, tracking_vars_sim, rem_load_d1, rem_unload_d1 = attempt_initial_q_min_delivery_h1(relation_index, destinations_input_df, sim_state, tracking_vars_sim, qmin_config_for_attempt, config)
+    record_phase_time(tracking_vars_sim['diagnostics'], 'qmin', start)
+    start = time.perf_counter()
+    profitable_relations = filter_profitable_relations_h1(relation_index)
+    day_t = run_event_loop(dispatch_day_h2, profitable_relations, sim_state, tracking_vars_sim, rem_load_d1, rem_unload_d1, config, on_day_end)
+    record_phase_time(tracking_vars_sim['diagnostics'], 'loop', start)
+    return build_results(sim_state, tracking_vars_sim, origins_input_df, destinations_input_df, day_t)
+
+# --- Configuration de la priorité QMIN (partagée par l'interface et la ligne de commande) ---
+QMIN_SORT_MAP = {
+    "QMIN Décroissant": ('q_min_initial_target_tons', False), "QMIN Croissant": ('q_min_initial_target_tons', True),
+    "Demande Annuelle Décroissante": ('annual_demand_tons', False), "Demande Annuelle Croissante": ('annual_demand_tons', True),
+    "Distance Minimale Croissante": ('min_distance_km', True), "Distance Minimale Décroissante": ('min_distance_km', False)
+}
+
+def build_qmin_config(heuristic_choice, qmin_choice, qmin_custom_order, destinations_df, relation_index):
+    if qmin_choice == "Ordre Personnalisé":
+        order_list = [normalize_id(x) for x in qmin_custom_order.split(',') if x.strip()] or None
+        if heuristic_choice == 'H1':
+            return ('custom_order', order_list) if order_list else None
+        return order_list
+    if heuristic_choice == 'H1':
+        return QMIN_SORT_MAP.get(qmin_choice)
+    # Pré-calcul pour les options de tri de H2 (liste ordonnée des destinations)
+    temp_dest_df = destinations_df.copy()
+    temp_dest_df['q_min_initial_target_tons'] = 0.20 * temp_dest_df['annual_demand_tons']
+    temp_dest_df['min_distance_km'] = relation_index['min_distance_km']
+    col, asc = QMIN_SORT_MAP.get(qmin_choice, ('q_min_initial_target_tons', False))
+    return temp_dest_df.sort_values(by=col, ascending=asc).index.tolist()
+
+def run_simulation(heuristic_choice, relations_df, origins_df, destinations_df, qmin_config=None,
+                   num_initial_wagons_param=50, relation_index=None, config=DEFAULT_CONFIG,
+                   log_dir=None, log_format='csv', on_day_end=None):
+    if heuristic_choice == 'LP':
+        from simulation_bound import run_simulation_lp as run  # import local : simulation_bound importe ce module
+    else:
+        run = run_simulation_h1 if heuristic_choice == 'H1' else run_simulation_h2
+    return run(relations_df, origins_df, destinations_df, qmin_config, num_initial_wagons_param, relation_index, config,
+               log_dir, log_format, on_day_end)
@@ -0,0 +1,187 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Journal en colonnes : un tableau NumPy typé par colonne, préalloué et agrandi par doublement,
+# au lieu d'un dictionnaire Python par ligne. Les colonnes catégorielles (origine, destination,
+# type d'envoi) ne stockent que des codes entiers.
+# Avec flush_path, les lignes sont écrites sur disque par blocs (CSV ou Parquet) pendant la
+# simulation : la mémoire reste constante et le fichier CSV peut être suivi en direct (tail -f).
+
+class ColumnarLog:
+    def __init__(self, columns, categories=None, capacity=1024, flush_path=None, flush_rows=100_000):
+        # columns : liste de (nom, dtype). categories : {nom: libellés}. Si les libellés sont fournis,
+        # append reçoit directement le code entier ; si None, append reçoit le libellé (catégories dynamiques).
+        self.columns = [name for name, _ in columns]
+        self.categories = {name: (list(labels) if labels is not None else []) for name, labels in (categories or {}).items()}
+        self._dynamic_codes = {name: {} for name, labels in (categories or {}).items() if labels is None}
+        self._dtypes = [np.int32 if name in self.categories else dtype for name, dtype in columns]
+        self._capacity = max(1, capacity)
+        self._arrays = [np.empty(self._capacity, dtype=dtype) for dtype in self._dtypes]
+        self._size = 0
+        self.flush_path = flush_path
+        self.flush_rows = flush_rows
+        self.rows_flushed = 0
+        self._parquet_writer = None
+
+    def __len__(self):
+        return self.rows_flushed + self._size
+
+    def append(self, *values):
+        if self._size == self._capacity:
+            if self.flush_path is not None and self._size >= self.flush_rows:
+                self.flush()
+            else:
+                self._grow()
+        i = self._size
+        for name, array, value in zip(self.columns, self._arrays, values):
+            codes = self._dynamic_codes.get(name)
+            if codes is not None:
+                code = codes.get(value)
+                if code is None:
+                    code = codes[value] = len(self.categories[name])
+                    self.categories[name].append(value)
+                value = code
+            array[i] = value
+        self._size += 1
+
+    def _grow(self):
+        self._capacity *= 2
+        for k, array in enumerate(self._arrays):
+            grown = np.empty(self._capacity, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            self._arrays[k] = grown
+
+    @property
+    def nbytes(self):
+        # Mémoire des colonnes gardées en mémoire (capacité allouée comprise)
+        return sum(array.nbytes for array in self._arrays)
+
+    def column(self, name):
+        # Vue sur les lignes encore en mémoire (codes entiers pour les colonnes catégorielles)
+        return self._arrays[self.columns.index(name)][:self._size]
+
+    def _buffer_to_dataframe(self, start=0, stop=None):
+        data = {}
+        for name, array in zip(self.columns, self._arrays):
+            values = array[start:self._size if stop is None else stop]
+            if name in self.categories:
+                values = np.asarray(self.categories[name], dtype=object)[values]
+            data[name] = values.copy()
+        return pd.DataFrame(data, columns=self.columns)
+
+    def flush(self):
+        # Écrit les lignes en mémoire à la fin du fichier puis vide le tampon
+        if self.flush_path is None or self._size == 0:
+            return
+        chunk = self._buffer_to_dataframe()
+        if self.flush_path.endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.flush_path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            chunk.to_csv(self.flush_path, mode='a' if self.rows_flushed else 'w', header=not self.rows_flushed, index=False)
+        self.rows_flushed += self._size
+        self._size = 0
+
+    def close(self):
+        if self.flush_path is None:
+            return
+        self.flush()
+        if self.rows_flushed == 0:
+            # Journal vide : fichier avec les seules colonnes
+            empty = self._buffer_to_dataframe()
+            if self.flush_path.endswith('.parquet'):
+                empty.to_parquet(self.flush_path, index=False)
+            else:
+                empty.to_csv(self.flush_path, index=False)
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def _csv_dtypes(self):
+        # Types des colonnes à la relecture du CSV : libellés lus tels quels (un identifiant "0012" reste une chaîne)
+        return {name: (object if name in self.categories else dtype) for name, dtype in zip(self.columns, self._dtypes)}
+
+    def to_dataframe(self):
+        # Journal complet ; relit le fichier si des blocs ont déjà été écrits sur disque
+        if self.rows_flushed == 0:
+            return self._buffer_to_dataframe()
+        self.close()
+        if self.flush_path.endswith('.parquet'):
+            return pd.read_parquet(self.flush_path)
+        return pd.read_csv(self.flush_path, dtype=self._csv_dtypes())
+
+    def iter_chunks(self, chunk_rows=100_000):
+        # Parcours du journal complet par blocs de chunk_rows lignes (exports), sans le charger en entier ;
+        # au moins un bloc (éventuellement vide) est renvoyé
+        if self.rows_flushed == 0:
+            for start in range(0, max(self._size, 1), chunk_rows):
+                yield self._buffer_to_dataframe(start, min(start + chunk_rows, self._size))
+            return
+        self.close()
+        if self.flush_path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(self.flush_path).iter_batches(batch_size=chunk_rows):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(self.flush_path, chunksize=chunk_rows, dtype=self._csv_dtypes())
+
+    def copy(self, start=0, stop=None):
+        # Copie indépendante des lignes [start, stop) d'un journal gardé en mémoire (reprise depuis un instantané)
+        if self.flush_path is not None:
+            raise ValueError("Copie impossible : le journal est écrit en continu sur disque")
+        stop = self._size if stop is None else stop
+        if not 0 <= start <= stop <= self._size:
+            raise ValueError(f"Lignes {start}:{stop} hors du journal ({self._size} lignes)")
+        clone = ColumnarLog.__new__(ColumnarLog)
+        clone.__dict__.update(self.__dict__)
+        clone.categories = {name: list(labels) for name, labels in self.categories.items()}
+        clone._dynamic_codes = {name: dict(codes) for name, codes in self._dynamic_codes.items()}
+        clone._capacity = max(1, stop - start)
+        clone._arrays = [np.empty(clone._capacity, dtype=array.dtype) for array in self._arrays]
+        for array, source in zip(clone._arrays, self._arrays):
+            array[:stop - start] = source[start:stop]
+        clone._size = stop - start
+        return clone
+
+    def extend(self, other):
+        # Ajoute les lignes d'un journal issu du même journal (copy) : les libellés des catégories ne font
+        # que s'allonger, les codes restent donc valables
+        while self._capacity < self._size + other._size:
+            self._grow()
+        for array, source in zip(self._arrays, other._arrays):
+            array[self._size:self._size + other._size] = source[:other._size]
+        self._size += other._size
+        for name, labels in other.categories.items():
+            if len(labels) > len(self.categories[name]):
+                self.categories[name] = list(labels)
+                if name in self._dynamic_codes:
+                    self._dynamic_codes[name] = {label: code for code, label in enumerate(labels)}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_parquet_writer'] = None
+        return state
+
+def new_shipments_log(origin_ids, dest_ids, flush_path=None):
+    return ColumnarLog(
+        [('ship_day', np.int64), ('arrival_day', np.int64), ('origin', None), ('destination', None),
+         ('quantity_tons', np.float64), ('wagons_used', np.int64), ('type', None)],
+        categories={'origin': origin_ids, 'destination': dest_ids, 'type': None},
+        flush_path=flush_path)
+
+def new_wagon_log(flush_path=None):
+    return ColumnarLog([('day', np.int64), ('wagons_available', np.int64), ('wagons_in_transit', np.int64)],
+                       capacity=512, flush_path=flush_path)
+
+def log_paths(log_dir, log_format='csv'):
+    # Fichiers de journal en continu dans log_dir (None : journaux gardés en mémoire)
+    if log_dir is None:
+        return None, None
+    os.makedirs(log_dir, exist_ok=True)
+    return os.path.join(log_dir, f'expeditions.{log_format}'), os.path.join(log_dir, f'log_wagons.{log_format}')
@@ -0,0 +1,181 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from simulation_logic import (
+    build_relation_index, filter_profitable_relations_h1, qmin_destination_order, DEFAULT_CONFIG, EPSILON
+)
+
+# Mode stochastique (Monte Carlo) : N réplications du plan H1/H2 avec retards de transit,
+# pannes de capacité journalières et bruit sur la demande annuelle.
+# Toutes les réplications avancent ensemble : l'état est un ensemble de tableaux NumPy
+# (réplication, nœud) et chaque envoi est traité pour toutes les réplications en une opération
+# vectorielle, selon exactement les mêmes règles que process_shipment. Sans aléa, chaque
+# réplication reproduit donc la simulation déterministe.
+# L'ordre de la phase QMIN est celui du plan, calculé sur les données nominales.
+
+@dataclass(frozen=True)
+class StochasticConfig:
+    num_replicas: int = 500
+    seed: int = 0
+    transit_delay_mean_days: float = 0.5  # retard moyen (loi de Poisson) ajouté à chaque aller-retour
+    origin_outage_prob: float = 0.02  # probabilité journalière qu'une origine ne puisse pas charger
+    dest_outage_prob: float = 0.05  # probabilité journalière qu'une destination perde ses créneaux de déchargement
+    demand_noise_sd: float = 0.10  # écart-type relatif de la demande annuelle réalisée
+
+DEFAULT_STOCHASTIC_CONFIG = StochasticConfig()
+PERCENTILES = (5, 25, 50, 75, 95)
+
+def ship_batch(day_t, o, d, distance_km, transit_days, desired_qty, state, load_caps, unload_caps,
+               config, stochastic_config, rng):
+    # process_shipment pour une relation par réplication ; renvoie les tonnes expédiées par réplication
+    rows = state['rows']
+    wagon_capacity_tons, min_shipment_tons = config.wagon_capacity_tons, config.min_shipment_for_one_wagon_tons
+    wagons_available, origin_stock, dest_remaining = state['wagons_available'], state['origin_stock'], state['dest_remaining']
+    load_cap, unload_cap = load_caps[rows, o], unload_caps[rows, d]
+    potential_qty = np.minimum(np.minimum(np.minimum(desired_qty, load_cap), origin_stock[rows, o]),
+                               np.minimum(np.minimum(desired_qty, unload_cap), dest_remaining[rows, d]))
+    ok = (desired_qty > EPSILON) & (desired_qty >= min_shipment_tons) & (wagons_available > 0) & \
+         (potential_qty >= min_shipment_tons) & (potential_qty > EPSILON)
+    if not ok.any():
+        return None
+    wagons_to_use = np.minimum(np.ceil(potential_qty / wagon_capacity_tons), wagons_available)
+    actual_qty = np.minimum(potential_qty, wagons_to_use * wagon_capacity_tons)
+    final_wagons = np.ceil(actual_qty / wagon_capacity_tons)
+    ok &= (actual_qty > EPSILON) & (final_wagons <= wagons_available)
+    actual_qty = np.where(ok, actual_qty, 0.0)
+    final_wagons = np.where(ok, final_wagons, 0).astype(np.int64)
+    origin_stock[rows, o] -= actual_qty
+    state['dest_delivered'][rows, d] += actual_qty
+    dest_remaining[rows, d] -= actual_qty
+    load_caps[rows, o] = load_cap - actual_qty
+    unload_caps[rows, d] = unload_cap - actual_qty
+    wagons_available -= final_wagons
+    return_day = day_t + 2 * np.maximum(1, transit_days)
+    if stochastic_config.transit_delay_mean_days > 0:
+        return_day = return_day + rng.poisson(stochastic_config.transit_delay_mean_days, len(rows))
+    # Calendrier des retours (réplication, jour) ; les retours après l'horizon sont regroupés dans la dernière case
+    returns = state['wagon_returns']
+    returns[rows, np.minimum(return_day, returns.shape[1] - 1)] += final_wagons
+    state['tonne_km'] += actual_qty * distance_km
+    return actual_qty
+
+def attempt_initial_q_min_delivery_batch(relation_index, dest_order, state, load_caps, unload_caps,
+                                         config, stochastic_config, rng):
+    rows, origin_stock = state['rows'], state['origin_stock']
+    rel_origin_idx, dest_ptr = relation_index['origin_idx'], relation_index['dest_ptr']
+    for dest_id in dest_order:
+        dest_idx = relation_index['dest_index'].get(dest_id)
+        if dest_idx is None: continue
+        start, stop = dest_ptr[dest_idx], dest_ptr[dest_idx + 1]
+        if start == stop: continue
+        needed = state['dest_q_min_target'][:, dest_idx] - state['dest_q_min_delivered'][:, dest_idx]
+        # Même ordre que argsort_descending, réplication par réplication
+        stocks = origin_stock[:, rel_origin_idx[start:stop]]
+        rel_order = start + (stop - start - 1 - stocks[:, ::-1].argsort(axis=1, kind='quicksort'))[:, ::-1]
+        d = np.full(len(rows), dest_idx)
+        for k in range(stop - start):
+            rel_pos = rel_order[:, k]
+            o = rel_origin_idx[rel_pos]
+            skip = (needed <= EPSILON) | (load_caps[rows, o] <= EPSILON) | (unload_caps[rows, d] <= EPSILON) | \
+                   (origin_stock[rows, o] <= EPSILON)
+            shipped = ship_batch(1, o, d, relation_index['distance_km'][rel_pos], relation_index['transit_days'][rel_pos],
+                                 np.where(skip, 0.0, needed), state, load_caps, unload_caps, config, stochastic_config, rng)
+            if shipped is not None:
+                state['dest_q_min_delivered'][:, dest_idx] += shipped
+                needed = needed - shipped
+
+def daily_caps(state, day_t, stochastic_config, rng):
+    load_caps = np.broadcast_to(state['origin_loading_cap'], state['origin_stock'].shape).copy()
+    unload_caps = np.broadcast_to(state['dest_unloading_cap'], state['dest_remaining'].shape).copy()
+    if stochastic_config.origin_outage_prob > 0:
+        load_caps[rng.random(load_caps.shape) < stochastic_config.origin_outage_prob] = 0.0
+    if stochastic_config.dest_outage_prob > 0:
+        unload_caps[rng.random(unload_caps.shape) < stochastic_config.dest_outage_prob] = 0.0
+    return load_caps, unload_caps
+
+def run_monte_carlo(heuristic_choice, relations_df, origins_df, destinations_df, qmin_config=None,
+                    num_initial_wagons_param=50, relation_index=None, config=DEFAULT_CONFIG,
+                    stochastic_config=DEFAULT_STOCHASTIC_CONFIG):
+    if relation_index is None or relation_index['km_per_day_for_wagon_return'] != config.km_per_day_for_wagon_return:
+        relation_index = build_relation_index(relations_df, origins_df, destinations_df, config)
+    rng = np.random.default_rng(stochastic_config.seed)
+    n_replicas, max_days = stochastic_config.num_replicas, config.max_simulation_days
+    min_shipment_tons = config.min_shipment_for_one_wagon_tons
+    annual_demand = destinations_df['annual_demand_tons'].to_numpy(dtype=float)
+    realized_demand = np.broadcast_to(annual_demand, (n_replicas, len(annual_demand))).copy()
+    if stochastic_config.demand_noise_sd > 0:
+        realized_demand *= np.maximum(0.0, 1.0 + stochastic_config.demand_noise_sd * rng.standard_normal(realized_demand.shape))
+    state = {
+        'rows': np.arange(n_replicas),
+        'origin_loading_cap': origins_df['daily_loading_capacity_tons'].to_numpy(dtype=float),
+        'dest_unloading_cap': destinations_df['daily_unloading_capacity_tons'].to_numpy(dtype=float),
+        'origin_stock': np.tile(origins_df['initial_available_product_tons'].to_numpy(dtype=float), (n_replicas, 1)),
+        'dest_delivered': np.zeros_like(realized_demand),
+        'dest_remaining': realized_demand.copy(),
+        'dest_q_min_target': 0.20 * realized_demand,
+        'dest_q_min_delivered': np.zeros_like(realized_demand),
+        'wagons_available': np.full(n_replicas, num_initial_wagons_param, dtype=np.int64),
+        'wagon_returns': np.zeros((n_replicas, max_days + 2), dtype=np.int64),
+        'tonne_km': np.zeros(n_replicas),
+    }
+    # Phase QMIN (jour 1), dans l'ordre du plan
+    if heuristic_choice == 'H2':
+        qmin_config = ('custom_order', qmin_config) if qmin_config else None
+    destinations_view = destinations_df.copy()
+    destinations_view['remaining_annual_demand_tons'] = annual_demand
+    destinations_view['q_min_initial_target_tons'] = 0.20 * annual_demand
+    load_caps, unload_caps = daily_caps(state, 1, stochastic_config, rng)
+    attempt_initial_q_min_delivery_batch(relation_index, qmin_destination_order(destinations_view, qmin_config), state,
+                                         load_caps, unload_caps, config, stochastic_config, rng)
+    # Boucle journalière
+    candidates = filter_profitable_relations_h1(relation_index)
+    wagons_in_transit = np.zeros((n_replicas, max_days), dtype=np.int64)
+    delivered_tons = np.zeros((n_replicas, max_days))
+    rows, wagons_available, dest_remaining = state['rows'], state['wagons_available'], state['dest_remaining']
+    for day_t in range(1, max_days + 1):
+        wagons_available += state['wagon_returns'][:, day_t]
+        if day_t > 1:
+            load_caps, unload_caps = daily_caps(state, day_t, stochastic_config, rng)
+        alive = (state['origin_stock'][:, candidates['origin_idx']] >= min_shipment_tons).any(axis=0) & \
+                (dest_remaining[:, candidates['dest_idx']] >= min_shipment_tons).any(axis=0) & \
+                (state['origin_loading_cap'][candidates['origin_idx']] >= min_shipment_tons) & \
+                (state['dest_unloading_cap'][candidates['dest_idx']] >= min_shipment_tons)
+        candidates = {key: values[alive] for key, values in candidates.items()}
+        n_candidates = len(candidates['origin_idx'])
+        if n_candidates and wagons_available.any():
+            if heuristic_choice == 'H1':
+                order = np.broadcast_to(np.argsort(-candidates['distance_km'], kind='stable'), (n_replicas, n_candidates))
+            else:
+                order = np.lexsort((np.broadcast_to(candidates['distance_km'], (n_replicas, n_candidates)),
+                                    -dest_remaining[:, candidates['dest_idx']]))
+            for k in range(n_candidates):
+                if not wagons_available.any(): break
+                pos = order[:, k]
+                d = candidates['dest_idx'][pos]
+                ship_batch(day_t, candidates['origin_idx'][pos], d, candidates['distance_km'][pos], candidates['transit_days'][pos],
+                           dest_remaining[rows, d], state, load_caps, unload_caps, config, stochastic_config, rng)
+        wagons_in_transit[:, day_t - 1] = num_initial_wagons_param - wagons_available
+        delivered_tons[:, day_t - 1] = state['dest_delivered'].sum(axis=1)
+    return summarize_replicas(state, realized_demand, wagons_in_transit, delivered_tons, num_initial_wagons_param, stochastic_config)
+
+def summarize_replicas(state, realized_demand, wagons_in_transit, delivered_tons, num_wagons, stochastic_config):
+    total_demand = realized_demand.sum(axis=1)
+    safe_demand = np.where(total_demand > 0, total_demand, 1.0)
+    satisfaction_curve = np.where(total_demand[:, None] > 0, delivered_tons / safe_demand[:, None] * 100, 0.0)
+    utilization_curve = wagons_in_transit / num_wagons * 100 if num_wagons > 0 else np.zeros(wagons_in_transit.shape)
+    replicas_df = pd.DataFrame({
+        'profit': state['tonne_km'],
+        'satisfaction_rate': satisfaction_curve[:, -1] if satisfaction_curve.shape[1] else np.zeros(len(total_demand)),
+        'fleet_utilization': utilization_curve.mean(axis=1) if utilization_curve.shape[1] else np.zeros(len(total_demand)),
+    })
+    labels = [f"p{p}" for p in PERCENTILES]
+    days = pd.RangeIndex(1, delivered_tons.shape[1] + 1, name='day')
+    return {
+        'replicas': replicas_df,
+        'percentiles': pd.DataFrame(np.percentile(replicas_df.to_numpy(), PERCENTILES, axis=0), index=labels, columns=replicas_df.columns),
+        'satisfaction_bands': pd.DataFrame(np.percentile(satisfaction_curve, PERCENTILES, axis=0).T, index=days, columns=labels),
+        'utilization_bands': pd.DataFrame(np.percentile(utilization_curve, PERCENTILES, axis=0).T, index=days, columns=labels),
+        'stochastic_config': stochastic_config,
+    }
@@ -0,0 +1,83 @@
+import math
+import os
+import time
+
+import numpy as np
+
+from simulation_logic import build_relation_index, build_qmin_config, run_simulation, SimulationConfig
+from simulation_sweep import worker_inputs, worker_pool
+
+# Recherche de l'ordre QMIN personnalisé (recuit simulé sur les permutations de destinations).
+# À chaque itération, un lot d'ordres voisins de l'ordre courant est évalué en parallèle par les
+# workers du balayage (données chargées une seule fois par worker) ; le meilleur voisin du lot est
+# accepté selon le critère de Metropolis. Les ordres déjà évalués sont mémorisés.
+
+SEARCH_OBJECTIVES = ('profit', 'satisfaction_rate')
+
+def evaluate_order(heuristic, order, num_wagons, sim_days):
+    relations_df, origins_df, destinations_df, relation_index = worker_inputs()
+    qmin_config = ('custom_order', list(order)) if heuristic == 'H1' else list(order)
+    results = run_simulation(heuristic, relations_df, origins_df, destinations_df, qmin_config, num_wagons,
+                             relation_index, SimulationConfig(max_simulation_days=sim_days))
+    return {'profit': float(results['kpis']['profit']), 'satisfaction_rate': float(results['kpis']['satisfaction_rate'])}
+
+def neighbour_order(order, rng):
+    # Échange de deux destinations ou déplacement d'une destination à une autre position
+    order = list(order)
+    i, j = rng.choice(len(order), size=2, replace=False)
+    if rng.random() < 0.5:
+        order[i], order[j] = order[j], order[i]
+    else:
+        order.insert(j, order.pop(i))
+    return tuple(order)
+
+def search_qmin_order(relations_df, origins_df, destinations_df, heuristic='H1', num_wagons=500, sim_days=260,
+                      objective='profit', time_budget_s=60.0, max_evaluations=None, initial_order=None,
+                      batch_size=None, max_workers=None, seed=0):
+    # Générateur : renvoie après chaque lot l'état de la recherche (meilleur ordre trouvé jusqu'ici)
+    if objective not in SEARCH_OBJECTIVES:
+        raise ValueError(f"Objectif inconnu : {objective}")
+    max_workers = max_workers or os.cpu_count() or 1
+    batch_size = batch_size or max(2, max_workers)
+    rng = np.random.default_rng(seed)
+    if initial_order is None:
+        relation_index = build_relation_index(relations_df, origins_df, destinations_df)
+        initial_order = build_qmin_config('H2', "QMIN Décroissant", "", destinations_df, relation_index)
+    current_order = tuple(initial_order)
+    if len(current_order) < 2:
+        raise ValueError("Il faut au moins deux destinations pour rechercher un ordre")
+    evaluated = {}
+    state = {'evaluations': 0, 'cache_hits': 0, 'iterations': 0, 'elapsed_s': 0.0}
+    start = time.perf_counter()
+    with worker_pool(relations_df, origins_df, destinations_df, max_workers) as executor:
+        evaluated[current_order] = executor.submit(evaluate_order, heuristic, current_order, num_wagons, sim_days).result()
+        state['evaluations'] = 1
+        current_score = best_score = evaluated[current_order][objective]
+        best_order, initial_score = current_order, current_score
+        # Température initiale : 1 % du score de départ, refroidie géométriquement avec le temps écoulé
+        initial_temperature = max(abs(initial_score) * 0.01, 1e-9)
+        while True:
+            elapsed = time.perf_counter() - start
+            if elapsed >= time_budget_s or (max_evaluations is not None and state['evaluations'] >= max_evaluations):
+                break
+            temperature = initial_temperature * 0.001 ** (elapsed / time_budget_s)
+            candidates = list(dict.fromkeys(neighbour_order(current_order, rng) for _ in range(batch_size)))
+            pending = {order: executor.submit(evaluate_order, heuristic, order, num_wagons, sim_days)
+                       for order in candidates if order not in evaluated}
+            state['cache_hits'] += len(candidates) - len(pending)
+            for order, future in pending.items():
+                evaluated[order] = future.result()
+            state['evaluations'] += len(pending)
+            state['iterations'] += 1
+            candidate_order = max(candidates, key=lambda order: evaluated[order][objective])
+            candidate_score = evaluated[candidate_order][objective]
+            if candidate_score >= current_score or rng.random() < math.exp((candidate_score - current_score) / temperature):
+                current_order, current_score = candidate_order, candidate_score
+            if current_score > best_score:
+                best_order, best_score = current_order, current_score
+            state['elapsed_s'] = time.perf_counter() - start
+            yield dict(state, objective=objective, initial_score=initial_score, current_score=current_score,
+                       best_score=best_score, best_order=list(best_order), best_result=evaluated[best_order])
+    state['elapsed_s'] = time.perf_counter() - start
+    yield dict(state, objective=objective, initial_score=initial_score, current_score=current_score,
+               best_score=best_score, best_order=list(best_order), best_result=evaluated[best_order], done=True)
@@ -0,0 +1,201 @@
+import copy
+import os
+from dataclasses import replace
+import pickle
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+from simulation_logic import (
+    build_relation_index, filter_profitable_relations_h1, run_event_loop, build_results, dispatch_day_h1, dispatch_day_h2,
+    run_simulation, chain_day_hooks, new_diagnostics, record_phase_time, DEFAULT_CONFIG
+)
+
+# Instantanés de l'état complet de la simulation à la fin d'un jour donné : stocks, demandes restantes,
+# wagons disponibles et en transit, indicateurs cumulés et longueur des journaux à ce jour (log_offsets).
+# Les journaux ne font que s'allonger : un instantané n'en garde pas de copie, sa taille ne dépend pas
+# de la durée déjà simulée. Pour reprendre, on tronque à ces longueurs une copie des journaux de
+# l'exécution d'origine (paramètre logs, ex. journaux de results['final_tracking_vars']).
+# Une simulation peut reprendre d'un instantané avec d'autres paramètres (wagons supplémentaires,
+# autre heuristique, horizon différent) sans rejouer les jours déjà simulés ni la phase QMIN.
+# Les instantanés écrits sur disque servent aussi de points de reprise après un arrêt. Chaque fichier
+# ne contient que les lignes de journal ajoutées depuis le point de reprise précédent de la même
+# exécution ; load_snapshot remonte la chaîne des fichiers pour reconstituer les journaux.
+
+SNAPSHOT_FORMAT_VERSION = 2
+DISPATCHERS = {'H1': dispatch_day_h1, 'H2': dispatch_day_h2}
+
+def take_snapshot(day_t, heuristic_choice, sim_state, tracking_vars, config):
+    # Les identifiants et index (jamais modifiés pendant la simulation) sont partagés, les tableaux copiés
+    metrics = tracking_vars['metrics']
+    return {
+        'format': SNAPSHOT_FORMAT_VERSION,
+        'day': int(day_t),
+        'heuristic': heuristic_choice,
+        'config': config,
+        'sim_state': {key: (value.copy() if isinstance(value, np.ndarray) else value) for key, value in sim_state.items()},
+        'tracking_vars': {
+            'total_wagons': tracking_vars['total_wagons'],
+            'wagons_available': tracking_vars['wagons_available'],
+            'wagons_in_transit': list(tracking_vars['wagons_in_transit']),
+            'metrics': {key: (value.copy() if isinstance(value, np.ndarray) else value) for key, value in metrics.items()},
+            'diagnostics': copy.deepcopy(tracking_vars.get('diagnostics')),
+        },
+        'log_offsets': (len(tracking_vars['shipments_log']), len(tracking_vars['daily_wagon_log'])),
+    }
+
+def run_logs(results):
+    # Journaux (expéditions, wagons) d'une exécution, à passer en logs lors d'une reprise
+    return results['final_tracking_vars']['shipments_log'], results['final_tracking_vars']['daily_wagon_log']
+
+def restore_state(snapshot, logs=None):
+    # (sim_state, tracking_vars) modifiables ; journaux : copies de logs (à défaut, des journaux joints à
+    # l'instantané par load_snapshot ou advance_snapshot) tronquées aux longueurs de l'instantané
+    logs = logs if logs is not None else snapshot.get('logs')
+    if logs is None:
+        raise ValueError("Les journaux de l'exécution d'origine sont nécessaires pour reprendre depuis cet instantané")
+    shipments_rows, wagon_rows = snapshot['log_offsets']
+    if len(logs[0]) < shipments_rows or len(logs[1]) < wagon_rows:
+        raise ValueError(f"Journaux plus courts que l'instantané du jour {snapshot['day']}")
+    saved = snapshot['tracking_vars']
+    sim_state = {key: (value.copy() if isinstance(value, np.ndarray) else value) for key, value in snapshot['sim_state'].items()}
+    tracking_vars = {
+        'total_wagons': saved['total_wagons'],
+        'wagons_available': saved['wagons_available'],
+        'wagons_in_transit': list(saved['wagons_in_transit']),
+        'metrics': {key: (value.copy() if isinstance(value, np.ndarray) else value) for key, value in saved['metrics'].items()},
+        'diagnostics': copy.deepcopy(saved['diagnostics']),
+        'shipments_log': logs[0].copy(0, shipments_rows),
+        'daily_wagon_log': logs[1].copy(0, wagon_rows),
+    }
+    return sim_state, tracking_vars
+
+def save_snapshot(snapshot, path):
+    # Écriture atomique : fichier temporaire puis renommage
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.instantane-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def read_snapshot_file(path):
+    with open(path, 'rb') as f:
+        snapshot = pickle.load(f)
+    if snapshot.get('format') != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Format d'instantané non pris en charge : {path}")
+    return snapshot
+
+def load_snapshot(path):
+    # Instantané d'un point de reprise, avec les journaux jusqu'à son jour reconstitués (snapshot['logs'])
+    snapshot = read_snapshot_file(path)
+    chain = [snapshot]
+    while chain[-1]['previous'] is not None:
+        previous_path = os.path.join(os.path.dirname(os.path.abspath(path)), chain[-1]['previous'])
+        previous = read_snapshot_file(previous_path)
+        if previous['run_id'] != snapshot['run_id']:
+            raise ValueError(f"Point de reprise d'une autre exécution : {previous_path}")
+        chain.append(previous)
+    shipments_log, wagon_log = (log.copy() for log in chain[-1]['new_log_rows'])
+    for part in reversed(chain[:-1]):
+        shipments_log.extend(part['new_log_rows'][0])
+        wagon_log.extend(part['new_log_rows'][1])
+    snapshot = {key: value for key, value in snapshot.items() if key not in ('run_id', 'previous', 'new_log_rows')}
+    snapshot['logs'] = (shipments_log, wagon_log)
+    return snapshot
+
+def snapshot_path(checkpoint_dir, day_t):
+    return os.path.join(checkpoint_dir, f'instantane_jour_{day_t:04d}.pkl')
+
+def snapshot_recorder(heuristic_choice, config, snapshot_days=(), checkpoint_dir=None, snapshots=None):
+    # Fonction on_day_end pour run_simulation : conserve (dict snapshots) et/ou écrit sur disque
+    # l'instantané des jours demandés
+    snapshot_days = set(snapshot_days)
+    if checkpoint_dir is not None:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+    # Point de reprise précédent sur disque : nom du fichier et longueurs des journaux
+    last_checkpoint = {'run_id': uuid.uuid4().hex, 'file': None, 'log_offsets': (0, 0)}
+
+    def on_day_end(day_t, sim_state, tracking_vars):
+        if day_t not in snapshot_days: return
+        snapshot = take_snapshot(day_t, heuristic_choice, sim_state, tracking_vars, config)
+        if snapshots is not None:
+            snapshots[int(day_t)] = snapshot
+        if checkpoint_dir is not None:
+            path = snapshot_path(checkpoint_dir, day_t)
+            new_log_rows = tuple(tracking_vars[name].copy(start, stop) for name, start, stop in
+                                 zip(('shipments_log', 'daily_wagon_log'), last_checkpoint['log_offsets'], snapshot['log_offsets']))
+            save_snapshot(dict(snapshot, run_id=last_checkpoint['run_id'], previous=last_checkpoint['file'],
+                               new_log_rows=new_log_rows), path)
+            last_checkpoint.update(file=os.path.basename(path), log_offsets=snapshot['log_offsets'])
+    return on_day_end
+
+def run_simulation_with_snapshots(heuristic_choice, relations_df, origins_df, destinations_df, qmin_config=None,
+                                  num_initial_wagons_param=50, relation_index=None, config=DEFAULT_CONFIG,
+                                  snapshot_days=(), checkpoint_dir=None, on_day_end=None):
+    # Renvoie les résultats habituels plus results['snapshots'] = {jour: instantané} ; reprise avec logs=run_logs(results)
+    snapshots = {}
+    recorder = snapshot_recorder(heuristic_choice, config, snapshot_days, checkpoint_dir, snapshots)
+    results = run_simulation(heuristic_choice, relations_df, origins_df, destinations_df, qmin_config,
+                             num_initial_wagons_param, relation_index, config, on_day_end=chain_day_hooks(recorder, on_day_end))
+    results['snapshots'] = snapshots
+    return results
+
+def resume_from_snapshot(snapshot, relations_df, origins_df, destinations_df, extra_wagons=0, heuristic_choice=None,
+                         config=None, relation_index=None, on_day_end=None, logs=None):
+    # Reprend la simulation après le jour de l'instantané ; l'instantané et logs ne sont pas modifiés
+    heuristic_choice = heuristic_choice or snapshot['heuristic']
+    config = config or snapshot['config']
+    if heuristic_choice not in DISPATCHERS:
+        raise ValueError(f"Reprise impossible pour l'heuristique {heuristic_choice}")
+    if relation_index is None or relation_index['km_per_day_for_wagon_return'] != config.km_per_day_for_wagon_return:
+        relation_index = build_relation_index(relations_df, origins_df, destinations_df, config)
+    sim_state, tracking_vars = restore_state(snapshot, logs)
+    if tracking_vars['wagons_available'] + extra_wagons < 0:
+        raise ValueError("Pas assez de wagons disponibles pour en retirer autant")
+    tracking_vars['total_wagons'] += extra_wagons
+    tracking_vars['wagons_available'] += extra_wagons
+    if config.collect_diagnostics and tracking_vars['diagnostics'] is None:
+        tracking_vars['diagnostics'] = new_diagnostics()  # compteurs à partir du jour de reprise seulement
+    elif not config.collect_diagnostics:
+        tracking_vars['diagnostics'] = None
+    start = time.perf_counter()
+    day_t = run_event_loop(DISPATCHERS[heuristic_choice], filter_profitable_relations_h1(relation_index), sim_state, tracking_vars,
+                           None, None, config, on_day_end, start_day=snapshot['day'])
+    record_phase_time(tracking_vars['diagnostics'], 'loop', start)
+    return build_results(sim_state, tracking_vars, origins_df, destinations_df, day_t)
+
+def advance_snapshot(snapshot, to_day, relations_df, origins_df, destinations_df, relation_index=None, logs=None):
+    # Instantané à la fin du jour to_day, en rejouant avec les paramètres d'origine les jours qui manquent ;
+    # les journaux rejoués y sont joints (snapshot['logs'])
+    if to_day < snapshot['day']:
+        raise ValueError(f"L'instantané du jour {snapshot['day']} est postérieur au jour {to_day}")
+    if to_day == snapshot['day']:
+        return snapshot if logs is None else dict(snapshot, logs=logs)
+    config = snapshot['config']
+    if relation_index is None or relation_index['km_per_day_for_wagon_return'] != config.km_per_day_for_wagon_return:
+        relation_index = build_relation_index(relations_df, origins_df, destinations_df, config)
+    sim_state, tracking_vars = restore_state(snapshot, logs)
+    run_event_loop(DISPATCHERS[snapshot['heuristic']], filter_profitable_relations_h1(relation_index), sim_state, tracking_vars,
+                   None, None, replace(config, max_simulation_days=to_day), start_day=snapshot['day'])
+    advanced = take_snapshot(to_day, snapshot['heuristic'], sim_state, tracking_vars, config)
+    advanced['logs'] = (tracking_vars['shipments_log'], tracking_vars['daily_wagon_log'])
+    return advanced
+
+def run_what_if(snapshots, change_day, relations_df, origins_df, destinations_df, extra_wagons=0, heuristic_choice=None,
+                config=None, relation_index=None, logs=None):
+    # Scénario "à partir du jour change_day" : reprise depuis le dernier instantané antérieur,
+    # seuls les jours restants sont simulés ; logs : journaux de l'exécution qui a produit les instantanés
+    earlier_days = [day for day in snapshots if day < change_day]
+    if not earlier_days:
+        raise ValueError(f"Aucun instantané antérieur au jour {change_day}")
+    snapshot = advance_snapshot(snapshots[max(earlier_days)], change_day - 1, relations_df, origins_df, destinations_df,
+                                relation_index, logs)
+    return resume_from_snapshot(snapshot, relations_df, origins_df, destinations_df, extra_wagons, heuristic_choice, config,
+                                relation_index)
@@ -0,0 +1,54 @@
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from simulation_logic import build_relation_index, build_qmin_config, run_simulation, QMIN_SORT_MAP, SimulationConfig
+
+# Balayage de paramètres : chaque combinaison (heuristique, wagons, jours, tri QMIN) est une
+# simulation indépendante, répartie sur un pool de processus.
+
+# Données d'entrée du processus worker, transmises une seule fois par worker (initializer)
+# au lieu d'être sérialisées avec chaque tâche. Les autres modules parallèles (recherche d'ordre
+# QMIN, flotte minimale) passent par worker_pool / worker_inputs.
+_WORKER_DATA = {}
+
+def init_worker(relations_df, origins_df, destinations_df):
+    _WORKER_DATA['relations_df'] = relations_df
+    _WORKER_DATA['origins_df'] = origins_df
+    _WORKER_DATA['destinations_df'] = destinations_df
+    _WORKER_DATA['relation_index'] = build_relation_index(relations_df, origins_df, destinations_df)
+
+def worker_inputs():
+    # (relations_df, origins_df, destinations_df, relation_index) chargés par init_worker dans ce processus
+    return _WORKER_DATA['relations_df'], _WORKER_DATA['origins_df'], _WORKER_DATA['destinations_df'], _WORKER_DATA['relation_index']
+
+def worker_pool(relations_df, origins_df, destinations_df, max_workers=None):
+    # Pool de processus (spawn) dont chaque worker reçoit les données d'entrée une seule fois
+    return ProcessPoolExecutor(max_workers=max_workers or os.cpu_count() or 1, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=init_worker, initargs=(relations_df, origins_df, destinations_df))
+
+def build_sweep_grid(wagons_values, days_values, heuristics=('H1', 'H2'), qmin_choices=tuple(QMIN_SORT_MAP)):
+    return [
+        {'heuristic': heuristic, 'num_wagons': int(num_wagons), 'sim_days': int(sim_days), 'qmin_choice': qmin_choice}
+        for heuristic, num_wagons, sim_days, qmin_choice in itertools.product(heuristics, wagons_values, days_values, qmin_choices)
+    ]
+
+def run_sweep_point(point, qmin_custom_order=""):
+    relations_df, origins_df, destinations_df, relation_index = worker_inputs()
+    config = SimulationConfig(max_simulation_days=point['sim_days'])
+    qmin_config = build_qmin_config(point['heuristic'], point['qmin_choice'], qmin_custom_order, destinations_df, relation_index)
+    results = run_simulation(point['heuristic'], relations_df, origins_df, destinations_df, qmin_config, point['num_wagons'], relation_index, config)
+    return dict(point,
+                profit=float(results['kpis']['profit']),
+                satisfaction_rate=float(results['kpis']['satisfaction_rate']),
+                days_taken=int(results['days_taken_simulation_loop']),
+                num_shipments=int(len(results['shipments_df'])),
+                peak_wagons_in_transit=int(results['final_tracking_vars']['daily_wagon_log'].column('wagons_in_transit').max(initial=0)))
+
+def run_sweep(relations_df, origins_df, destinations_df, points, max_workers=None, qmin_custom_order=""):
+    # Générateur : les résultats sont renvoyés au fur et à mesure qu'ils se terminent
+    with worker_pool(relations_df, origins_df, destinations_df, max_workers) as executor:
+        futures = [executor.submit(run_sweep_point, point, qmin_custom_order) for point in points]
+        for future in as_completed(futures):
+            yield future.result()
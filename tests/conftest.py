@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from input_cache import load_data_from_paths
+from simulation_generator import generate_network
+from simulation_logic import clean_relations_df, clean_origins_df, clean_destinations_df
+
+# Réseaux de test, nettoyés comme à l'import : les fichiers d'exemple du dépôt et un petit réseau
+# synthétique (toujours le même grâce à la graine). Chaque test reçoit ses propres DataFrames.
+
+INPUT_FILES = ('input_relations.csv', 'input_origines.csv', 'input_destination.csv')
+
+@pytest.fixture
+def repo_network():
+    return load_data_from_paths(*(os.path.join(ROOT, name) for name in INPUT_FILES), use_cache=False)
+
+@pytest.fixture
+def small_network():
+    relations_df, origins_df, destinations_df = generate_network(n_nodes=30, seed=1)
+    return clean_relations_df(relations_df), clean_origins_df(origins_df), clean_destinations_df(destinations_df)
@@ -0,0 +1,56 @@
+import json
+import random
+
+import pytest
+
+from cipher_stream import vigenere_file, rail_fence_file, vigenere_stream, main
+from vigenere_core import chiffrer_vigenere, dechiffrer_vigenere
+from rail_fence_core import rail_fence_encrypt
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz .,\néàç🙂"
+
+@pytest.fixture
+def text():
+    rng = random.Random(0)
+    return ''.join(rng.choice(ALPHABET) for _ in range(5000))
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 4096])
+def test_chunked_vigenere_equals_in_memory(tmp_path, text, chunk_size):
+    source, encrypted, decrypted = tmp_path / 'clair.txt', tmp_path / 'chiffre.txt', tmp_path / 'dechiffre.txt'
+    source.write_text(text, encoding='utf-8', newline='')
+    assert vigenere_file(str(source), str(encrypted), 'LEMON', encoding='utf-8', chunk_size=chunk_size) == len(text)
+    assert encrypted.read_bytes().decode('utf-8') == chiffrer_vigenere(text, 'LEMON')
+    vigenere_file(str(encrypted), str(decrypted), 'LEMON', decrypt=True, encoding='utf-8', chunk_size=chunk_size)
+    assert decrypted.read_bytes().decode('utf-8') == dechiffrer_vigenere(chiffrer_vigenere(text, 'LEMON'), 'LEMON')
+    # Sans encodage : octet par octet, lettres ASCII seules
+    data = source.read_bytes()
+    vigenere_file(str(source), str(encrypted), 'LEMON', chunk_size=chunk_size)
+    assert encrypted.read_bytes() == b''.join(vigenere_stream([data], 'LEMON'))
+
+@pytest.mark.parametrize('k', [2, 5])
+@pytest.mark.parametrize('chunk_size', [1, 13, 1 << 20])
+def test_chunked_rail_fence_equals_in_memory(tmp_path, k, chunk_size):
+    data = random.Random(k).randbytes(3001)
+    source, encrypted, decrypted = tmp_path / 'clair.bin', tmp_path / 'chiffre.bin', tmp_path / 'dechiffre.bin'
+    source.write_bytes(data)
+    assert rail_fence_file(str(source), str(encrypted), k, chunk_size=chunk_size) == len(data)
+    assert encrypted.read_bytes() == rail_fence_encrypt(data, k)
+    rail_fence_file(str(encrypted), str(decrypted), k, decrypt=True, chunk_size=chunk_size)
+    assert decrypted.read_bytes() == data
+
+def test_empty_file_and_same_file_rejected(tmp_path):
+    empty = tmp_path / 'vide.bin'
+    empty.write_bytes(b'')
+    assert rail_fence_file(str(empty), str(tmp_path / 'sortie.bin'), 3) == 0
+    assert (tmp_path / 'sortie.bin').read_bytes() == b''
+    with pytest.raises(ValueError):
+        vigenere_file(str(empty), str(empty), 'CLE')
+
+def test_command_line(tmp_path, capsys):
+    source, target = tmp_path / 'message.txt', tmp_path / 'message.chiffre'
+    source.write_text("ATTAQUE A L'AUBE", encoding='ascii')
+    assert main(['vigenere', 'chiffrer', str(source), str(target), '--cle', 'LEMON', '--taille-bloc', '4']) == 0
+    assert json.loads(capsys.readouterr().out)['unites'] == 16
+    assert target.read_text(encoding='ascii') == chiffrer_vigenere("ATTAQUE A L'AUBE", 'LEMON')
+    with pytest.raises(SystemExit):
+        main(['rail-fence', 'chiffrer', str(source), str(target)])
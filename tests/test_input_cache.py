@@ -0,0 +1,45 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+
+from conftest import ROOT, INPUT_FILES
+from input_cache import load_data_from_paths, write_cache, read_cache, cache_dir_for
+
+def copy_inputs(tmp_path):
+    paths = [str(tmp_path / name) for name in INPUT_FILES]
+    for name, path in zip(INPUT_FILES, paths):
+        shutil.copy(os.path.join(ROOT, name), path)
+    with open(paths[0], 'a', encoding='utf-8') as f:
+        f.write('AGHA PORT,BLIDA,pas un nombre,1\n')  # ligne rejetée au nettoyage
+    return paths
+
+def test_cached_load_equals_fresh_load(tmp_path):
+    paths = copy_inputs(tmp_path)
+    fresh_rejected, first_rejected, cached_rejected = [], [], []
+    fresh = load_data_from_paths(*paths, use_cache=False, rejected_rows=fresh_rejected)
+    load_data_from_paths(*paths, rejected_rows=first_rejected)
+    assert all(os.path.isdir(cache_dir_for(path)) for path in paths)
+    cached = load_data_from_paths(*paths, rejected_rows=cached_rejected)
+    for expected, df in zip(fresh, cached):
+        tm.assert_frame_equal(df, expected)
+    assert fresh_rejected and first_rejected == fresh_rejected
+    assert [row['ligne'] for row in cached_rejected] == [row['ligne'] for row in fresh_rejected]
+
+def test_text_column_with_missing_values(tmp_path):
+    source = tmp_path / 'source.csv'
+    source.write_text('x\n')
+    df = pd.DataFrame({'name': pd.array(['a', None, 'b', 'a'], dtype='str'),
+                       'label': np.array(['x', None, 'x', 'y'], dtype=object),
+                       'value': [1.0, 2.0, 3.0, 4.0]})
+    write_cache(df, str(source))
+    tm.assert_frame_equal(read_cache(str(source)), df)
+
+def test_stale_cache_ignored(tmp_path):
+    source = tmp_path / 'source.csv'
+    source.write_text('x\n')
+    write_cache(pd.DataFrame({'value': [1.0]}), str(source))
+    source.write_text('xy\n')
+    assert read_cache(str(source)) is None
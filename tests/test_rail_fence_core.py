@@ -0,0 +1,91 @@
+import random
+
+import numpy as np
+import pytest
+
+from rail_fence_core import rail_fence_encrypt, rail_fence_decrypt, rail_fence_block, rail_offsets, text_codes
+
+# Boucles d'origine de rail_fence2.py, référence du calcul par positions
+
+def rail_fence_encrypt_reference(plaintext, k):
+    rails = [''] * k
+    direction = 1  # 1 signifie descendre, -1 signifie remonter
+    rail_index = 0
+
+    for char in plaintext:
+        rails[rail_index] += char
+        if rail_index == 0:
+            direction = 1
+        elif rail_index == k - 1:
+            direction = -1
+        rail_index += direction
+
+    return ''.join(rails)
+
+def rail_fence_decrypt_reference(ciphertext, k):
+    rails = [''] * k
+    direction = 1
+    rail_index = 0
+    rail_lengths = [0] * k
+
+    for char in ciphertext:
+        rail_lengths[rail_index] += 1
+        if rail_index == 0:
+            direction = 1
+        elif rail_index == k - 1:
+            direction = -1
+        rail_index += direction
+
+    index = 0
+    for i in range(k):
+        rails[i] = ciphertext[index:index + rail_lengths[i]]
+        index += rail_lengths[i]
+
+    result = []
+    rail_index = 0
+    direction = 1
+
+    for _ in range(len(ciphertext)):
+        result.append(rails[rail_index][0])
+        rails[rail_index] = rails[rail_index][1:]
+        if rail_index == 0:
+            direction = 1
+        elif rail_index == k - 1:
+            direction = -1
+        rail_index += direction
+
+    return ''.join(result)
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ éàç🙂0123"
+
+@pytest.mark.parametrize('k', [2, 3, 4, 5, 9])
+def test_matches_original_loops(k):
+    rng = random.Random(k)
+    for size in list(range(0, 3 * k)) + [97, 1000]:
+        text = ''.join(rng.choice(ALPHABET) for _ in range(size))
+        ciphertext = rail_fence_encrypt(text, k)
+        assert ciphertext == rail_fence_encrypt_reference(text, k)
+        assert rail_fence_decrypt(ciphertext, k) == rail_fence_decrypt_reference(ciphertext, k) == text
+
+def test_one_rail_and_more_rails_than_characters():
+    assert rail_fence_encrypt("ABC", 1) == rail_fence_decrypt("ABC", 1) == "ABC"
+    assert rail_fence_encrypt("ABC", 10) == "ABC"
+    assert rail_fence_encrypt(b"WEAREDISCOVERED", 3) == rail_fence_encrypt_reference("WEAREDISCOVERED", 3).encode()
+    with pytest.raises(ValueError):
+        rail_fence_encrypt("ABC", 0)
+
+@pytest.mark.parametrize('k', [2, 3, 6])
+def test_blocks_of_any_size_compose(k):
+    rng = random.Random(0)
+    text = ''.join(rng.choice(ALPHABET) for _ in range(503))
+    codes, restore = text_codes(text)
+    offsets = rail_offsets(len(codes), k)
+    for chunk in (1, 7, 2 * (k - 1), 100):
+        ciphertext = np.empty_like(codes)
+        for start in range(0, len(codes), chunk):
+            rail_fence_block(codes, ciphertext, start, min(len(codes), start + chunk), k, offsets)
+        assert restore(ciphertext) == rail_fence_encrypt_reference(text, k)
+        plaintext = np.empty_like(codes)
+        for start in range(0, len(codes), chunk):
+            rail_fence_block(plaintext, ciphertext, start, min(len(codes), start + chunk), k, offsets, decrypt=True)
+        assert restore(plaintext) == text
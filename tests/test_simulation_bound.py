@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from simulation_bound import run_simulation_lp, build_bound_problem, solve_lp, _network_max
+from simulation_logic import run_simulation_h1, run_simulation_h2, build_relation_index, SimulationConfig
+
+def small_problem(fleet_wagon_days):
+    # 2 origines x 2 destinations ; optimum sans flotte : 30, 70, 50, 0 (profit 1050)
+    return {
+        'origin_idx': np.array([0, 0, 1, 1]),
+        'dest_idx': np.array([0, 1, 0, 1]),
+        'origin_limit': np.array([100.0, 50.0]),
+        'dest_limit': np.array([80.0, 80.0]),
+        'fleet_weight': np.array([2.0, 1.0, 2.0, 1.0]),
+        'fleet_wagon_days': fleet_wagon_days,
+    }
+
+@pytest.mark.parametrize('fleet, expected', [(1e9, 1050.0), (200.0, 960.0), (100.0, 500.0), (0.0, 0.0)])
+def test_network_simplex_optimum(fleet, expected):
+    problem = small_problem(fleet)
+    x, objective = _network_max(np.array([10.0, 5.0, 8.0, 1.0]), problem)
+    assert objective == pytest.approx(expected)
+    assert (x >= 0).all()
+    assert problem['fleet_weight'] @ x <= fleet + 1e-6
+    assert (np.bincount(problem['origin_idx'], x, 2) <= problem['origin_limit'] + 1e-6).all()
+    assert (np.bincount(problem['dest_idx'], x, 2) <= problem['dest_limit'] + 1e-6).all()
+
+@pytest.mark.parametrize('num_wagons', [20, 500])
+def test_bound_dominates_heuristics(small_network, num_wagons):
+    config = SimulationConfig(max_simulation_days=90)
+    relation_index = build_relation_index(*small_network, config)
+    lp = run_simulation_lp(*small_network, None, num_wagons, relation_index, config)
+    for run in (run_simulation_h1, run_simulation_h2):
+        results = run(*small_network, None, num_wagons, relation_index, config)
+        assert lp['bounds']['profit_bound'] >= results['profit'] * (1 - 1e-9)
+        assert lp['bounds']['satisfaction_bound'] >= results['kpis']['satisfaction_rate'] - 1e-9
+    assert lp['profit'] == pytest.approx(lp['bounds']['profit_bound'])
+
+def test_highs_and_network_simplex_agree(repo_network):
+    pytest.importorskip('scipy')
+    relations_df, origins_df, destinations_df = repo_network
+    relation_index = build_relation_index(relations_df, origins_df, destinations_df)
+    problem = build_bound_problem(relation_index, origins_df, destinations_df, 50)
+    _, highs_objective, solver = solve_lp(relation_index['distance_km'], problem)
+    assert solver == 'highs'
+    assert _network_max(relation_index['distance_km'], problem)[1] == pytest.approx(highs_objective)
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from simulation_cache import hash_input_files, estimate_result_size, LRUResultCache
+from simulation_logic import SimulationConfig
+from simulation_snapshot import run_simulation_with_snapshots
+
+def test_hash_depends_on_content_and_boundaries():
+    assert hash_input_files([b'ab', b'c']) == hash_input_files([b'ab', b'c'])
+    assert hash_input_files([b'ab', b'c']) != hash_input_files([b'a', b'bc'])
+    assert hash_input_files([b'ab', b'c']) != hash_input_files([b'ab', b'd'])
+
+def test_least_recently_used_entry_evicted():
+    cache = LRUResultCache(max_entries=2)
+    cache.put('a', {'profit': 1})
+    cache.put('b', {'profit': 2})
+    assert cache.get('a') == {'profit': 1}  # 'a' devient la plus récente
+    cache.put('c', {'profit': 3})
+    assert 'b' not in cache and 'a' in cache and 'c' in cache
+    assert cache.get('b') is None
+
+def test_memory_bound_keeps_newest_entry():
+    big = {'shipments_df': pd.DataFrame({'x': range(10000)})}
+    cache = LRUResultCache(max_bytes=1000)
+    cache.put('a', {'profit': 1})
+    cache.put('b', big)
+    assert len(cache) == 1 and cache.get('b') is big
+    cache.put('b', {'profit': 2})
+    assert cache.total_bytes == 0
+
+def test_snapshots_count_towards_memory_bound(small_network):
+    config = SimulationConfig(max_simulation_days=120)
+    results = run_simulation_with_snapshots('H1', *small_network, None, 20, config=config, snapshot_days=range(1, 120))
+    without_snapshots = estimate_result_size({key: value for key, value in results.items() if key != 'snapshots'})
+    assert estimate_result_size(results) > 2 * without_snapshots
+    # Deux résultats sans instantanés tiendraient dans le cache : avec, le plus ancien est évincé
+    cache = LRUResultCache(max_bytes=3 * without_snapshots)
+    cache.put('a', results)
+    cache.put('b', dict(results))
+    assert 'a' not in cache and cache.get('b') is not None
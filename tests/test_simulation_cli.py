@@ -0,0 +1,37 @@
+import json
+import os
+
+import pytest
+
+from conftest import ROOT, INPUT_FILES
+from simulation_cli import main
+from simulation_logic import run_simulation, build_relation_index, build_qmin_config, SimulationConfig
+
+def cli_args(output_dir, *extra):
+    relations, origins, destinations = (os.path.join(ROOT, name) for name in INPUT_FILES)
+    return ['--relations', relations, '--origines', origins, '--destinations', destinations, '--wagons', '200',
+            '--jours', '60', '--sans-cache', '--sortie', str(output_dir), *extra]
+
+@pytest.mark.parametrize('heuristic', ['H1', 'H2'])
+def test_batch_run_matches_library_run(repo_network, tmp_path, capsys, heuristic):
+    assert main(cli_args(tmp_path, '--heuristique', heuristic)) == 0
+    with open(tmp_path / 'resume.json', encoding='utf-8') as f:
+        summary = json.load(f)
+    assert json.loads(capsys.readouterr().out) == summary
+    relations_df, origins_df, destinations_df = repo_network
+    relation_index = build_relation_index(relations_df, origins_df, destinations_df)
+    qmin_config = build_qmin_config(heuristic, "QMIN Décroissant", "", destinations_df, relation_index)
+    results = run_simulation(heuristic, relations_df, origins_df, destinations_df, qmin_config, 200, relation_index,
+                             SimulationConfig(max_simulation_days=60))
+    assert summary['profit'] == pytest.approx(results['profit'])
+    assert summary['num_shipments'] == len(results['shipments_df'])
+    for name in ('expeditions.csv', 'log_wagons.csv', 'origines_finales.csv', 'destinations_finales.csv'):
+        assert (tmp_path / name).exists()
+
+def test_streamed_logs_and_diagnostics(tmp_path):
+    main(cli_args(tmp_path, '--journaux-en-continu', '--diagnostics'))
+    with open(tmp_path / 'resume.json', encoding='utf-8') as f:
+        summary = json.load(f)
+    assert 'load' in summary['diagnostics']['timings_s']
+    assert (tmp_path / 'utilisation_flotte.csv').exists()
+    assert (tmp_path / 'expeditions.csv').exists()
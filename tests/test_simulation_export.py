@@ -0,0 +1,39 @@
+import io
+import zipfile
+
+import pandas as pd
+import pandas.testing as tm
+import pytest
+
+import simulation_export
+from simulation_export import export_parquet, export_parquet_zip, excel_bytes, results_summary
+from simulation_logic import run_simulation_h1, SimulationConfig
+
+@pytest.fixture
+def results(small_network):
+    return run_simulation_h1(*small_network, None, 20, config=SimulationConfig(max_simulation_days=60))
+
+def expected_tables(results):
+    return {'expeditions': results['shipments_df'],
+            'log_wagons': results['final_tracking_vars']['daily_wagon_log'].to_dataframe(),
+            'origines_finales': results['final_origins_df'].reset_index(),
+            'destinations_finales': results['final_destinations_df'].reset_index()}
+
+def test_chunked_parquet_export_equals_tables(results, tmp_path):
+    pytest.importorskip('pyarrow')
+    paths = export_parquet(results, str(tmp_path), chunk_rows=7)
+    assert pd.read_parquet(paths[0]).iloc[0].to_dict() == pytest.approx(results_summary(results))
+    for name, expected in expected_tables(results).items():
+        tm.assert_frame_equal(pd.read_parquet(tmp_path / f'{name}.parquet'), expected, check_dtype=False)
+    with zipfile.ZipFile(io.BytesIO(export_parquet_zip(results, chunk_rows=7))) as archive:
+        assert sorted(archive.namelist()) == sorted(f'{name}.parquet' for name in ['resume', *expected_tables(results)])
+
+def test_excel_sheets_split_at_row_limit(results, monkeypatch):
+    pytest.importorskip('openpyxl')
+    monkeypatch.setattr(simulation_export, 'EXCEL_MAX_ROWS', 21)  # 20 lignes + en-tête par feuille
+    sheets = pd.read_excel(io.BytesIO(excel_bytes(results, chunk_rows=7)), sheet_name=None)
+    wagon_sheets = [name for name in sheets if name.startswith("Wagons")]
+    assert wagon_sheets == ["Wagons", "Wagons (2)", "Wagons (3)"]
+    wagons = pd.concat([sheets[name] for name in wagon_sheets], ignore_index=True)
+    tm.assert_frame_equal(wagons, expected_tables(results)['log_wagons'], check_dtype=False)
+    assert dict(zip(sheets["Résumé"]["Indicateur"], sheets["Résumé"]["Valeur"]))['num_shipments'] == len(results['shipments_df'])
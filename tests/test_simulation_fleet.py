@@ -0,0 +1,26 @@
+from simulation_fleet import find_minimum_fleet, bracket, candidate_fleets
+from simulation_logic import run_simulation, SimulationConfig
+
+def satisfaction(network, num_wagons, sim_days):
+    results = run_simulation('H1', *network, None, num_wagons, None, SimulationConfig(max_simulation_days=sim_days))
+    return results['kpis']['satisfaction_rate']
+
+def test_bracket_and_candidates_stay_inside():
+    evaluated = {10: {'satisfaction_rate': 20.0}, 40: {'satisfaction_rate': 50.0}, 80: {'satisfaction_rate': 70.0}}
+    assert bracket(evaluated, 45.0) == (10, 40)
+    assert bracket(evaluated, 90.0) == (80, None)
+    for use_estimates in (True, False):
+        candidates = candidate_fleets(evaluated, 45.0, 10, 40, 4, use_estimates)
+        assert candidates and all(10 < wagons < 40 for wagons in candidates)
+
+def test_minimum_fleet_reaches_target_and_one_less_does_not(small_network):
+    target = 0.9 * satisfaction(small_network, 30, 60)
+    states = list(find_minimum_fleet(*small_network, target, sim_days=60, max_wagons=60, batch_size=3, max_workers=2))
+    minimum = states[-1]['minimum_wagons']
+    assert states[-1]['done'] and minimum is not None
+    assert satisfaction(small_network, minimum, 60) >= target
+    assert satisfaction(small_network, minimum - 1, 60) < target
+
+def test_unreachable_target(small_network):
+    final = list(find_minimum_fleet(*small_network, 101.0, sim_days=30, max_wagons=20, batch_size=2, max_workers=2))[-1]
+    assert final['done'] and final['minimum_wagons'] is None
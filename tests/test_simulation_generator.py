@@ -0,0 +1,49 @@
+import pandas.testing as tm
+
+from input_cache import load_data_from_paths
+from simulation_generator import generate_network, write_network, parse_args, distribution_params, DEFAULT_DISTRIBUTIONS
+from simulation_benchmark import benchmark_scale, PHASES
+
+def test_same_seed_same_network():
+    first, second = generate_network(200, seed=7), generate_network(200, seed=7)
+    for a, b in zip(first, second):
+        tm.assert_frame_equal(a, b)
+    assert not generate_network(200, seed=8)[0].equals(first[0])
+
+def test_network_is_consistent():
+    relations_df, origins_df, destinations_df = generate_network(300, origins_per_destination=4, seed=2)
+    assert len(origins_df) + len(destinations_df) == 300
+    assert len(relations_df) == 4 * len(destinations_df)
+    assert set(relations_df['origin']) <= set(origins_df['id'])
+    assert set(relations_df['destination']) == set(destinations_df['id'])
+    assert not relations_df.duplicated(['origin', 'destination']).any()
+    # Chaque destination a au moins une relation rentable (vers l'origine la plus proche)
+    assert relations_df.groupby('destination')['profitability'].max().eq(1).all()
+
+def test_distribution_parameters():
+    # Options par défaut = défauts de generate_network ; les paramètres des lois changent bien le réseau
+    args = parse_args(['--sortie', 'x'])
+    assert distribution_params(args) == DEFAULT_DISTRIBUTIONS
+    default = generate_network(200, seed=4)
+    for a, b in zip(default, generate_network(200, seed=4, **distribution_params(args))):
+        tm.assert_frame_equal(a, b)
+    args = parse_args(['--sortie', 'x', '--demande-moyenne', '200000', '--demande-sigma', '0', '--chargement-moyen', '2000'])
+    _, origins_df, destinations_df = generate_network(200, seed=4, **distribution_params(args))
+    assert destinations_df['annual_demand_tons'].eq(200_000).all()
+    assert origins_df['daily_loading_capacity_tons'].mean() > 2 * default[1]['daily_loading_capacity_tons'].mean()
+
+def test_written_network_loads_without_rejected_rows(tmp_path):
+    network = generate_network(50, seed=3)
+    rejected_rows = []
+    loaded = load_data_from_paths(*write_network(str(tmp_path), *network), use_cache=False, rejected_rows=rejected_rows)
+    assert rejected_rows == []
+    assert [len(df) for df in loaded] == [len(df) for df in network]
+
+def test_benchmark_reports_every_phase():
+    rows = benchmark_scale(20, sim_days=30, trace_memory=False)
+    assert [row['heuristic'] for row in rows] == ['H1', 'H2']
+    for row in rows:
+        assert set(row['wall_s']) == set(PHASES) and row['shipments'] > 0
+        assert row['network'] == dict(DEFAULT_DISTRIBUTIONS, origins_per_destination=5, seed=0)
+    rows = benchmark_scale(20, heuristics=('H1',), sim_days=30, trace_memory=False, distributions={'demand_sigma': 0.2})
+    assert rows[0]['network']['demand_sigma'] == 0.2
@@ -0,0 +1,29 @@
+import queue
+import threading
+
+import pytest
+
+from simulation_jobs import SimulationJobRunner, SimulationCancelled, run_simulation_job, poll_job
+from simulation_logic import run_simulation, SimulationConfig
+
+def test_background_job_matches_direct_run_and_reports_progress(small_network):
+    config = SimulationConfig(max_simulation_days=40)
+    runner = SimulationJobRunner(max_workers=1)
+    try:
+        job = runner.submit('H1', *small_network, None, 20, None, config)
+        results = job['future'].result(timeout=120)
+        progress = poll_job(job)
+    finally:
+        runner.shutdown()
+    assert [entry['day'] for entry in progress] == list(range(1, 41))
+    expected = run_simulation('H1', *small_network, None, 20, None, config)
+    assert results['profit'] == pytest.approx(expected['profit'])
+    assert progress[-1]['tons_delivered'] == pytest.approx(expected['kpis']['tons_delivered'])
+
+def test_cancelled_job_stops_at_end_of_day(small_network):
+    progress_queue, cancel_event = queue.Queue(), threading.Event()
+    cancel_event.set()
+    with pytest.raises(SimulationCancelled, match="jour 1"):
+        run_simulation_job('H2', *small_network, None, 20, None, SimulationConfig(max_simulation_days=40), (),
+                           progress_queue, cancel_event)
+    assert progress_queue.empty()
@@ -0,0 +1,132 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+import pytest
+
+from conftest import ROOT
+from simulation_logic import (
+    run_simulation, run_simulation_h1, run_simulation_h2, build_relation_index, build_qmin_config, SimulationConfig,
+    parse_numeric_column, clean_relations_df
+)
+
+RUNNERS = {'H1': run_simulation_h1, 'H2': run_simulation_h2}
+
+# Expéditions de la phase QMIN produites par l'algorithme d'origine (pandas, commit de référence)
+# sur les fichiers d'exemple nettoyés, pour chaque heuristique, tri QMIN et taille de flotte
+GOLDEN_QMIN_SHIPMENTS = os.path.join(ROOT, 'tests', 'data', 'golden_qmin_shipments.csv')
+GOLDEN_CUSTOM_ORDER = ("TOUGGOURT, TABIA, SBA, RELIZANE, OUED TLÉLAT, OUMACHE, OUED RHIOU, M'DAOUROUCHE, KHROUB, GUIDJEL, "
+                       "CHLEF, BOUIRA, BLIDA, BECHAR, AIN YAGOUT, AIN TASSERA")
+
+def test_qmin_shipments_match_original_algorithm(repo_network):
+    golden = pd.read_csv(GOLDEN_QMIN_SHIPMENTS)
+    relation_index = build_relation_index(*repo_network)
+    for (heuristic, qmin_choice, num_wagons), expected in golden.groupby(['heuristic', 'qmin_choice', 'num_wagons'], sort=False):
+        qmin_config = build_qmin_config(heuristic, qmin_choice, GOLDEN_CUSTOM_ORDER, repo_network[2], relation_index)
+        results = run_simulation(heuristic, *repo_network, qmin_config, num_wagons, relation_index,
+                                 SimulationConfig(max_simulation_days=1))
+        shipments = results['shipments_df']
+        shipments = shipments[shipments['type'] != 'Standard'].reset_index(drop=True)
+        expected = expected.drop(columns=['heuristic', 'qmin_choice', 'num_wagons']).reset_index(drop=True)
+        tm.assert_frame_equal(shipments, expected, check_dtype=False, obj=f"{heuristic} / {qmin_choice} / {num_wagons} wagons")
+
+@pytest.mark.parametrize('heuristic', RUNNERS)
+def test_idle_days_logged_to_horizon_when_candidates_run_out(repo_network, heuristic):
+    # Demande épuisée dès les premiers jours : la boucle va quand même jusqu'au bout de l'horizon
+    relations_df, origins_df, destinations_df = repo_network
+    destinations_df['annual_demand_tons'] = destinations_df['annual_demand_tons'].clip(upper=500)
+    days = []
+    results = RUNNERS[heuristic](relations_df, origins_df, destinations_df, None, 5000,
+                                 config=SimulationConfig(max_simulation_days=365),
+                                 on_day_end=lambda day_t, sim_state, tracking_vars: days.append(day_t))
+    wagon_log = results['final_tracking_vars']['daily_wagon_log'].to_dataframe()
+    assert results['days_taken_simulation_loop'] == 365
+    assert len(wagon_log) == 365
+    assert days == list(range(1, 366))
+    assert wagon_log.iloc[-1]['wagons_available'] == 5000
+
+@pytest.mark.parametrize('heuristic', RUNNERS)
+def test_one_wagon_log_row_per_day(small_network, heuristic):
+    results = RUNNERS[heuristic](*small_network, None, 20, config=SimulationConfig(max_simulation_days=60))
+    wagon_log = results['final_tracking_vars']['daily_wagon_log'].to_dataframe()
+    assert results['days_taken_simulation_loop'] == 60
+    assert wagon_log['day'].tolist() == list(range(1, 61))
+    assert (wagon_log['wagons_available'] + wagon_log['wagons_in_transit'] == 20).all()
+
+@pytest.mark.parametrize('heuristic', RUNNERS)
+def test_setup_timed_apart_from_qmin(small_network, heuristic):
+    config = SimulationConfig(max_simulation_days=30, collect_diagnostics=True)
+    results = RUNNERS[heuristic](*small_network, None, 20, config=config)
+    timings = results['final_tracking_vars']['diagnostics']['timings_s']
+    assert {'init', 'qmin', 'loop', 'kpi'} <= set(timings)
+
+def reference_relations(relations_df, origins_df, dest_id):
+    # Relations d'une destination comme dans le code d'origine : filtre puis jointure sur les origines connues
+    relations_df = relations_df.reset_index(drop=True)
+    return relations_df[relations_df['destination'] == dest_id].merge(origins_df[[]], left_on='origin', right_index=True)
+
+@pytest.mark.parametrize('network', ['repo_network', 'small_network'])
+def test_relation_index_matches_filter_and_merge(request, network):
+    relations_df, origins_df, destinations_df = request.getfixturevalue(network)
+    # Relations vers une origine ou une destination inconnue : ignorées des deux côtés
+    relations_df = pd.concat([relations_df, pd.DataFrame({'origin': ['INCONNUE', origins_df.index[0]],
+                                                          'destination': [destinations_df.index[0], 'INCONNUE'],
+                                                          'distance_km': [10, 10], 'profitability': [1, 1]})],
+                             ignore_index=True)
+    relation_index = build_relation_index(relations_df, origins_df, destinations_df)
+    origin_ids = origins_df.index.to_numpy()
+    for j, dest_id in enumerate(destinations_df.index):
+        expected = reference_relations(relations_df, origins_df, dest_id)
+        positions = slice(relation_index['dest_ptr'][j], relation_index['dest_ptr'][j + 1])
+        assert relation_index['row'][positions].tolist() == expected.index.tolist()
+        assert origin_ids[relation_index['origin_idx'][positions]].tolist() == expected['origin'].tolist()
+        assert relation_index['distance_km'][positions].tolist() == expected['distance_km'].astype(float).tolist()
+        assert relation_index['profitable'][positions].tolist() == expected['profitability'].eq(1).tolist()
+        assert relation_index['min_distance_km'][j] == (expected['distance_km'].min() if len(expected) else np.inf)
+    assert relation_index['dest_ptr'][-1] == len(relations_df) - 2
+
+@pytest.mark.parametrize('heuristic', RUNNERS)
+def test_concurrent_runs_equal_sequential_runs(repo_network, heuristic):
+    # Simulations lancées en parallèle dans des threads, index des relations partagé : aucun état commun modifié
+    relation_index = build_relation_index(*repo_network)
+    config = SimulationConfig(max_simulation_days=120)
+    fleets = [50, 200, 500, 1000]
+
+    def run(num_wagons):
+        return run_simulation(heuristic, *repo_network, None, num_wagons, relation_index, config)
+    sequential = [run(num_wagons) for num_wagons in fleets]
+    with ThreadPoolExecutor(max_workers=len(fleets)) as executor:
+        concurrent = list(executor.map(run, fleets))
+    for results, expected in zip(concurrent, sequential):
+        assert results['profit'] == expected['profit']
+        tm.assert_frame_equal(results['shipments_df'], expected['shipments_df'])
+        tm.assert_frame_equal(results['final_destinations_df'], expected['final_destinations_df'])
+
+def test_numeric_formats_parsed_and_bad_cells_reported():
+    values, bad = parse_numeric_column(pd.Series(['1 234', '265 000', '1.234.567', '1.234,5', '1,234.5', '12,5', 'abc', None]))
+    assert values[:6].tolist() == [1234.0, 265000.0, 1234567.0, 1234.5, 1234.5, 12.5]
+    assert bad.tolist() == [False] * 6 + [True, True]
+
+def test_invalid_rows_dropped_with_report():
+    raw = pd.DataFrame({'origin': [' agha  port\n', 'BLIDA', ''], 'destination': ['CHLEF', 'ORAN', 'ORAN'],
+                        'distance_km': ['54', 'x', '10'], 'profitability': ['1', '1', '1']})
+    rejected_rows = []
+    relations_df = clean_relations_df(raw, rejected_rows)
+    assert relations_df['origin'].tolist() == ['AGHA PORT']
+    assert relations_df['profitability'].dtype.kind == 'i'
+    assert [(row['ligne'], row['colonne']) for row in rejected_rows] == [(3, 'origin'), (2, 'distance_km')]
+
+@pytest.mark.parametrize('heuristic', RUNNERS)
+def test_running_kpis_match_shipment_log(small_network, heuristic):
+    relations_df, origins_df, destinations_df = small_network
+    results = RUNNERS[heuristic](relations_df, origins_df, destinations_df, None, 30, config=SimulationConfig(max_simulation_days=90))
+    shipments = results['shipments_df'].merge(relations_df[['origin', 'destination', 'distance_km']], on=['origin', 'destination'])
+    kpis = results['kpis']
+    assert len(shipments) == len(results['shipments_df']) > 0
+    assert kpis['profit'] == pytest.approx((shipments['quantity_tons'] * shipments['distance_km']).sum())
+    assert kpis['tons_delivered'] == pytest.approx(shipments['quantity_tons'].sum())
+    delivered = shipments.groupby('destination')['quantity_tons'].sum().reindex(destinations_df.index, fill_value=0)
+    expected_rate = delivered / destinations_df['annual_demand_tons'] * 100
+    assert kpis['dest_satisfaction_rate'].to_numpy() == pytest.approx(expected_rate.fillna(0).to_numpy())
@@ -0,0 +1,50 @@
+import pandas as pd
+import pandas.testing as tm
+import pytest
+
+from simulation_logs import ColumnarLog
+
+COLUMNS = [('day', 'int64'), ('origin', object), ('tons', 'float64')]
+
+def fill(log, rows=2500):
+    for i in range(rows):
+        log.append(i, f'GARE {i % 7}', i * 0.5)
+    return pd.DataFrame({'day': range(rows), 'origin': [f'GARE {i % 7}' for i in range(rows)],
+                         'tons': [i * 0.5 for i in range(rows)]})
+
+def test_in_memory_log_grows_and_decodes_categories():
+    log = ColumnarLog(COLUMNS, categories={'origin': None}, capacity=4)
+    expected = fill(log)
+    assert len(log) == len(expected)
+    assert log.categories['origin'] == [f'GARE {i}' for i in range(7)]
+    tm.assert_frame_equal(log.to_dataframe(), expected, check_dtype=False)
+    tm.assert_frame_equal(pd.concat(log.iter_chunks(1000), ignore_index=True), expected, check_dtype=False)
+
+@pytest.mark.parametrize('suffix', ['.csv', '.parquet'])
+def test_flushed_log_equals_in_memory_log(tmp_path, suffix):
+    if suffix == '.parquet':
+        pytest.importorskip('pyarrow')
+    log = ColumnarLog(COLUMNS, categories={'origin': None}, capacity=256, flush_path=str(tmp_path / f'log{suffix}'),
+                      flush_rows=256)
+    expected = fill(log)
+    assert log.rows_flushed > 0 and len(log) == len(expected)
+    tm.assert_frame_equal(log.to_dataframe(), expected, check_dtype=False)
+    tm.assert_frame_equal(pd.concat(log.iter_chunks(1000), ignore_index=True), expected, check_dtype=False)
+
+def test_numeric_looking_ids_stay_strings_after_csv_flush(tmp_path):
+    columns = [('day', 'int64'), ('origin', object), ('destination', object), ('tons', 'float64')]
+    log = ColumnarLog(columns, categories={'destination': None}, capacity=16, flush_path=str(tmp_path / 'log.csv'),
+                      flush_rows=16)
+    for i in range(100):
+        log.append(i, f'{i % 3:04d}', f'{i % 5:03d}', float(i))
+    expected = pd.DataFrame({'day': range(100), 'origin': [f'{i % 3:04d}' for i in range(100)],
+                             'destination': [f'{i % 5:03d}' for i in range(100)], 'tons': [float(i) for i in range(100)]})
+    assert log.rows_flushed > 0
+    for df in (log.to_dataframe(), pd.concat(log.iter_chunks(30), ignore_index=True)):
+        tm.assert_frame_equal(df, expected, check_dtype=False)
+        assert df['day'].dtype == 'int64' and df['tons'].dtype == 'float64'
+
+def test_empty_log_written_with_header(tmp_path):
+    log = ColumnarLog(COLUMNS, flush_path=str(tmp_path / 'log.csv'))
+    log.close()
+    assert (tmp_path / 'log.csv').read_text().strip() == 'day,origin,tons'
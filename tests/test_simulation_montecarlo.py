@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from simulation_montecarlo import run_monte_carlo, StochasticConfig
+from simulation_logic import run_simulation_h1, run_simulation_h2, SimulationConfig
+
+RUNNERS = {'H1': run_simulation_h1, 'H2': run_simulation_h2}
+NO_NOISE = StochasticConfig(num_replicas=3, transit_delay_mean_days=0, origin_outage_prob=0, dest_outage_prob=0,
+                            demand_noise_sd=0)
+
+@pytest.mark.parametrize('heuristic', RUNNERS)
+@pytest.mark.parametrize('num_wagons', [15, 200])
+def test_zero_noise_replicas_equal_deterministic_run(small_network, heuristic, num_wagons):
+    config = SimulationConfig(max_simulation_days=90)
+    results = RUNNERS[heuristic](*small_network, None, num_wagons, config=config)
+    replicas = run_monte_carlo(heuristic, *small_network, None, num_wagons, config=config, stochastic_config=NO_NOISE)['replicas']
+    assert replicas['profit'].to_numpy() == pytest.approx(np.full(3, results['profit']))
+    assert replicas['satisfaction_rate'].to_numpy() == pytest.approx(np.full(3, results['kpis']['satisfaction_rate']))
+
+def test_noisy_replicas_differ_and_bands_are_ordered(small_network):
+    summary = run_monte_carlo('H1', *small_network, None, 30, config=SimulationConfig(max_simulation_days=60),
+                              stochastic_config=StochasticConfig(num_replicas=20, seed=3))
+    assert summary['replicas']['profit'].nunique() > 1
+    bands = summary['satisfaction_bands'].to_numpy()
+    assert (np.diff(bands, axis=1) >= 0).all()
@@ -0,0 +1,22 @@
+import numpy as np
+
+from simulation_search import search_qmin_order, neighbour_order, evaluate_order
+from simulation_sweep import init_worker
+
+def test_neighbour_is_a_permutation():
+    rng = np.random.default_rng(0)
+    order = tuple('ABCDEFG')
+    for _ in range(50):
+        neighbour = neighbour_order(order, rng)
+        assert sorted(neighbour) == sorted(order) and neighbour != order
+
+def test_search_never_loses_the_best_order(small_network):
+    states = list(search_qmin_order(*small_network, num_wagons=20, sim_days=60, time_budget_s=60,
+                                    max_evaluations=8, batch_size=4, max_workers=2))
+    final = states[-1]
+    assert final['done'] and final['evaluations'] >= 8
+    assert final['best_score'] >= final['initial_score']
+    assert [state['best_score'] for state in states] == sorted(state['best_score'] for state in states)
+    assert sorted(final['best_order']) == sorted(small_network[2].index)
+    init_worker(*small_network)
+    assert evaluate_order('H1', final['best_order'], 20, 60) == final['best_result']
@@ -0,0 +1,60 @@
+import os
+import pickle
+
+import pandas.testing as tm
+import pytest
+
+from simulation_snapshot import (
+    run_simulation_with_snapshots, resume_from_snapshot, run_what_if, load_snapshot, snapshot_path, run_logs
+)
+from simulation_generator import generate_network
+from simulation_logic import SimulationConfig, clean_relations_df, clean_origins_df, clean_destinations_df
+
+def assert_same_run(results, expected):
+    assert results['days_taken_simulation_loop'] == expected['days_taken_simulation_loop']
+    assert results['profit'] == pytest.approx(expected['profit'])
+    tm.assert_frame_equal(results['shipments_df'], expected['shipments_df'])
+    tm.assert_frame_equal(results['final_tracking_vars']['daily_wagon_log'].to_dataframe(),
+                          expected['final_tracking_vars']['daily_wagon_log'].to_dataframe())
+
+@pytest.mark.parametrize('heuristic', ['H1', 'H2'])
+def test_resume_equals_straight_run(small_network, tmp_path, heuristic):
+    config = SimulationConfig(max_simulation_days=80)
+    straight = run_simulation_with_snapshots(heuristic, *small_network, None, 25, config=config, snapshot_days=[10, 30, 50],
+                                             checkpoint_dir=str(tmp_path))
+    assert sorted(straight['snapshots']) == [10, 30, 50]
+    logs = run_logs(straight)
+    assert_same_run(resume_from_snapshot(straight['snapshots'][30], *small_network, logs=logs), straight)
+    # Point de reprise sur disque : journaux reconstitués à partir des fichiers des jours 10, 30 et 50
+    assert_same_run(resume_from_snapshot(load_snapshot(snapshot_path(str(tmp_path), 50)), *small_network), straight)
+    # Ni l'instantané ni les journaux d'origine ne sont modifiés par une reprise : on peut reprendre deux fois
+    assert_same_run(resume_from_snapshot(straight['snapshots'][30], *small_network, logs=logs), straight)
+    # Scénario sans changement à partir d'un jour sans instantané : jours manquants rejoués
+    assert_same_run(run_what_if(straight['snapshots'], 45, *small_network, logs=logs), straight)
+
+def test_resume_needs_the_run_logs(small_network):
+    straight = run_simulation_with_snapshots('H1', *small_network, None, 10, config=SimulationConfig(max_simulation_days=30),
+                                             snapshot_days=[20])
+    with pytest.raises(ValueError):
+        resume_from_snapshot(straight['snapshots'][20], *small_network)
+
+def test_snapshot_size_independent_of_log_length(tmp_path):
+    relations_df, origins_df, destinations_df = generate_network(200, seed=1)
+    network = clean_relations_df(relations_df), clean_origins_df(origins_df), clean_destinations_df(destinations_df)
+    config = SimulationConfig(max_simulation_days=250)
+    results = run_simulation_with_snapshots('H1', *network, None, 300, config=config, snapshot_days=[5, 245],
+                                            checkpoint_dir=str(tmp_path))
+    early, late = results['snapshots'][5], results['snapshots'][245]
+    assert late['log_offsets'][0] > early['log_offsets'][0] + 1000
+    assert len(pickle.dumps(late)) < len(pickle.dumps(early)) + 2000
+    # Sur disque, chaque point de reprise ne contient que les lignes ajoutées depuis le précédent
+    sizes = [os.path.getsize(snapshot_path(str(tmp_path), day)) for day in (5, 245)]
+    assert sum(sizes) < len(pickle.dumps(run_logs(results))) + 2 * len(pickle.dumps(early))
+
+def test_extra_wagons_applied_from_resume_day(small_network):
+    config = SimulationConfig(max_simulation_days=60)
+    straight = run_simulation_with_snapshots('H1', *small_network, None, 10, config=config, snapshot_days=[20])
+    resumed = resume_from_snapshot(straight['snapshots'][20], *small_network, extra_wagons=40, logs=run_logs(straight))
+    wagon_log = resumed['final_tracking_vars']['daily_wagon_log'].to_dataframe()
+    fleet = wagon_log['wagons_available'] + wagon_log['wagons_in_transit']
+    assert fleet[wagon_log['day'] <= 20].eq(10).all() and fleet[wagon_log['day'] > 20].eq(50).all()
@@ -0,0 +1,13 @@
+from simulation_sweep import build_sweep_grid, run_sweep, run_sweep_point, init_worker
+
+def test_grid_covers_every_combination():
+    grid = build_sweep_grid([10, 20], [30], qmin_choices=("QMIN Décroissant", "QMIN Croissant"))
+    assert len(grid) == 2 * 2 * 1 * 2
+    assert {(p['heuristic'], p['num_wagons']) for p in grid} == {('H1', 10), ('H1', 20), ('H2', 10), ('H2', 20)}
+
+def test_pool_results_match_in_process_runs(small_network):
+    points = build_sweep_grid([10, 40], [45], qmin_choices=("QMIN Décroissant",))
+    pooled = sorted(run_sweep(*small_network, points, max_workers=2), key=lambda r: (r['heuristic'], r['num_wagons']))
+    init_worker(*small_network)
+    expected = sorted((run_sweep_point(point) for point in points), key=lambda r: (r['heuristic'], r['num_wagons']))
+    assert pooled == expected
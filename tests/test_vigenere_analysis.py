@@ -0,0 +1,38 @@
+import os
+import unicodedata
+
+import pytest
+
+from conftest import ROOT
+from vigenere_core import chiffrer_vigenere
+from vigenere_analysis import key_length_candidates, recover_keys, casser_vigenere, KEY_LENGTH_METHODS, KEY_METHODS
+
+def corpus_letters(size, offset=0):
+    with open(os.path.join(ROOT, 'corpus_fr.txt'), encoding='utf-8') as f:
+        text = unicodedata.normalize('NFD', f.read().upper())
+    return ''.join(c for c in text if 'A' <= c <= 'Z')[offset:offset + size]
+
+@pytest.mark.parametrize('method', KEY_LENGTH_METHODS)
+@pytest.mark.parametrize('key', ['CLEF', 'CRYPTANALYSE', 'VIGENEREX'])
+def test_key_length_found(method, key):
+    ciphertext = chiffrer_vigenere(corpus_letters(3000), key)
+    assert key_length_candidates(ciphertext, 20, method)[0][0] == len(key)
+
+@pytest.mark.parametrize('key_method', KEY_METHODS)
+def test_key_recovered_with_confidence(key_method):
+    ciphertext = chiffrer_vigenere(corpus_letters(1500, offset=5000), 'PARAPLUIE')
+    keys = recover_keys(ciphertext, 9, 'fr', top=3, key_method=key_method)
+    assert keys[0][0] == 'PARAPLUIE' and keys[0][2] > 0.99
+    assert len({key for key, _, _ in keys}) == 3
+
+def test_break_returns_key_plaintext_and_candidates():
+    plaintext = corpus_letters(800, offset=12000)
+    key, decrypted, candidates = casser_vigenere(chiffrer_vigenere(plaintext, 'LOGISTIQUE'), 'fr')
+    assert key == 'LOGISTIQUE' and decrypted == plaintext
+    assert candidates['lengths'][0][0] == 10 and candidates['keys'][0][0] == key and candidates['refined'] == []
+
+def test_unknown_language_or_method_rejected():
+    with pytest.raises(ValueError):
+        recover_keys("ABC", 1, 'de')
+    with pytest.raises(ValueError):
+        key_length_candidates("ABC", method='autre')
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+import vigenere_core
+from vigenere_core import chiffrer_vigenere, dechiffrer_vigenere, vigenere_transform
+
+# Boucles d'origine (caractère par caractère), référence du chiffre vectorisé
+
+def chiffrer_vigenere_reference(text, key):
+    key = key.upper()
+    encrypted = []
+    key_len = len(key)
+    for i, char in enumerate(text):
+        if char.isalpha():
+            shift = ord(key[i % key_len]) - ord('A')
+            encrypted_char = chr((ord(char) + shift - ord('A')) % 26 + ord('A'))
+            encrypted.append(encrypted_char)
+        else:
+            encrypted.append(char)
+    return ''.join(encrypted)
+
+def dechiffrer_vigenere_reference(text, key):
+    key = key.upper()
+    decrypted = []
+    key_len = len(key)
+    for i, char in enumerate(text):
+        if char.isalpha():
+            shift = ord(key[i % key_len]) - ord('A')
+            decrypted_char = chr((ord(char) - shift - ord('A')) % 26 + ord('A'))
+            decrypted.append(decrypted_char)
+        else:
+            decrypted.append(char)
+    return ''.join(decrypted)
+
+ASCII_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz .,'!0123456789\n"
+UNICODE_ALPHABET = ASCII_ALPHABET + "éèàçÉœßΩж中  🙂"
+
+def random_text(rng, alphabet, size):
+    return ''.join(rng.choice(alphabet) for _ in range(size))
+
+@pytest.mark.parametrize('alphabet', [ASCII_ALPHABET, UNICODE_ALPHABET])
+@pytest.mark.parametrize('key_len', [1, 3, 7, 40])
+def test_matches_original_loops(alphabet, key_len):
+    rng = random.Random(key_len)
+    for size in (0, 1, 5, 333):
+        text = random_text(rng, alphabet, size)
+        key = random_text(rng, "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz", key_len)
+        assert chiffrer_vigenere(text, key) == chiffrer_vigenere_reference(text, key)
+        assert dechiffrer_vigenere(text, key) == dechiffrer_vigenere_reference(text, key)
+
+def test_long_keys_use_single_table(monkeypatch):
+    monkeypatch.setattr(vigenere_core, 'MAX_COLUMN_KEY_LEN', 4)
+    rng = random.Random(1)
+    text, key = random_text(rng, ASCII_ALPHABET, 500), random_text(rng, "ABCDEFGHIJKLMNOPQRSTUVWXYZ", 9)
+    assert chiffrer_vigenere(text, key) == chiffrer_vigenere_reference(text, key)
+
+def test_bytes_shift_ascii_letters_only():
+    data = "Attaque à l'aube !".encode('utf-8')
+    expected = chiffrer_vigenere_reference(data.decode('latin-1'), 'LEMON')
+    expected = ''.join(c if ord(o) < 128 else o for c, o in zip(expected, data.decode('latin-1')))
+    assert vigenere_transform(data, 'LEMON') == expected.encode('latin-1')
+    assert vigenere_transform(memoryview(bytearray(data)), 'LEMON') == vigenere_transform(data, 'LEMON')
+
+def test_start_continues_the_key():
+    rng = random.Random(2)
+    text = random_text(rng, UNICODE_ALPHABET, 1000)
+    pieces = [text[:333], text[333:334], text[334:]]
+    starts = [0, 333, 334]
+    assert ''.join(vigenere_transform(piece, 'CLEF', start=start) for piece, start in zip(pieces, starts)) == \
+        chiffrer_vigenere(text, 'CLEF')
+
+def test_empty_key_rejected_only_with_letters():
+    assert chiffrer_vigenere("123 !", "") == "123 !"
+    with pytest.raises(ValueError):
+        chiffrer_vigenere("abc", "")
@@ -0,0 +1,48 @@
+import time
+
+import numpy as np
+import pytest
+
+from test_vigenere_analysis import corpus_letters
+from vigenere_core import chiffrer_vigenere
+from vigenere_analysis import recover_keys, casser_vigenere
+import vigenere_quadgrams
+from vigenere_quadgrams import refine_key, refine_candidates, shortest_period, key_layout, quadgram_table
+
+@pytest.mark.parametrize('offset', [0, 3000, 9000, 15000])
+def test_refinement_fixes_short_text_keys(offset):
+    # 150 lettres pour une clé de 10 : le χ² se trompe sur une colonne, l'escalade la corrige
+    plaintext = corpus_letters(150, offset)
+    ciphertext = chiffrer_vigenere(plaintext, 'TRANSPORTS')
+    assert recover_keys(ciphertext, 10, 'fr', top=1)[0][0] != 'TRANSPORTS'
+    assert refine_candidates(ciphertext)[0][0] == 'TRANSPORTS'
+    key, decrypted, candidates = casser_vigenere(ciphertext, 'fr', refine=True)
+    assert key == 'TRANSPORTS' and decrypted == plaintext and candidates['refined'][0][0] == key
+
+def test_refine_key_from_wrong_letters_and_repeated_key():
+    ciphertext = chiffrer_vigenere(corpus_letters(600, 20000), 'GARE')
+    assert refine_key(ciphertext, 'GXRE')[0] == 'GARE'
+    assert refine_key(ciphertext, 'GAREGARE')[0] == 'GARE'
+    assert list(shortest_period(np.array([1, 2, 1, 2, 1, 2]))) == [1, 2]
+
+def test_layout_shared_by_keys_of_same_length(monkeypatch):
+    ciphertext = chiffrer_vigenere(corpus_letters(600, 20000), 'GARE')
+    layout = key_layout(ciphertext, 4)
+    assert refine_key(ciphertext, 'GXRE', layout=layout) == refine_key(ciphertext, 'GXRE')
+    calls = []
+    monkeypatch.setattr(vigenere_quadgrams, 'key_layout', lambda *args: calls.append(args[1]) or key_layout(*args))
+    refine_candidates(ciphertext, lengths=3, keys_per_length=3)
+    assert sorted(calls) == sorted(set(calls)) and len(calls) == 3
+
+def test_refinement_speed():
+    # 9 clés de départ sur un échantillon complet (4096 lettres) : ~40 ms par clé avant le précalcul par colonne,
+    # moins de 10 ms après ; marge large pour les machines lentes
+    ciphertext = chiffrer_vigenere(corpus_letters(5000, 0), 'TRANSPORTS')
+    quadgram_table()
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        refined = refine_candidates(ciphertext)
+        timings.append(time.perf_counter() - start)
+    assert refined[0][0] == 'TRANSPORTS'
+    assert min(timings) < 0.2
@@ -0,0 +1,222 @@
+import numpy as np
+
+from vigenere_core import dechiffrer_vigenere
+
+# Cryptanalyse du chiffre de Vigenère (voir vigenere_core.py) : estimation de la longueur de clé,
+# puis de la clé elle-même.
+# Le texte est converti une fois en indices de lettres (0..25 pour A..Z, majuscules ou minuscules,
+# 26 pour tout autre caractère, qui fait quand même avancer l'indice dans la clé).
+# Trois méthodes, qui renvoient les longueurs candidates classées par score décroissant :
+#   - 'ic' : indice de coïncidence moyen des colonnes (position % k). Tous les histogrammes
+#     colonne × lettre d'une longueur k sont obtenus par un seul np.bincount ;
+#   - 'fft' : taux de coïncidence κ(d) entre lettres distantes de d, pour tous les d à la fois par
+#     autocorrélation (FFT), comparé aux multiples de k et ailleurs ;
+#   - 'kasiski' : distances entre trigrammes répétés ; score = part des distances divisibles par k
+#     moins la part attendue au hasard (1/k).
+# Les multiples de la vraie longueur ont le même indice de coïncidence qu'elle, sur des colonnes plus
+# courtes donc plus bruitées : comparer les indices bruts fait gagner un multiple dès qu'on teste
+# des clés longues. Les méthodes 'ic' et 'fft' notent donc l'écart au hasard en nombre d'écarts-types
+# (p2 = somme des carrés des fréquences des lettres : coïncidence attendue entre lettres sans lien).
+# Au-delà de sample_size caractères, seul le début du texte est analysé : les statistiques sont
+# alors largement assez précises et le coût ne dépend plus de la taille du texte.
+# Clé : pour une longueur donnée, chaque colonne est comparée aux 26 décalages du profil de
+# fréquences de la langue par un test du χ², toutes colonnes et tous décalages en un produit
+# matriciel. Les colonnes sont indépendantes : les N meilleures clés (somme des χ²) s'obtiennent
+# exactement en fusionnant colonne par colonne les N meilleures clés partielles.
+# Autre méthode pour la clé ('ic') : indice de coïncidence mutuel entre chaque colonne et le profil
+# décalé (probabilité qu'une lettre de la colonne et une lettre du profil coïncident), à maximiser.
+# casser_vigenere enchaîne longueur, clé et affinage éventuel par quadrigrammes (vigenere_quadgrams.py).
+
+KEY_LENGTH_METHODS = {'ic': "Indice de coïncidence", 'fft': "Autocorrélation (FFT)", 'kasiski': "Kasiski (trigrammes répétés)"}
+SAMPLE_SIZE = 1 << 17
+NON_LETTER = 26
+
+# Fréquences des lettres A..Z (en %) dans des corpus de référence
+LANGUAGE_PROFILES = {
+    'fr': [7.636, 0.901, 3.260, 3.669, 14.715, 1.066, 0.866, 0.737, 7.529, 0.613, 0.074, 5.456, 2.968,
+           7.095, 5.796, 2.521, 1.362, 6.693, 7.948, 7.244, 6.311, 1.838, 0.049, 0.427, 0.128, 0.326],
+    'en': [8.167, 1.492, 2.782, 4.253, 12.702, 2.228, 2.015, 6.094, 6.966, 0.153, 0.772, 4.025, 2.406,
+           6.749, 7.507, 1.929, 0.095, 5.987, 6.327, 9.056, 2.758, 0.978, 2.360, 0.150, 1.974, 0.074],
+}
+LANGUAGE_NAMES = {'fr': "Français", 'en': "Anglais"}
+KEY_METHODS = {'chi2': "Estimation de la clé avec analyse fréquentielle", 'ic': "Analyse avec l'indice de coïncidence"}
+KEY_SCORE_NAMES = {'chi2': "χ²", 'ic': "IC mutuel"}
+
+def letter_indices(text):
+    if isinstance(text, str):
+        if text.isascii():
+            codes = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+        else:
+            codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+            codes = np.where(codes < 128, codes, 0).astype(np.uint8)
+    else:
+        codes = np.frombuffer(text, dtype=np.uint8)
+    # (c | 0x20) - 97 en uint8 : 0..25 pour les lettres ASCII, au-delà pour le reste
+    folded = ((codes | 0x20) - 97).astype(np.uint8, copy=False)
+    return np.where(folded < 26, folded, NON_LETTER).astype(np.uint8)
+
+def column_histograms(letters, key_len):
+    # Tableau (key_len, 26) : occurrences de chaque lettre dans chaque colonne position % key_len
+    rows = len(letters) // key_len
+    dtype = np.uint16 if 27 * key_len <= np.iinfo(np.uint16).max else np.uint32
+    offsets = np.arange(key_len, dtype=dtype) * 27
+    index = (letters[:rows * key_len].reshape(rows, key_len).astype(dtype) + offsets).ravel()
+    tail = letters[rows * key_len:]
+    index = np.concatenate([index, tail.astype(dtype) + offsets[:len(tail)]])
+    return np.bincount(index, minlength=27 * key_len).reshape(key_len, 27)[:, :NON_LETTER]
+
+def random_coincidence(letters):
+    counts = np.bincount(letters, minlength=NON_LETTER + 1)[:NON_LETTER]
+    total = counts.sum()
+    return float((counts / total) @ (counts / total)) if total else 0.0
+
+def ic_scores(letters, max_len):
+    scores = np.full(max_len, -np.inf)
+    p2 = random_coincidence(letters)
+    for key_len in range(1, max_len + 1):
+        counts = column_histograms(letters, key_len).astype(np.int64)
+        sizes = counts.sum(axis=1)
+        if (sizes <= 1).any():
+            continue  # colonne d'une lettre au plus : indice non défini
+        pairs = sizes * (sizes - 1)
+        ic = np.mean((counts * (counts - 1)).sum(axis=1) / pairs)
+        # Variance de l'indice moyen si les lettres d'une colonne étaient sans lien (paires indépendantes)
+        variance = (2 * p2 * (1 - p2) / pairs).sum() / key_len ** 2
+        scores[key_len - 1] = (ic - p2) / np.sqrt(variance) if variance > 0 else 0.0
+    return scores
+
+def coincidence_rates(letters):
+    # κ(d) pour d = 0..len-1 : paires de lettres identiques à distance d / paires de lettres à distance d
+    size = 1 << int(2 * len(letters) - 1).bit_length()
+    indicators = np.zeros((NON_LETTER + 1, len(letters)), dtype=np.float32)
+    indicators[letters, np.arange(len(letters))] = 1
+    indicators[NON_LETTER] = letters != NON_LETTER
+    spectra = np.fft.rfft(indicators, size, axis=1)
+    power = spectra.real ** 2 + spectra.imag ** 2
+    same = np.fft.irfft(power[:NON_LETTER].sum(axis=0), size)[:len(letters)]
+    pairs = np.fft.irfft(power[NON_LETTER], size)[:len(letters)]
+    pairs = np.rint(pairs)
+    return np.divide(np.rint(same), pairs, out=np.zeros(len(letters)), where=pairs > 0), pairs
+
+def fft_scores(letters, max_len):
+    # Score : κ moyen aux multiples de k moins κ moyen aux autres distances (p2 pour k = 1), rapporté
+    # à l'écart-type de cette moyenne
+    scores = np.full(max_len, -np.inf)
+    # Distances retenues : assez de multiples de chaque longueur, sans aller au-delà de la moitié du
+    # texte où κ repose sur trop peu de paires
+    max_distance = min(len(letters) // 2, 20 * max_len)
+    if max_distance < 1:
+        return scores
+    rates, pairs = coincidence_rates(letters)
+    rates, pairs = rates[1:max_distance + 1], pairs[1:max_distance + 1]
+    p2 = random_coincidence(letters)
+    variances = np.divide(p2 * (1 - p2), pairs, out=np.zeros(len(pairs)), where=pairs > 0)
+    total = rates.sum()
+    for key_len in range(1, min(max_len, max_distance) + 1):
+        multiples = rates[key_len - 1::key_len]
+        others = len(rates) - len(multiples)
+        baseline = (total - multiples.sum()) / others if others else p2
+        variance = variances[key_len - 1::key_len].sum() / len(multiples) ** 2
+        scores[key_len - 1] = (multiples.mean() - baseline) / np.sqrt(variance) if variance > 0 else 0.0
+    return scores
+
+def kasiski_scores(letters, max_len):
+    scores = np.zeros(max_len)
+    codes = letters[:-2].astype(np.int32) * 729 + letters[1:-1].astype(np.int32) * 27 + letters[2:]
+    positions = np.flatnonzero((letters[:-2] != NON_LETTER) & (letters[1:-1] != NON_LETTER) & (letters[2:] != NON_LETTER))
+    if len(positions) < 2:
+        return scores
+    codes = codes[positions]
+    order = np.argsort(codes, kind='stable')
+    repeated = codes[order[1:]] == codes[order[:-1]]
+    distances = (positions[order[1:]] - positions[order[:-1]])[repeated]
+    if len(distances) == 0:
+        return scores
+    # Histogramme des distances : les distances divisibles par k sont hist[k], hist[2k], ...
+    hist = np.bincount(distances)
+    for key_len in range(1, max_len + 1):
+        scores[key_len - 1] = hist[key_len::key_len].sum() / len(distances) - 1 / key_len
+    return scores
+
+SCORERS = {'ic': ic_scores, 'fft': fft_scores, 'kasiski': kasiski_scores}
+
+def key_length_candidates(text, max_len=20, method='ic', sample_size=SAMPLE_SIZE, top=None):
+    # Liste de (longueur, score) triée par score décroissant ; à score égal, la plus courte d'abord
+    if method not in SCORERS:
+        raise ValueError(f"Méthode inconnue : {method}")
+    letters = letter_indices(text)
+    if sample_size:
+        letters = letters[:sample_size]
+    max_len = max(1, int(max_len))
+    scores = SCORERS[method](letters, max_len)
+    order = np.argsort(-scores, kind='stable')
+    ranking = [(int(k) + 1, float(scores[k])) for k in order]
+    return ranking[:top] if top else ranking
+
+def longueur_cle_probable(text, max_len=20, method='ic'):
+    return key_length_candidates(text, max_len, method, top=1)[0][0]
+
+def rotated_profiles(language):
+    # (26 décalages, 26 lettres chiffrées) : fréquence attendue de la lettre chiffrée c si la clé décale de s
+    profile = np.array(LANGUAGE_PROFILES[language], dtype=float)
+    profile /= profile.sum()
+    letters = np.arange(26)
+    return profile[(letters[None, :] - letters[:, None]) % 26]
+
+def shift_chi_squared(counts, language='fr'):
+    # (colonnes, 26 décalages) : Σ (observé - attendu)² / attendu = Σ observé² / attendu - effectif
+    expected = rotated_profiles(language)
+    sizes = counts.sum(axis=1, keepdims=True).astype(float)
+    squares = (counts.astype(float) ** 2) @ (1 / expected).T
+    return np.divide(squares, sizes, out=np.zeros_like(squares), where=sizes > 0) - sizes
+
+def shift_mutual_ic(counts, language='fr'):
+    # (colonnes, 26 décalages) : Σ observé × attendu / effectif
+    sizes = counts.sum(axis=1, keepdims=True).astype(float)
+    products = counts.astype(float) @ rotated_profiles(language).T
+    return np.divide(products, sizes, out=np.zeros_like(products), where=sizes > 0)
+
+def recover_keys(text, key_len, language='fr', top=5, key_method='chi2'):
+    # Liste de (clé, score, confiance), de la meilleure clé à la moins bonne. Score : χ² total
+    # ('chi2', à minimiser) ou indice de coïncidence mutuel moyen des colonnes ('ic', à maximiser).
+    # Confiance : probabilité a posteriori de la clé (vraisemblance multinomiale des colonnes,
+    # décalages équiprobables a priori). Une colonne sans lettre donne 'A'.
+    if language not in LANGUAGE_PROFILES:
+        raise ValueError(f"Langue inconnue : {language}")
+    if key_method not in KEY_METHODS:
+        raise ValueError(f"Méthode inconnue : {key_method}")
+    key_len, top = max(1, int(key_len)), max(1, int(top))
+    counts = column_histograms(letter_indices(text), key_len)
+    # Coût par colonne et par décalage, à minimiser
+    chi2 = shift_chi_squared(counts, language) if key_method == 'chi2' else -shift_mutual_ic(counts, language)
+    log_likelihood = counts.astype(float) @ np.log(rotated_profiles(language)).T
+    log_likelihood -= log_likelihood.max(axis=1, keepdims=True)
+    log_posterior = log_likelihood - np.log(np.exp(log_likelihood).sum(axis=1, keepdims=True))
+    # Fusion colonne par colonne : les N meilleures clés partielles prolongées des 26 décalages
+    totals, log_conf, shifts = np.zeros(1), np.zeros(1), np.zeros((1, 0), dtype=np.int64)
+    for column in range(key_len):
+        candidates = (totals[:, None] + chi2[column]).ravel()
+        best = np.argsort(candidates, kind='stable')[:top]
+        rows, extension = np.divmod(best, 26)
+        totals = candidates[best]
+        log_conf = log_conf[rows] + log_posterior[column, extension]
+        shifts = np.column_stack([shifts[rows], extension])
+    if key_method == 'ic':
+        totals = -totals / key_len
+    return [(''.join(chr(65 + int(s)) for s in key), float(total), float(np.exp(conf)))
+            for key, total, conf in zip(shifts, totals, log_conf)]
+
+def estimer_cle(text, key_len, language='fr', key_method='chi2'):
+    return recover_keys(text, key_len, language, top=1, key_method=key_method)[0][0]
+
+def casser_vigenere(text, language='fr', refine=False, max_len=20, method='ic', key_method='chi2', top=5):
+    # Renvoie (clé, texte déchiffré, candidats) ; candidats : {'lengths': [(longueur, score)],
+    # 'keys': [(clé, score, confiance)] pour la meilleure longueur, 'refined': [(clé, score quadrigrammes)]}
+    lengths = key_length_candidates(text, max_len, method, top=top)
+    keys = recover_keys(text, lengths[0][0], language, top, key_method)
+    refined = []
+    if refine:
+        from vigenere_quadgrams import refine_candidates  # import différé : vigenere_quadgrams importe ce module
+        refined = refine_candidates(text, max_len, method, language, key_method=key_method)
+    key = refined[0][0] if refined else keys[0][0]
+    return key, dechiffrer_vigenere(text, key), {'lengths': lengths, 'keys': keys, 'refined': refined}
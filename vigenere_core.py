@@ -0,0 +1,90 @@
+import numpy as np
+
+# Chiffre de Vigenère vectorisé, partagé par les applications (vigenere.py, cryptvigenere2methodes.py,
+# cryptanalysedevigenere.py). Résultat identique à l'ancienne boucle caractère par caractère :
+#   - l'indice dans la clé avance sur chaque caractère, lettre ou non ;
+#   - toute lettre (str.isalpha, accents et minuscules compris) devient chr((ord(c) ± décalage - 65) % 26 + 65) ;
+#   - le décalage d'un caractère de clé est ord(k) - 65 après key.upper().
+# Texte ASCII et octets : les caractères de même position modulo la longueur de la clé ont le même
+# décalage, chaque colonne est traduite d'un coup par bytes.translate (une table de 256 octets par
+# décalage). Autre texte : tableau de points de code uint32, décalage par indexation modulaire et
+# masque des lettres.
+# str renvoie str ; bytes, bytearray et memoryview (lus sans copie) renvoient bytes, dont seules
+# les lettres ASCII sont chiffrées (comme bytes.isalpha).
+# start : indice dans la clé du premier caractère, pour chiffrer un texte par morceaux (cipher_stream.py) :
+# le morceau qui commence au caractère n du texte se chiffre avec start=n.
+
+# SHIFT_TABLES[s] : décale de s les lettres ASCII, laisse les autres octets inchangés
+SHIFT_TABLES = [bytes((b - 65 + s) % 26 + 65 if b < 128 and chr(b).isalpha() else b for b in range(256)) for s in range(26)]
+# Au-delà, une colonne par caractère de clé coûte trop d'appels : table unique indexée par (décalage, octet)
+MAX_COLUMN_KEY_LEN = 4096
+
+def key_shifts(key, decrypt=False):
+    if isinstance(key, (bytes, bytearray, memoryview)):
+        key = bytes(key).decode('latin-1')
+    shifts = [(ord(c) - 65) % 26 for c in key.upper()]
+    return [(-s) % 26 for s in shifts] if decrypt else shifts
+
+def ascii_letter_mask(codes):
+    # Lettres ASCII : (c | 0x20) dans 'a'..'z', en arithmétique uint8 (le dépassement exclut le reste)
+    return ((codes | 0x20) - 97).astype(np.uint8, copy=False) < 26
+
+def unicode_letter_mask(codes):
+    # str.isalpha évalué une seule fois par caractère distinct hors ASCII
+    mask = (codes < 128) & ascii_letter_mask(np.minimum(codes, 0x7F).astype(np.uint8))
+    non_ascii = codes >= 128
+    if non_ascii.any():
+        distinct, inverse = np.unique(codes[non_ascii], return_inverse=True)
+        mask[non_ascii] = np.array([chr(c).isalpha() for c in distinct.tolist()], dtype=bool)[inverse.ravel()]
+    return mask
+
+def shift_bytes(data, shifts):
+    # data : objet octets (bytes, bytearray, memoryview) ; renvoie un tableau uint8
+    codes = np.frombuffer(data, dtype=np.uint8)
+    key_len = len(shifts)
+    if key_len == 0:
+        if ascii_letter_mask(codes).any():
+            raise ValueError("La clé ne doit pas être vide")
+        return codes.copy()
+    if key_len > MAX_COLUMN_KEY_LEN:
+        table = np.frombuffer(b''.join(SHIFT_TABLES), dtype=np.uint8)
+        index = np.resize(np.array(shifts, dtype=np.intp) * 256, len(codes))
+        index += codes
+        return table[index]
+    result = np.empty(len(codes), dtype=np.uint8)
+    for j, shift in enumerate(shifts):
+        column = bytes(data[j::key_len]).translate(SHIFT_TABLES[shift])
+        result[j::key_len] = np.frombuffer(column, dtype=np.uint8)
+    return result
+
+def shift_code_points(codes, shifts):
+    # codes : points de code uint32 ; lettres décalées selon la position modulo la clé, le reste inchangé
+    mask = unicode_letter_mask(codes)
+    if not mask.any():
+        return codes.copy()
+    if len(shifts) == 0:
+        raise ValueError("La clé ne doit pas être vide")
+    shifted = np.resize(np.array(shifts, dtype=np.int64), len(codes))
+    shifted += codes
+    shifted -= 65
+    shifted %= 26
+    shifted += 65
+    return np.where(mask, shifted, codes).astype(np.uint32)
+
+def vigenere_transform(text, key, decrypt=False, start=0):
+    shifts = key_shifts(key, decrypt)
+    if shifts:
+        phase = start % len(shifts)
+        shifts = shifts[phase:] + shifts[:phase]
+    if not isinstance(text, str):
+        return shift_bytes(text, shifts).tobytes()
+    if text.isascii():
+        return shift_bytes(text.encode('ascii'), shifts).tobytes().decode('ascii')
+    codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+    return shift_code_points(codes, shifts).tobytes().decode('utf-32-le', 'surrogatepass')
+
+def chiffrer_vigenere(text, key):
+    return vigenere_transform(text, key)
+
+def dechiffrer_vigenere(text, key):
+    return vigenere_transform(text, key, decrypt=True)
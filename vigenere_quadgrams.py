@@ -0,0 +1,122 @@
+import functools
+import os
+import unicodedata
+
+import numpy as np
+
+from vigenere_core import key_shifts
+from vigenere_analysis import letter_indices, key_length_candidates, recover_keys, NON_LETTER
+
+# Affinage de la clé par escalade (hill-climbing) sur un score de quadrigrammes.
+# Le score d'un texte est la somme des log10-probabilités de ses quadrigrammes de lettres, lues dans
+# une table NumPy de 26^4 flottants indexée par le code a·26³ + b·26² + c·26 + d. La table est
+# construite une fois (puis gardée en mémoire) à partir de corpus_fr.txt, extraits de textes français
+# du domaine public ; accents retirés, seules les lettres A..Z comptent.
+# Escalade : pour chaque position de la clé, les 26 lettres possibles sont essayées d'un coup et seuls
+# les quadrigrammes qui contiennent une lettre de cette colonne sont recalculés ; on recommence tant
+# qu'un tour complet améliore le score. Le code d'un quadrigramme touché est la somme de la part des
+# lettres de la colonne (précalculée pour les 26 décalages) et de celle des autres lettres (clé courante) ;
+# une colonne n'est réévaluée que si une colonne voisine (quadrigramme commun) a changé depuis. Points de départ : les meilleures clés de recover_keys (χ² ou IC mutuel)
+# pour les meilleures longueurs candidates (key_length_candidates).
+# Au-delà de sample_size lettres, seul le début du texte est utilisé : le score y est déjà sans ambiguïté.
+# Cette répartition par colonne ne dépend que du texte et de la longueur de clé (key_layout) :
+# refine_candidates la calcule une fois par longueur pour toutes les clés de départ de cette longueur.
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus_fr.txt')
+QUADGRAM_PACKING = np.array([26 ** 3, 26 ** 2, 26, 1])
+QUADGRAM_FLOOR = 0.01  # effectif attribué aux quadrigrammes absents du corpus
+SAMPLE_SIZE = 4096
+
+def quadgram_codes(letters):
+    letters = letters.astype(np.int32)
+    return letters[:-3] * 17576 + letters[1:-2] * 676 + letters[2:-1] * 26 + letters[3:]
+
+@functools.lru_cache(maxsize=None)
+def quadgram_table(path=CORPUS_PATH):
+    with open(path, encoding='utf-8') as f:
+        text = unicodedata.normalize('NFD', f.read())  # lettre accentuée = lettre de base + diacritique ignoré
+    letters = letter_indices(text)
+    codes = quadgram_codes(letters[letters != NON_LETTER])
+    counts = np.bincount(codes, minlength=26 ** 4)
+    return np.log10(np.maximum(counts, QUADGRAM_FLOOR) / max(1, len(codes))).astype(np.float32)
+
+def shortest_period(shifts):
+    # Une clé répétée (CLEFCLEF) chiffre comme sa période (CLEF)
+    for period in range(1, len(shifts)):
+        if len(shifts) % period == 0 and (shifts == np.tile(shifts[:period], len(shifts) // period)).all():
+            return shifts[:period]
+    return shifts
+
+def key_layout(text, key_len, sample_size=SAMPLE_SIZE):
+    # Lettres chiffrées du texte (échantillon), colonne de clé de chaque lettre et, pour chaque colonne :
+    # quadrigrammes qui contiennent une de ses lettres, part de la colonne dans leur code pour chacun des
+    # 26 décalages, poids des autres lettres, lettres de la colonne et colonnes voisines
+    raw = letter_indices(text)
+    if sample_size:
+        raw = raw[:sample_size]
+    positions = np.flatnonzero(raw != NON_LETTER)
+    cipher = raw[positions].astype(np.int64)
+    columns = positions % max(1, key_len)  # l'indice dans la clé avance aussi sur les caractères non lettres
+    windows = np.arange(max(0, len(cipher) - 3))[:, None] + np.arange(4)
+    window_columns = columns[windows]
+    # Quadrigrammes touchés par chaque colonne : paires (colonne, quadrigramme) distinctes, groupées par colonne
+    pairs = np.unique(window_columns.ravel() * len(windows) + np.repeat(np.arange(len(windows)), 4))
+    bounds = np.searchsorted(pairs, np.arange(key_len + 1) * len(windows))
+    # shifted[s, i] : lettre claire i si la lettre de clé de sa colonne était s
+    shifted = ((cipher - np.arange(26)[:, None]) % 26).astype(np.int32)
+    affected = []
+    for column in range(key_len):
+        touched = pairs[bounds[column]:bounds[column + 1]] - column * len(windows)
+        in_column = window_columns[touched] == column
+        column_codes = np.zeros((26, len(touched)), dtype=np.int32)
+        for k in range(4):
+            column_codes[:, in_column[:, k]] += shifted[:, windows[touched[in_column[:, k]], k]] * int(QUADGRAM_PACKING[k])
+        affected.append((windows[touched], column_codes, np.where(in_column, 0, QUADGRAM_PACKING), columns == column,
+                         np.flatnonzero(np.bincount(window_columns[touched].ravel(), minlength=key_len))))
+    return {'key_len': key_len, 'cipher': cipher, 'columns': columns, 'windows': windows, 'affected': affected}
+
+def refine_key(text, key, max_rounds=10, table=None, sample_size=SAMPLE_SIZE, layout=None):
+    # (clé affinée, score moyen par quadrigramme) ; layout : key_layout(text, len(key), sample_size) déjà calculé
+    table = quadgram_table() if table is None else table
+    shifts = np.array(key_shifts(key), dtype=np.int64)
+    if layout is None or layout['key_len'] != len(shifts):
+        layout = key_layout(text, len(shifts), sample_size)
+    cipher, windows = layout['cipher'], layout['windows']
+    if len(shifts) == 0 or len(cipher) < 4:
+        return ''.join(chr(65 + int(s)) for s in shortest_period(shifts)), 0.0
+    plain = (cipher - shifts[layout['columns']]) % 26
+    stale = np.ones(len(shifts), dtype=bool)  # colonnes dont un quadrigramme a changé depuis leur dernière évaluation
+    for _ in range(max_rounds):
+        improved = False
+        for column, (touched, column_codes, other_weights, letters_in_column, neighbours) in enumerate(layout['affected']):
+            if len(touched) == 0 or not stale[column]:
+                continue
+            stale[column] = False
+            # (26 lettres de clé, quadrigrammes touchés) : seules les lettres de la colonne changent
+            scores = table[column_codes + (plain[touched] * other_weights).sum(axis=1)].sum(axis=1, dtype=np.float64)
+            best = int(np.argmax(scores))
+            if scores[best] > scores[shifts[column]] + 1e-6:
+                shifts[column] = best
+                plain[letters_in_column] = (cipher[letters_in_column] - best) % 26
+                stale[neighbours] = True
+                stale[column] = False
+                improved = True
+        if not improved:
+            break
+    score = float(table[plain[windows] @ QUADGRAM_PACKING].mean(dtype=np.float64))
+    return ''.join(chr(65 + int(s)) for s in shortest_period(shifts)), score
+
+def refine_candidates(text, max_len=20, method='ic', language='fr', lengths=3, keys_per_length=3, max_rounds=10,
+                      table=None, key_method='chi2'):
+    # Liste de (clé, score) triée par score décroissant, sans doublon
+    table = quadgram_table() if table is None else table
+    refined = {}
+    for key_len, _ in key_length_candidates(text, max_len, method, top=lengths):
+        layout = key_layout(text, key_len)
+        for key, _, _ in recover_keys(text, key_len, language, keys_per_length, key_method):
+            key, score = refine_key(text, key, max_rounds, table, layout=layout)
+            refined[key] = max(score, refined.get(key, -np.inf))
+    return sorted(refined.items(), key=lambda item: -item[1])
+
+def affiner_cle(text, key, max_rounds=10):
+    return refine_key(text, key, max_rounds)[0]
@@ -0,0 +1,17 @@
+import streamlit as st
+
+from vigenere_analysis import KEY_SCORE_NAMES
+
+# Éléments d'interface Streamlit communs aux applications Vigenère (vigenere.py,
+# cryptvigenere2methodes.py, cryptanalysedevigenere.py) ; vigenere_analysis reste sans Streamlit.
+
+def afficher_resultats(candidats, key_estimee, choix):
+    # Longueurs et clés candidates renvoyées par casser_vigenere, puis la clé affinée s'il y en a une
+    st.write(f"Longueur estimée de la clé : {candidats['lengths'][0][0]}")
+    st.write("Longueurs candidates (score) : " + ", ".join(f"{k} ({score:.1f})" for k, score in candidats['lengths']))
+    st.write(f"Clé estimée : {candidats['keys'][0][0]}")
+    st.table([{"Clé": cle, KEY_SCORE_NAMES[choix]: round(score, 4), "Confiance": f"{confiance:.1%}"}
+              for cle, score, confiance in candidats['keys']])
+    if candidats['refined']:
+        st.write(f"Clé affinée : {key_estimee}")
+        st.table([{"Clé": cle, "Score quadrigrammes": round(score, 3)} for cle, score in candidats['refined'][:5]])